@@ -1,34 +1,150 @@
 """CV karşılaştırma ve değerlendirme sistemi web arayüzü."""
 
 import streamlit as st
+import io
 import os
 import pandas as pd
-from cv_parser import parse_cv
-from data_extractor import extract_structured_data
-from comparison_engine import compare_cv_data, generate_report
+from ingestion import audit_upload, default_workers
+from comparison_engine import generate_report, get_semantic_model
+from comparison_matrix import SECTION_NAMES, IncrementalComparison
+from data_extractor import get_nlp
+from dedup import duplicate_groups, group_duplicates
+from instrumentation import configure_logging
+from model_loader import load_times, warm_up
+from parse_cache import file_digest
+from pipeline import stream_analysis
+from result_store import PARQUET_AVAILABLE, ResultStore
 from typing import Dict, Any, List
 
-if not os.path.exists("data"):
-    os.makedirs("data")
+configure_logging()
 
 st.set_page_config(layout="wide", page_title="Akıllı CV Karşılaştırma Sistemi")
 
 
-def run_full_analysis(cv_file, name: str) -> Dict[str, Any]:
-    temp_path = os.path.join("data", f"{name}_{cv_file.name}")
-    with open(temp_path, "wb") as f:
-        f.write(cv_file.getbuffer())
-
-    sections = parse_cv(temp_path)
-    if not sections:
+@st.cache_resource
+def start_model_warmup():
+    """spaCy ve SBERT'i süreç başına bir kez, arka planda yükler; tüm oturumlar paylaşır."""
+    if os.environ.get("CV_MODEL_WARMUP", "1") == "0":
         return None
-    return extract_structured_data(sections)
+    return warm_up([get_nlp, get_semantic_model], background=True)
+
+
+start_model_warmup()
+
+# Oturum boyunca dosya özeti -> ayrıştırma sonucu ve artımlı skor matrisi; yalnızca yeni CV'ler işlenir
+if "parsed_cvs" not in st.session_state:
+    st.session_state.parsed_cvs = {}
+if "comparison" not in st.session_state:
+    st.session_state.comparison = IncrementalComparison()
+
+
+def count_for_section(data, section_key):
+    v = data.get(section_key)
+    if v is None:
+        return 0
+    if isinstance(v, str):
+        return len(v)
+    if isinstance(v, list):
+        return len(v)
+    try:
+        return len(v)
+    except Exception:
+        return 1
+
+
+def same_and_diff(list_a, list_b):
+    set_a = set([str(x).strip().lower() for x in list_a if x])
+    set_b = set([str(x).strip().lower() for x in list_b if x])
+    common = sorted(list(set_a & set_b))
+    only_a = sorted(list(set_a - set_b))
+    only_b = sorted(list(set_b - set_a))
+    return common, only_a, only_b
+
+
+LIST_KEYS = [
+    ("YETENEKLER", lambda d: d.get("YETENEKLER", [])),
+    ("TEKNİK_BECERİLER", lambda d: d.get("TEKNİK_BECERİLER", [])),
+    ("PROJELER", lambda d: [p.get('Raw_Entry') if isinstance(p, dict) else p for p in d.get('PROJELER', [])]),
+    ("SERTİFİKALAR", lambda d: [p.get('Raw_Entry') if isinstance(p, dict) else p for p in d.get('SERTİFİKALAR', [])]),
+    ("KURSLAR", lambda d: [p.get('Raw_Entry') if isinstance(p, dict) else p for p in d.get('KURSLAR', [])]),
+    ("KİŞİSEL_BECERİLER", lambda d: d.get('KİŞİSEL_BECERİLER', [])),
+    ("YABANCI_DİL", lambda d: [ (x.get('dil') if isinstance(x, dict) else x) for x in d.get('YABANCI_DİL', []) ])
+]
+
+
+def render_pair(container, key_i, key_j, display_i, display_j, data_i, data_j, total_score, section_scores):
+    """Bir çiftin açılır panelini çizer; rapor ve ortak/farklı özellikler yalnızca istendiğinde hesaplanır."""
+    with container.expander(f"{display_i} vs {display_j} — % {total_score * 100:.1f}", expanded=False):
+        # Streamlit açılır panelin açıldığını bildirmediği için ayrıntılar bir anahtarla istenir
+        if not st.toggle("Raporu ve ortak/farklı özellikleri göster", key=f"details_{key_i}_{key_j}"):
+            return
+        st.write("**İK Uzmanı Raporu (detay)**")
+        for line in generate_report(data_i, data_j, total_score, section_scores):
+            st.write(line)
+
+        st.markdown("---")
+        st.write("**Aynı / Farklı Özellikler**")
+        for key, extractor in LIST_KEYS:
+            a_list = extractor(data_i) or []
+            b_list = extractor(data_j) or []
+            common, only_a, only_b = same_and_diff(a_list, b_list)
+            st.markdown(f"**{key}**")
+            st.write(f"Ortak ({len(common)}): {', '.join(common) if common else 'Yok'}")
+            st.write(f"{display_i} ({len(only_a)}): {', '.join(only_a) if only_a else 'Yok'}")
+            st.write(f"{display_j} ({len(only_b)}): {', '.join(only_b) if only_b else 'Yok'}")
+            st.markdown("")
+
+
+def section_table(comparison, paired, parsed_cvs) -> pd.DataFrame:
+    """Bölüm ortalamaları (artımlı toplamlardan) ve aday başına öğe sayılarıyla özet tablo."""
+    # Ortalamalar artımlı tutulan toplamlardan gelir; çiftler yeniden dolaşılmaz
+    agg_scores = comparison.section_means()
+    all_sections = set(SECTION_NAMES)
+    ordered_keys = ['DENEYİM', 'YETENEKLER', 'TEKNİK_BECERİLER', 'EĞİTİM', 'YABANCI_DİL', 'SERTİFİKALAR', 'KURSLAR', 'ÖZET']
+    for s in sorted(all_sections):
+        if s not in ordered_keys:
+            ordered_keys.append(s)
+
+    if 'ÖZET' in ordered_keys:
+        ordered_keys = [k for k in ordered_keys if k != 'ÖZET']
+        insert_index = min(7, len(ordered_keys))
+        ordered_keys.insert(insert_index, 'ÖZET')
+
+    rows = []
+    for section in ordered_keys:
+        row = {'Alan': section, 'Benzerlik Skoru': f"% {agg_scores.get(section,0.0)*100:.1f}"}
+        for key, filename, display in paired:
+            col_name = f"{display} Öğeleri"
+            row[col_name] = parsed_cvs[key]["counts"].get(section, 0)
+        rows.append(row)
+
+    idx_ozet = next((i for i, r in enumerate(rows) if r.get('Alan') == 'ÖZET'), None)
+    idx_kisi = next((i for i, r in enumerate(rows) if r.get('Alan') == 'KİŞİSEL_BECERİLER'), None)
+    if idx_ozet is not None and idx_kisi is not None:
+        rows[idx_ozet], rows[idx_kisi] = rows[idx_kisi], rows[idx_ozet]
+
+    scores_df = pd.DataFrame(rows)
+
+    candidate_cols = [f"{display} Öğeleri" for _, filename, display in paired]
+    cols_order = ['Alan', 'Benzerlik Skoru'] + candidate_cols
+    for c in scores_df.columns:
+        if c not in cols_order:
+            cols_order.append(c)
+    return scores_df[cols_order]
 
 
 st.title("👨‍💻 CV Karşılaştırma ve Değerlendirme Sistemi")
 st.subheader("Birden fazla CV yükleyip karşılaştırabilirsiniz.")
 
 num_cvs = st.slider("Kaç CV yüklenecek? (En az 2, en fazla 20)", min_value=2, max_value=20, value=2)
+with st.sidebar.expander("Model yükleme süreleri", expanded=False):
+    for model_name, seconds in load_times().items():
+        st.write(f"{model_name}: {'yüklenmedi' if seconds is None else f'{seconds:.2f} sn'}")
+
+workers = st.sidebar.number_input("Paralel işçi sayısı (1 = sıralı)", min_value=1, max_value=os.cpu_count() or 1,
+                                  value=default_workers(20))
+skip_duplicates = st.sidebar.checkbox("Tekrar eden CV'leri ayıkla", value=True,
+                                      help="Metni neredeyse aynı olan CV'ler bir kez işlenir ve karşılaştırılır.")
 
 uploaded_files = []
 cols = st.columns(2)
@@ -42,142 +158,131 @@ uploaded_present = [f for f in uploaded_files if f is not None]
 if len(uploaded_present) < 2:
     st.info("Lütfen en az 2 adet CV yükleyin.")
 else:
-    if st.button("🚀 Karşılaştırmayı Başlat", type="primary"):
-        with st.spinner("CV'ler parse ediliyor ve analiz ediliyor..."):
-            data_list = []
-            labels = []
-            for idx, f in enumerate(uploaded_present):
-                label = chr(65 + idx)
-                d = run_full_analysis(f, label)
-                data_list.append(d)
-                labels.append(label)
-
-        paired = []
-        for i in range(len(data_list)):
-            if not data_list[i]:
-                continue
-            filename = uploaded_present[i].name
-            display = os.path.splitext(filename)[0]
-            paired.append((labels[i], filename, display, data_list[i]))
+    digests = [file_digest(f.getbuffer()) for f in uploaded_present]
+    started = st.button("🚀 Karşılaştırmayı Başlat", type="primary")
+    if started:
+        st.session_state.analysis_for = (tuple(digests), skip_duplicates)
+
+    # Sonuçlar, yüklenen dosyalar değişmedikçe sonraki yeniden çalıştırmalarda önbellekten çizilir
+    if st.session_state.get("analysis_for") == (tuple(digests), skip_duplicates):
+        parsed_cvs = st.session_state.parsed_cvs
+        comparison = st.session_state.comparison
+        displays = {}
+        for f, digest in zip(uploaded_present, digests):
+            displays.setdefault(digest, (f.name, os.path.splitext(f.name)[0]))
+
+        def current_pairs():
+            """Şu anki yüklemelerden karşılaştırmaya alınmış CV'ler, yükleme sırasıyla."""
+            return [(d, displays[d][0], displays[d][1]) for d in dict.fromkeys(digests) if d in comparison]
+
+        # Okunamayan dosyalar yalnızca kullanıcı yeniden başlattığında tekrar işlenir, her yeniden çizimde değil
+        todo = [k for k, digest in enumerate(digests)
+                if (digest not in parsed_cvs or (started and parsed_cvs[digest]["error"]))
+                and digest not in digests[:k]]
+        known = [d for d in dict.fromkeys(digests) if d in parsed_cvs and parsed_cvs[d]["data"]]
+        if skip_duplicates:
+            known_reps = group_duplicates([parsed_cvs[d]["fingerprint"] for d in known])
+            known = [d for k, d in enumerate(known) if known_reps[k] == k]
+        comparison.sync([(d, parsed_cvs[d]["data"]) for d in known])
+
+        notices = st.container()
+        summary_slot = st.empty()
+        metric_slot = st.empty()
+        st.markdown("---")
+        st.subheader("İK Uzmanı Raporları")
+        reports_area = st.container()
+        order = {d: k for k, d in reversed(list(enumerate(digests)))}
+
+        def show_pair(key_a, key_b, total_score, section_scores):
+            if order[key_a] > order[key_b]:
+                key_a, key_b = key_b, key_a
+            render_pair(reports_area, key_a, key_b, displays[key_a][1], displays[key_b][1],
+                        comparison.data(key_a), comparison.data(key_b), total_score, section_scores)
+
+        def show_summary():
+            paired = current_pairs()
+            if len(paired) < 2:
+                return
+            summary_slot.table(section_table(comparison, paired, parsed_cvs))
+            combined_label = " vs ".join([display for _, filename, display in paired])
+            metric_slot.metric(label=f"Genel Benzerlik ({combined_label})", value=f"% {comparison.mean_total()*100:.1f}")
+
+        # Önce önbellekteki çiftler, ardından yeni CV'ler işlendikçe gelen çiftler çizilir
+        cached = current_pairs()
+        for i in range(len(cached)):
+            for j in range(i + 1, len(cached)):
+                show_pair(cached[i][0], cached[j][0], *comparison.score(cached[i][0], cached[j][0]))
+        show_summary()
+
+        if todo:
+            # Yüklemeler diske yazılmadan, getbuffer() görünümü üzerinden ayrıştırılır (CV_AUDIT_DIR ayarlıysa kopyalanır)
+            sources = []
+            for k in todo:
+                buffer = uploaded_present[k].getbuffer()
+                audit_upload(uploaded_present[k].name, buffer, digests[k])
+                sources.append((uploaded_present[k].name, buffer))
+            progress_bar = st.progress(0.0)
+            progress_text = st.empty()
+            fingerprints = {d: parsed_cvs[d]["fingerprint"] for d in known}
+            events = stream_analysis([(digests[k], source) for k, source in zip(todo, sources)], comparison,
+                                     fingerprints=fingerprints, workers=int(workers), dedup=skip_duplicates)
+            for event in events:
+                if event["type"] in ("text", "parsed"):
+                    result = event["result"]
+                    stage = "metin" if event["type"] == "text" else "analiz"
+                    status = f"❌ {result['error']}" if result["error"] else f"✅ {result['seconds']:.1f} sn"
+                    if result.get("truncated"):
+                        status += " (kısmen okundu)"
+                    progress_bar.progress(event["done"] / event["total"])
+                    progress_text.write(f"{stage} {event['done']}/{event['total']} — {result['name']}: {status}")
+                if event["type"] == "parsed":
+                    record = event["record"]
+                    data = record["structured"] if record else None
+                    parsed_cvs[event["key"]] = {
+                        "data": data,
+                        "error": event["result"]["error"],
+                        "truncated": bool(event["result"].get("truncated")),
+                        "counts": {s: count_for_section(data, s) for s in SECTION_NAMES} if data else {},
+                        "fingerprint": event["fingerprint"],
+                    }
+                elif event["type"] == "pair":
+                    show_pair(event["key_a"], event["key_b"], event["total"], event["sections"])
+                    show_summary()
+            progress_bar.empty()
+            progress_text.empty()
+
+        failed = [(f.name, parsed_cvs[digest]["error"]) for f, digest in zip(uploaded_present, digests) if parsed_cvs[digest]["error"]]
+        if failed:
+            notices.warning("Okunamayan dosyalar: " + ", ".join(f"{name} ({error})" for name, error in failed))
+        truncated = [f.name for f, digest in zip(uploaded_present, digests) if parsed_cvs[digest].get("truncated")]
+        if truncated:
+            notices.warning("Süre ya da sayfa sınırı nedeniyle kısmen okunan dosyalar: " + ", ".join(truncated))
+
+        # Aynı dosya ya da metni neredeyse aynı CV'ler (SimHash) karşılaştırmaya bir kez alınır
+        if skip_duplicates:
+            representatives = group_duplicates([parsed_cvs[d].get("fingerprint") for d in digests])
+        else:
+            representatives = [digests.index(d) for d in digests]
+        for group in duplicate_groups(representatives):
+            names = [uploaded_present[k].name for k in group]
+            notices.info(f"Tekrar eden CV'ler: {', '.join(names)} — yalnızca {names[0]} karşılaştırıldı.")
+
+        # Akış sırasında seçilen temsilci yükleme sırasındakinden farklıysa küme düzeltilip yeniden çizilir
+        added, removed = comparison.sync([(d, parsed_cvs[d]["data"]) for k, d in enumerate(digests)
+                                          if representatives[k] == k and parsed_cvs[d]["data"]])
+        if added or removed:
+            st.rerun()
+
+        paired = current_pairs()
         if len(paired) < 2:
-            st.error("Yüklenen dosyalardan en az iki tanesi okunabilir olmalı.")
+            notices.error("Yüklenen dosyalardan en az iki tanesi okunabilir olmalı.")
         else:
-            def count_for_section(data, section_key):
-                v = data.get(section_key)
-                if v is None:
-                    return 0
-                if isinstance(v, str):
-                    return len(v)
-                if isinstance(v, list):
-                    return len(v)
-                try:
-                    return len(v)
-                except Exception:
-                    return 1
-
-            comparisons = []
-            n = len(paired)
-            for i in range(n):
-                for j in range(i + 1, n):
-                    label_i, filename_i, display_i, data_i = paired[i]
-                    label_j, filename_j, display_j, data_j = paired[j]
-                    pair_label = f"{display_i} vs {display_j}"
-                    total_score, section_scores = compare_cv_data(data_i, data_j)
-                    report_lines = generate_report(data_i, data_j, total_score, section_scores)
-                    comparisons.append((pair_label, total_score, section_scores, report_lines, display_i, display_j, data_i, data_j))
-
-            agg_scores = {}
-            all_sections = set()
-            for comp in comparisons:
-                section_scores = comp[2]
-                for s in section_scores.keys():
-                    all_sections.add(s)
-            ordered_keys = ['DENEYİM', 'YETENEKLER', 'TEKNİK_BECERİLER', 'EĞİTİM', 'YABANCI_DİL', 'SERTİFİKALAR', 'KURSLAR', 'ÖZET']
-            for s in all_sections:
-                if s not in ordered_keys:
-                    ordered_keys.append(s)
-
-            if 'ÖZET' in ordered_keys:
-                ordered_keys = [k for k in ordered_keys if k != 'ÖZET']
-                insert_index = min(7, len(ordered_keys))
-                ordered_keys.insert(insert_index, 'ÖZET')
-
-            for section in ordered_keys:
-                vals = [comp[2].get(section, 0.0) for comp in comparisons]
-                agg_scores[section] = sum(vals) / len(vals) if vals else 0.0
-
-            rows = []
-            for section in ordered_keys:
-                row = {'Alan': section, 'Benzerlik Skoru': f"% {agg_scores.get(section,0.0)*100:.1f}"}
-                for i, (lbl, filename, display, data) in enumerate(paired):
-                    col_name = f"{display} Öğeleri"
-                    row[col_name] = count_for_section(data, section)
-                rows.append(row)
-
-            idx_ozet = next((i for i, r in enumerate(rows) if r.get('Alan') == 'ÖZET'), None)
-            idx_kisi = next((i for i, r in enumerate(rows) if r.get('Alan') == 'KİŞİSEL_BECERİLER'), None)
-            if idx_ozet is not None and idx_kisi is not None:
-                rows[idx_ozet], rows[idx_kisi] = rows[idx_kisi], rows[idx_ozet]
-
-            scores_df = pd.DataFrame(rows)
-
-            candidate_cols = [f"{display} Öğeleri" for _, filename, display, _ in paired]
-            cols_order = ['Alan', 'Benzerlik Skoru'] + candidate_cols
-            for c in scores_df.columns:
-                if c not in cols_order:
-                    cols_order.append(c)
-            scores_df = scores_df[cols_order]
-
-            st.table(scores_df)
-
-            st.header("✅ Analiz Tamamlandı")
-            total_vals = [comp[1] for comp in comparisons]
-            combined_label = " vs ".join([display for _, filename, display, _ in paired])
-            avg_total = sum(total_vals) / len(total_vals) if total_vals else 0.0
-            st.metric(label=f"Genel Benzerlik ({combined_label})", value=f"% {avg_total*100:.1f}")
-            st.markdown("---")
-
-            st.subheader("İK Uzmanı Raporları")
-            
-            def same_and_diff(list_a, list_b):
-                set_a = set([str(x).strip().lower() for x in list_a if x])
-                set_b = set([str(x).strip().lower() for x in list_b if x])
-                common = sorted(list(set_a & set_b))
-                only_a = sorted(list(set_a - set_b))
-                only_b = sorted(list(set_b - set_a))
-                return common, only_a, only_b
-
-            for pair_item in comparisons:
-                pair_label, _, _, report_lines, display_i, display_j, data_i, data_j = pair_item
-                with st.expander(pair_label, expanded=False):
-                    st.write("**İK Uzmanı Raporu (detay)**")
-                    for line in report_lines:
-                        st.write(line)
-
-                    st.markdown("---")
-                    st.write("**Aynı / Farklı Özellikler**")
-                    list_keys = [
-                        ("YETENEKLER", lambda d: d.get("YETENEKLER", [])),
-                        ("TEKNİK_BECERİLER", lambda d: d.get("TEKNİK_BECERİLER", [])),
-                        ("PROJELER", lambda d: [p.get('Raw_Entry') if isinstance(p, dict) else p for p in d.get('PROJELER', [])]),
-                        ("SERTİFİKALAR", lambda d: [p.get('Raw_Entry') if isinstance(p, dict) else p for p in d.get('SERTİFİKALAR', [])]),
-                        ("KURSLAR", lambda d: [p.get('Raw_Entry') if isinstance(p, dict) else p for p in d.get('KURSLAR', [])]),
-                        ("KİŞİSEL_BECERİLER", lambda d: d.get('KİŞİSEL_BECERİLER', [])),
-                        ("YABANCI_DİL", lambda d: [ (x.get('dil') if isinstance(x, dict) else x) for x in d.get('YABANCI_DİL', []) ])
-                    ]
-
-                    for key, extractor in list_keys:
-                        a_list = extractor(data_i) or []
-                        b_list = extractor(data_j) or []
-                        common, only_a, only_b = same_and_diff(a_list, b_list)
-                        st.markdown(f"**{key}**")
-                        st.write(f"Ortak ({len(common)}): {', '.join(common) if common else 'Yok'}")
-                        st.write(f"{display_i} ({len(only_a)}): {', '.join(only_a) if only_a else 'Yok'}")
-                        st.write(f"{display_j} ({len(only_b)}): {', '.join(only_b) if only_b else 'Yok'}")
-                        st.markdown("")
-            
+            notices.header("✅ Analiz Tamamlandı")
+            show_summary()
+
             all_certs = []
-            for _, _, display, data in paired:
+            for key, _, display in paired:
+                data = parsed_cvs[key]["data"]
                 certs = data.get("SERTİFİKALAR", []) + data.get("KURSLAR", [])
                 for c in certs:
                     entry = c.get('Raw_Entry') if isinstance(c, dict) else str(c)
@@ -191,8 +296,8 @@ else:
                     st.write("Yok")
 
             all_refs = []
-            for _, _, display, data in paired:
-                refs = data.get("REFERANSLAR", [])
+            for key, _, display in paired:
+                refs = parsed_cvs[key]["data"].get("REFERANSLAR", [])
                 for r in refs:
                     entry = r if not isinstance(r, dict) else (r.get('name') or r.get('raw') or str(r))
                     all_refs.append((display, entry))
@@ -203,3 +308,17 @@ else:
                         st.write(f"{display}: {entry}")
                 else:
                     st.write("Yok")
+
+            # Çift skorları sıkıştırılmış dizilere alınır; sıralama ve dışa aktarma bunlardan yapılır
+            names = {key: display for key, _, display in paired}
+            store = ResultStore.from_comparison(comparison, ids=[names[key] for key in comparison.keys])
+            with st.expander("Aday Sıralaması ve Dışa Aktarma", expanded=False):
+                st.table(pd.DataFrame([{"Aday": cv_id, "Ortalama Benzerlik": f"% {score*100:.1f}"}
+                                       for cv_id, score in store.ranking()]))
+                buffer = io.BytesIO()
+                store.save_npz(buffer)
+                st.download_button("Skorları indir (.npz)", buffer.getvalue(), file_name="cv_skorlari.npz")
+                if PARQUET_AVAILABLE:
+                    buffer = io.BytesIO()
+                    store.save_parquet(buffer)
+                    st.download_button("Skorları indir (.parquet)", buffer.getvalue(), file_name="cv_skorlari.parquet")
@@ -0,0 +1,304 @@
+"""Bir klasördeki CV'leri arayüz olmadan karşılaştıran toplu komut satırı aracı.
+
+Örnek:
+    python batch_compare.py data/ -o sonuclar.jsonl --workers 8
+    python batch_compare.py data/ -o sonuclar.csv --format csv --resume
+    python batch_compare.py data/ -o sonuclar.parquet
+    python batch_compare.py data/ -o benzerler.jsonl --min-score 0.6
+    python batch_compare.py data/ -o sonuclar.jsonl --deadline 600
+    python batch_compare.py buyuk_havuz/ -o sonuclar.jsonl --approx-sets
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
+
+import instrumentation
+from comparison_engine import PRUNE_STATS, SET_SECTIONS, SEMANTIC_SECTIONS, build_features, score_block, score_block_pruned
+from ingestion import BATCH_DEADLINE_SECONDS, ingest_files
+from result_store import ResultStore
+
+SECTION_COLUMNS = SET_SECTIONS + SEMANTIC_SECTIONS
+# Bu biçimler çiftleri bellekte sıkıştırılmış dizilerde toplar ve sonda tek seferde yazar
+ARRAY_FORMATS = {"npz", "parquet"}
+FORMAT_EXTENSIONS = {".csv": "csv", ".npz": "npz", ".parquet": "parquet"}
+
+
+def discover_pdfs(input_dir: str, recursive: bool = False) -> List[str]:
+    """Klasördeki PDF'leri sıralı (devam ettirmede aynı sıra için) döndürür."""
+    pattern = os.path.join(input_dir, "**", "*.pdf") if recursive else os.path.join(input_dir, "*.pdf")
+    return sorted(glob.glob(pattern, recursive=recursive))
+
+
+def _truncate_partial_line(path: str) -> None:
+    """Yarıda kesilmiş son satırı siler (çökme sonrası devam için)."""
+    with open(path, "rb+") as f:
+        content = f.read()
+        if content and not content.endswith(b"\n"):
+            f.truncate(content.rfind(b"\n") + 1)
+
+
+def load_done_pairs(path: str, fmt: str) -> Set[Tuple[str, str]]:
+    """Önceki çalıştırmanın yazdığı çiftleri okur."""
+    if not os.path.exists(path):
+        return set()
+    _truncate_partial_line(path)
+    done = set()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                done.add((row["cv_a"], row["cv_b"]))
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    done.add((record["cv_a"], record["cv_b"]))
+    return done
+
+
+def progress_path(output: str) -> str:
+    return f"{output}.progress"
+
+
+def names_digest(names: List[str]) -> str:
+    """Karşılaştırılan CV listesinin özeti; liste değişince blok sınırları da değişir."""
+    return hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()[:16]
+
+
+def load_done_rows(output: str, digest: str, min_score: Optional[float]) -> Set[int]:
+    """
+    İlerleme dosyasından, aynı CV listesiyle tamamlanmış blokların satırlarını okur. Bu satırların tüm
+    çiftleri işlenmiştir (--min-score ile eşik altında kalıp yazılmayanlar dahil). Daha yüksek bir eşikle
+    tamamlanan bloklar sayılmaz, çünkü aradaki çiftler yazılmamıştır.
+    """
+    path = progress_path(output)
+    if not os.path.exists(path):
+        return set()
+    _truncate_partial_line(path)
+    rows: Set[int] = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            block = json.loads(line)
+            previous = block.get("min_score")
+            if block["names"] != digest or (previous is not None and (min_score is None or previous > min_score)):
+                continue
+            rows.update(range(block["rows"][0], block["rows"][1]))
+    return rows
+
+
+class ResultWriter:
+    """Çift skorlarını JSONL ya da CSV olarak, her blokta diske boşaltarak yazar."""
+
+    def __init__(self, path: str, fmt: str, append: bool):
+        new_file = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self._file = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        self._fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.writer(self._file)
+            if new_file:
+                self._csv.writerow(["cv_a", "cv_b", "total"] + SECTION_COLUMNS)
+
+    def write(self, cv_a: str, cv_b: str, total: float, sections: Dict[str, float]) -> None:
+        if self._csv is not None:
+            self._csv.writerow([cv_a, cv_b, f"{total:.3f}"] + [f"{sections[s]:.4f}" for s in SECTION_COLUMNS])
+        else:
+            record = {"cv_a": cv_a, "cv_b": cv_b, "total": total,
+                      "sections": {s: round(sections[s], 4) for s in SECTION_COLUMNS}}
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def run(args: argparse.Namespace) -> int:
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    paths = discover_pdfs(args.input_dir, args.recursive)
+    timings["discover"] = time.perf_counter() - started
+    print(f"{len(paths)} PDF bulundu: {args.input_dir}", file=sys.stderr)
+
+    # 1. Ayrıştırma (ayrıştırma önbelleği sayesinde devam eden çalıştırmalarda hızlıdır)
+    stage = time.perf_counter()
+
+    def on_progress(done: int, total: int, result: Dict[str, Any]) -> None:
+        status = f"HATA: {result['error']}" if result["error"] else f"{result['seconds']:.1f} sn"
+        if result.get("truncated"):
+            status += " (kısmen okundu)"
+        print(f"[{done}/{total}] {result['name']}: {status}", file=sys.stderr)
+
+    deadline = time.time() + args.deadline if args.deadline > 0 else None
+    results = ingest_files(paths, workers=args.workers, progress=on_progress, dedup=not args.no_dedup,
+                           deadline=deadline)
+    timings["ingest"] = time.perf_counter() - stage
+
+    # Tekrar eden CV'ler temsilcilerinin kaydını paylaşır; yalnızca temsilciler karşılaştırılır
+    ok = [r for r in results if r["record"] and not r.get("duplicate_of")]
+    failed = [r for r in results if not r["record"]]
+    duplicate_groups: Dict[str, List[str]] = {}
+    for r in results:
+        if r.get("duplicate_of"):
+            rep = os.path.relpath(r["duplicate_of"], args.input_dir)
+            duplicate_groups.setdefault(rep, []).append(os.path.relpath(r["path"], args.input_dir))
+    if duplicate_groups:
+        print(f"{sum(len(v) for v in duplicate_groups.values())} tekrar eden CV atlandı ({len(duplicate_groups)} grup)",
+              file=sys.stderr)
+    names = [os.path.relpath(r["path"], args.input_dir) for r in ok]
+    if len(ok) < 2:
+        print("Karşılaştırma için en az iki okunabilir CV gerekli.", file=sys.stderr)
+        return 1
+
+    # 2. Özellikler: her CV'nin her bölümü bir kez kodlanır
+    stage = time.perf_counter()
+    features = build_features([r["record"]["structured"] for r in ok], approximate_sets=args.approx_sets)
+    timings["encode"] = time.perf_counter() - stage
+
+    # 3. Blok blok puanlama ve akış halinde yazma
+    done_pairs = load_done_pairs(args.output, args.format) if args.resume else set()
+    digest = names_digest(names)
+    done_rows = load_done_rows(args.output, digest, args.min_score) if args.resume else set()
+    store = ResultStore(names, section_names=SECTION_COLUMNS) if args.format in ARRAY_FORMATS else None
+    writer = None if store is not None else ResultWriter(args.output, args.format, append=args.resume)
+    # Tamamlanan bloklar ayrıca kaydedilir; eşik altında kalıp yazılmayan çiftler devamda yeniden puanlanmaz
+    progress = None if store is not None else open(progress_path(args.output), "a" if args.resume else "w",
+                                                   encoding="utf-8")
+    n = len(ok)
+    written = 0
+    skipped = 0
+    below_min_score = 0
+    score_seconds = 0.0
+    write_seconds = 0.0
+    try:
+        for block_start in range(0, n - 1, args.block_size):
+            rows = list(range(block_start, min(block_start + args.block_size, n - 1)))
+            cols = list(range(block_start + 1, n))
+            todo = [(i, j) for i in rows if i not in done_rows for j in range(i + 1, n)
+                    if (names[i], names[j]) not in done_pairs]
+            skipped += sum(n - 1 - i for i in rows) - len(todo)
+            if not todo:
+                continue
+
+            stage = time.perf_counter()
+            if args.min_score is None:
+                total, section_matrices = score_block(features, rows, cols)
+            else:
+                # Eşiğe ulaşamayacak çiftlerin kalan semantik bölümleri hesaplanmaz (NaN döner) ve yazılmaz
+                mask = np.zeros((len(rows), len(cols)), dtype=bool)
+                for i, j in todo:
+                    mask[i - block_start, j - block_start - 1] = True
+                total, section_matrices = score_block_pruned(features, rows, cols, threshold=args.min_score, mask=mask)
+                kept = [(i, j) for i, j in todo if total[i - block_start, j - block_start - 1] >= args.min_score]
+                below_min_score += len(todo) - len(kept)
+                todo = kept
+            score_seconds += time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            if store is not None:
+                pair_rows = np.fromiter((i for i, _ in todo), dtype=np.int32, count=len(todo))
+                pair_cols = np.fromiter((j for _, j in todo), dtype=np.int32, count=len(todo))
+                a, b = pair_rows - block_start, pair_cols - block_start - 1
+                store.append(pair_rows, pair_cols, total[a, b], {s: m[a, b] for s, m in section_matrices.items()})
+            else:
+                for i, j in todo:
+                    a, b = i - block_start, j - block_start - 1
+                    writer.write(names[i], names[j], float(total[a, b]),
+                                 {s: float(m[a, b]) for s, m in section_matrices.items()})
+                writer.flush()
+                progress.write(json.dumps({"names": digest, "rows": [rows[0], rows[-1] + 1],
+                                           "min_score": args.min_score}) + "\n")
+                progress.flush()
+            write_seconds += time.perf_counter() - stage
+            written += len(todo)
+    finally:
+        if writer is not None:
+            writer.close()
+        if progress is not None:
+            progress.close()
+    if store is not None:
+        stage = time.perf_counter()
+        if args.format == "npz":
+            store.save_npz(args.output)
+        else:
+            store.save_parquet(args.output)
+        write_seconds += time.perf_counter() - stage
+    timings["score"] = score_seconds
+    timings["write"] = write_seconds
+    timings["total"] = time.perf_counter() - started
+
+    summary = {
+        "files": len(paths),
+        "parsed": len(ok),
+        "failed": [{"file": r["name"], "error": r["error"]} for r in failed],
+        "truncated": [r["name"] for r in results if r.get("truncated")],
+        "duplicate_groups": [{"representative": rep, "duplicates": dups} for rep, dups in duplicate_groups.items()],
+        "pairs_written": written,
+        "pairs_skipped_resume": skipped,
+        "timings_seconds": {k: round(v, 3) for k, v in timings.items()},
+    }
+    if args.approx_sets:
+        summary["approximate_set_candidates"] = {s: sum(map(len, neighbors)) // 2
+                                                 for s, neighbors in features["set_neighbors"].items()}
+    if args.min_score is not None:
+        summary["pairs_below_min_score"] = below_min_score
+        summary["pairs_pruned_early"] = PRUNE_STATS["pairs_pruned"]
+        summary["semantic_evaluations_skipped"] = PRUNE_STATS["semantic_skipped"]
+        summary["semantic_evaluations_done"] = PRUNE_STATS["semantic_evaluated"]
+    if instrumentation.METRICS_ENABLED:
+        summary["metrics"] = instrumentation.snapshot()
+        if args.metrics:
+            instrumentation.write_prometheus(args.metrics)
+    print(json.dumps(summary, ensure_ascii=False, indent=2), file=sys.stderr)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bir klasördeki CV'leri ikili olarak karşılaştırır ve skorları akış halinde yazar.")
+    parser.add_argument("input_dir", help="PDF CV'lerin bulunduğu klasör")
+    parser.add_argument("-o", "--output", required=True, help="Çıktı dosyası (JSONL, CSV, NPZ ya da Parquet)")
+    parser.add_argument("--format", choices=["jsonl", "csv", "npz", "parquet"], default=None,
+                        help="Çıktı biçimi (varsayılan: uzantıdan)")
+    parser.add_argument("--workers", type=int, default=None, help="Ayrıştırma işçi sayısı (1 = sıralı)")
+    parser.add_argument("--block-size", type=int, default=256, help="Bir seferde puanlanan satır (CV) sayısı")
+    parser.add_argument("--min-score", type=float, default=None,
+                        help="Yalnızca toplam skoru en az bu kadar olan çiftleri yaz (budamalı puanlama)")
+    parser.add_argument("--deadline", type=float, default=BATCH_DEADLINE_SECONDS,
+                        help="Ayrıştırma için toplam süre (saniye, 0 = sınırsız); dolunca kalan CV'ler kısmen okunur")
+    parser.add_argument("--approx-sets", action="store_true",
+                        help="Beceri/dil kümelerini yalnızca MinHash/LSH aday çiftleri için puanla (çok büyük havuzlar)")
+    parser.add_argument("--resume", action="store_true", help="Var olan çıktıya devam et, yazılmış çiftleri atla")
+    parser.add_argument("--recursive", action="store_true", help="Alt klasörleri de tara")
+    parser.add_argument("--no-dedup", action="store_true", help="Neredeyse aynı CV'leri ayıklamadan hepsini karşılaştır")
+    parser.add_argument("--summary", default=None, help="Aşama sürelerinin yazılacağı JSON dosyası")
+    parser.add_argument("--metrics", default=None, help="Ölçümlerin Prometheus metin biçiminde yazılacağı dosya (ölçümü açar)")
+    args = parser.parse_args(argv)
+    instrumentation.configure_logging()
+    if args.metrics:
+        instrumentation.enable()
+    if args.format is None:
+        args.format = FORMAT_EXTENSIONS.get(os.path.splitext(args.output.lower())[1], "jsonl")
+    if args.resume and args.format in ARRAY_FORMATS:
+        parser.error("--resume yalnızca JSONL ve CSV çıktılarıyla kullanılabilir")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""SQLite tabanlı, boyut sınırlı kalıcı önbellek yardımcıları."""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Iterable, Tuple
+
+CACHE_DIR = os.environ.get("CV_CACHE_DIR", ".cache")
+
+
+def cache_path(filename: str) -> str:
+    """Önbellek dizini altındaki dosya yolunu döndürür, dizini gerekirse oluşturur."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+class SqliteBlobStore:
+    """
+    Anahtar -> bayt dizisi saklayan kalıcı depo.
+
+    Toplam boyut max_bytes değerini aşınca en uzun süredir erişilmeyen kayıtlar silinir.
+    Birden fazla süreç aynı dosyayı WAL kipinde güvenle paylaşabilir.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """Verilen anahtarlardan depoda bulunanları döndürür ve erişim zamanlarını günceller."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            # SQLite parametre sınırına takılmamak için parçalar halinde sorgula
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(f"SELECT key, value FROM entries WHERE key IN ({placeholders})", chunk).fetchall()
+                found.update({k: bytes(v) for k, v in rows})
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?", [(now, k) for k in found])
+                conn.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key: str, value: bytes) -> None:
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        """Kayıtları yazar; boyut sınırı aşılırsa eski kayıtları temizler."""
+        now = time.time()
+        rows = [(k, sqlite3.Binary(v), len(v), now) for k, v in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO entries(key, value, size, last_access) VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+            self._evict(conn)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Her seferinde tek tek silmemek için sınırın %90'ına kadar boşalt
+        target = int(self.max_bytes * 0.9)
+        removed: List[str] = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC"):
+            if total <= target:
+                break
+            removed.append(key)
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in removed])
+        conn.commit()
+        self.evictions += len(removed)
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,421 @@
+"""Büyük aday havuzunda en benzer k CV'yi bulmak için kalıcı vektör indeksi.
+
+Örnek:
+    python candidate_index.py build data/ --index .cache/aday_indeksi
+    python candidate_index.py query referans.pdf --index .cache/aday_indeksi -k 50
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from comparison_engine import (EMBEDDING_MODEL_KEY, PRUNE_EPSILON, PRUNE_ORDER, PRUNE_STATS, SET_SECTIONS,
+                               SEMANTIC_SECTIONS, WEIGHTS, align_entries, build_features, prune_bar, take_entries)
+from instrumentation import incr
+
+# Kaba (IVF) aramada kümelemeye giren, ağırlığı yüksek semantik bölümler
+IVF_SECTIONS = ["DENEYİM", "EĞİTİM", "ÖZET"]
+
+# Kesin aramada bir seferde puanlanan aday sayısı
+QUERY_BLOCK_SIZE = 8192
+
+# Diskteki indeks biçimi; bölüm gömmeleri girdi düzeyine geçince 2 oldu
+INDEX_FORMAT = 2
+
+
+def _grow(array: np.ndarray, needed: int, minimum: int = 1024) -> np.ndarray:
+    """Diziyi ilk boyutta en az needed olacak şekilde, kapasiteyi ikiye katlayarak büyütür (içerik korunur)."""
+    if array.shape[0] >= needed:
+        return array
+    grown = np.zeros((max(needed, 2 * array.shape[0], minimum),) + array.shape[1:], dtype=array.dtype)
+    grown[:array.shape[0]] = array
+    return grown
+
+
+def _entry_means(entries: Dict[str, np.ndarray], dim: int) -> np.ndarray:
+    """CV başına girdi gömmelerinin normalize ortalaması; girdisi olmayan CV sıfır vektör alır."""
+    offsets = entries["offsets"]
+    counts = np.diff(offsets)
+    means = np.zeros((len(counts), dim), dtype=np.float32)
+    rows = np.flatnonzero(counts)
+    if len(rows):
+        sums = np.add.reduceat(entries["embeddings"], offsets[rows] - offsets[0], axis=0)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        means[rows] = sums / np.maximum(norms, 1e-12)
+    return means
+
+
+def _kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 20, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Kosinüs benzerliğiyle basit (küresel) k-means; (merkezler, atamalar) döndürür."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=n_clusters, replace=False)].copy()
+    assign = np.zeros(len(vectors), dtype=np.int32)
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+        for c in range(n_clusters):
+            members = vectors[assign == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                norm = np.linalg.norm(centroid)
+                centroids[c] = centroid / norm if norm > 0 else centroid
+    return centroids, assign
+
+
+class CandidateIndex:
+    """
+    Aday CV'lerin bölüm girdi gömmelerini ve beceri kümelerini tutan indeks.
+
+    Her semantik bölümün tüm girdileri tek matriste, aday i'nin girdileri offsets[i]:offsets[i + 1]
+    satırlarındadır. Skorlama compare_cv_data ile aynı girdi hizalamasını ve ağırlıklı bölüm formülünü kullanır. Aday eklemek yeniden kurulum
+    gerektirmez; IVF kurulmuşsa yeni adaylar en yakın kümeye atanır. save() yalnızca yeni satırları yeni bir
+    parça dosyasına yazar.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.model_name = EMBEDDING_MODEL_KEY
+        self.ids: List[str] = []
+        self._count = 0
+        self._dim = 0
+        self._entries: Dict[str, np.ndarray] = {}
+        self._offsets: Dict[str, np.ndarray] = {section: np.zeros(1, dtype=np.int64) for section in SEMANTIC_SECTIONS}
+        self._sets: Dict[str, List[List[str]]] = {section: [] for section in SET_SECTIONS}
+        self._postings: Dict[str, Dict[str, List[int]]] = {section: {} for section in SET_SECTIONS}
+        self._set_sizes: Dict[str, List[int]] = {section: [] for section in SET_SECTIONS}
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._saved_count = 0
+        self._shards: List[str] = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ------------------------------------------------------------------ ekleme
+
+    def _section(self, section: str, rows=None) -> Dict[str, np.ndarray]:
+        """Bölümün (verilen satırlardaki) girdileri; take_entries / align_entries biçiminde."""
+        entries = {"embeddings": self._entries.get(section, np.zeros((0, self._dim), dtype=np.float32)),
+                   "offsets": self._offsets[section][:self._count + 1]}
+        return entries if rows is None else take_entries(entries, rows)
+
+    def _append_entries(self, section: str, new: Dict[str, np.ndarray]) -> None:
+        offsets = self._offsets[section]
+        used = int(offsets[self._count])
+        added = len(new["embeddings"])
+        emb = self._entries.get(section)
+        if emb is None or emb.shape[1] != self._dim:
+            emb = np.zeros((0, self._dim), dtype=np.float32)
+        emb = _grow(emb, used + added, minimum=4096)
+        if added:
+            emb[used:used + added] = new["embeddings"]
+        self._entries[section] = emb
+        offsets = _grow(offsets, self._count + len(new["offsets"]))
+        offsets[self._count + 1:self._count + len(new["offsets"])] = new["offsets"][1:] + used
+        self._offsets[section] = offsets
+
+    def add_many(self, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """(aday kimliği, yapılandırılmış veri) çiftlerini indekse ekler."""
+        if not items:
+            return
+        features = build_features([data for _, data in items])
+        if not self._dim:
+            # Henüz hiç girdi yoksa genişlik ilk kodlanan girdilerden alınır
+            self._dim = max((e["embeddings"].shape[1] for e in features["entries"].values()), default=0)
+
+        start = self._count
+        for section in SEMANTIC_SECTIONS:
+            self._append_entries(section, features["entries"][section])
+
+        for section in SET_SECTIONS:
+            postings = self._postings[section]
+            for offset, tokens in enumerate(features["sets"][section]):
+                # Bozuk dil verisi (küme kurulamadı) boş küme sayılır
+                tokens = sorted(tokens) if tokens is not None else []
+                self._sets[section].append(tokens)
+                self._set_sizes[section].append(len(tokens))
+                for token in tokens:
+                    postings.setdefault(token, []).append(start + offset)
+
+        self.ids.extend(cv_id for cv_id, _ in items)
+        self._count += len(items)
+        self._assign = _grow(self._assign, self._count)
+        self._assign[start:self._count] = -1
+        if self._centroids is not None:
+            new_rows = np.arange(start, self._count)
+            self._assign[new_rows] = np.argmax(self._ivf_vectors(new_rows) @ self._centroids.T, axis=1)
+
+    def add(self, cv_id: str, data: Dict[str, Any]) -> None:
+        self.add_many([(cv_id, data)])
+
+    # ------------------------------------------------------------------ IVF
+
+    def _ivf_vectors(self, rows: np.ndarray) -> np.ndarray:
+        """IVF için bölüm girdi ortalamalarının ağırlıklı, birleştirilmiş ve normalize vektörleri."""
+        parts = [_entry_means(self._section(s, rows), self._dim) * np.sqrt(WEIGHTS.get(s, 0.0)) for s in IVF_SECTIONS]
+        vectors = np.concatenate(parts, axis=1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def build_ivf(self, n_clusters: Optional[int] = None) -> None:
+        """Kaba arama için adayları kümeler (varsayılan küme sayısı ~ sqrt(N))."""
+        if self._count == 0:
+            return
+        n_clusters = min(self._count, n_clusters or max(1, int(np.sqrt(self._count))))
+        rows = np.arange(self._count)
+        self._centroids, assign = _kmeans(self._ivf_vectors(rows), n_clusters)
+        self._assign[:self._count] = assign
+
+    # ------------------------------------------------------------------ sorgu
+
+    def _set_scores(self, section: str, rows: np.ndarray, query: Dict[str, Any]) -> np.ndarray:
+        q_tokens = query["sets"][section][0] or set()
+        sizes = np.asarray(self._set_sizes[section], dtype=float)[rows]
+        inter = np.zeros(self._count)
+        for token in q_tokens:
+            hits = self._postings[section].get(token)
+            if hits:
+                inter[hits] += 1
+        inter = inter[rows]
+        union = len(q_tokens) + sizes - inter
+        return np.divide(inter, union, out=np.zeros(len(rows)), where=union > 0)
+
+    def _semantic_scores(self, section: str, rows: np.ndarray, query: Dict[str, Any]) -> np.ndarray:
+        q_entries = query["entries"][section]
+        if not len(q_entries["embeddings"]) or not len(rows):
+            return np.zeros(len(rows))
+        candidates = self._section(section, rows)
+        return align_entries(candidates["embeddings"], candidates["offsets"],
+                             q_entries["embeddings"], q_entries["offsets"])[:, 0]
+
+    def _score_rows(self, rows: np.ndarray, query: Dict[str, Any], threshold: Optional[float] = None,
+                    top_k: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Adayların sorguya toplam ve bölüm skorları. threshold ya da top_k verilirse budamalı puanlanır
+        (bkz. comparison_engine.score_block_pruned): çıtaya ulaşamayan adayların kalan semantik bölümleri
+        hizalanmaz ve toplamları NaN döner.
+        """
+        if threshold is None and top_k is None:
+            section_scores = {s: self._semantic_scores(s, rows, query) for s in SEMANTIC_SECTIONS}
+            section_scores.update({s: self._set_scores(s, rows, query) for s in SET_SECTIONS})
+        else:
+            alive = np.ones(len(rows), dtype=bool)
+            partial = np.zeros(len(rows))
+            remaining = sum(WEIGHTS[s] for s in PRUNE_ORDER)
+            section_scores = {}
+            evaluated = 0
+            for section in PRUNE_ORDER + [None]:
+                alive &= partial + remaining + PRUNE_EPSILON >= prune_bar(partial[alive], threshold, top_k)
+                if section is None:
+                    break
+                scores = np.full(len(rows), np.nan)
+                if section in SET_SECTIONS:
+                    scores = self._set_scores(section, rows, query)
+                else:
+                    scores[alive] = self._semantic_scores(section, rows[alive], query)
+                    evaluated += int(alive.sum())
+                section_scores[section] = scores
+                partial += np.where(alive, scores, 0.0) * WEIGHTS[section]
+                remaining -= WEIGHTS[section]
+            for section in SEMANTIC_SECTIONS:
+                if section not in section_scores:
+                    section_scores[section] = np.full(len(rows), np.nan)
+                    section_scores[section][alive] = self._semantic_scores(section, rows[alive], query)
+                    evaluated += int(alive.sum())
+            skipped = len(rows) * len(SEMANTIC_SECTIONS) - evaluated
+            PRUNE_STATS["pairs"] += len(rows)
+            PRUNE_STATS["pairs_pruned"] += len(rows) - int(alive.sum())
+            PRUNE_STATS["semantic_evaluated"] += evaluated
+            PRUNE_STATS["semantic_skipped"] += skipped
+            incr("semantic_evaluations_skipped", skipped)
+
+        total = np.zeros(len(rows))
+        for section, weight in WEIGHTS.items():
+            if section in section_scores:
+                total += np.nan_to_num(section_scores[section]) * weight
+        if threshold is not None or top_k is not None:
+            total[~alive] = np.nan
+        return total, section_scores
+
+    def query(self, data: Dict[str, Any], k: int = 50, approximate: bool = False, nprobe: int = 8,
+              min_score: Optional[float] = None, prune: bool = True) -> List[Dict[str, Any]]:
+        """
+        Verilen CV'ye / iş profiline en benzer k adayı (min_score verilirse yalnızca toplamı en az o kadar olanları)
+        döndürür.
+
+        approximate=True ise yalnızca sorguya en yakın nprobe kümedeki adaylar puanlanır (önce build_ivf).
+        prune=True ise bloklar budamalı puanlanır: çıta min_score ile o ana kadarki k'ıncı en iyi skorun
+        büyüğüdür; ilk k'ya giremeyecek adayların kalan semantik bölümleri hizalanmaz. Sonuç aynıdır.
+        """
+        if self._count == 0:
+            return []
+        query = build_features([data])
+
+        if approximate and self._centroids is not None:
+            q_vector = np.concatenate([_entry_means(query["entries"][s], self._dim)[0] * np.sqrt(WEIGHTS.get(s, 0.0))
+                                       for s in IVF_SECTIONS])
+            probes = np.argsort(-(self._centroids @ q_vector))[:nprobe]
+            candidates = np.flatnonzero(np.isin(self._assign[:self._count], probes))
+        else:
+            candidates = np.arange(self._count)
+
+        k = min(k, len(candidates))
+        if k == 0:
+            return []
+        totals = np.full(len(candidates), np.nan)
+        bar = min_score
+        for b in range(0, len(candidates), QUERY_BLOCK_SIZE):
+            block = candidates[b:b + QUERY_BLOCK_SIZE]
+            if not prune:
+                totals[b:b + len(block)] = self._score_rows(block, query)[0]
+                continue
+            totals[b:b + len(block)] = self._score_rows(block, query, threshold=bar, top_k=k)[0]
+            scored = totals[:b + len(block)]
+            scored = scored[~np.isnan(scored)]
+            if len(scored) >= k:
+                bar = max(-np.inf if bar is None else bar, float(np.partition(scored, len(scored) - k)[len(scored) - k]))
+
+        eligible = np.flatnonzero(~np.isnan(totals))
+        if min_score is not None:
+            eligible = eligible[np.round(totals[eligible], 3) >= min_score]
+        k = min(k, len(eligible))
+        if k == 0:
+            return []
+        totals = totals[eligible]
+        candidates = candidates[eligible]
+        top = np.argpartition(-totals, k - 1)[:k]
+        top = top[np.argsort(-totals[top])]
+        rows = candidates[top]
+        total, section_scores = self._score_rows(rows, query)
+        return [{"id": self.ids[r], "total": round(float(total[n]), 3),
+                 "sections": {s: float(v[n]) for s, v in section_scores.items()}}
+                for n, r in enumerate(rows)]
+
+    # ------------------------------------------------------------------ kalıcılık
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Yeni satırları yeni bir parçaya, üst verileri meta.json'a yazar. İndeks başka bir dizine kaydediliyorsa
+        önceki parçalar orada olmadığı için tüm satırlar tek bir parçaya yazılır.
+        """
+        path = path or self.path
+        if self.path is not None and os.path.realpath(path) != os.path.realpath(self.path):
+            self._shards = []
+            self._saved_count = 0
+        os.makedirs(path, exist_ok=True)
+        if self._count > self._saved_count:
+            shard = f"shard_{len(self._shards):05d}.npz"
+            arrays = {}
+            for n, section in enumerate(SEMANTIC_SECTIONS):
+                offsets = self._offsets[section][self._saved_count:self._count + 1]
+                arrays[f"emb_{n}"] = self._entries[section][offsets[0]:offsets[-1]]
+                arrays[f"counts_{n}"] = np.diff(offsets)
+            np.savez(os.path.join(path, shard), **arrays)
+            self._shards.append(shard)
+            self._saved_count = self._count
+        if self._centroids is not None:
+            np.save(os.path.join(path, "centroids.npy"), self._centroids)
+            np.save(os.path.join(path, "assign.npy"), self._assign[:self._count])
+        meta = {"format": INDEX_FORMAT, "model": self.model_name, "dim": self._dim, "ids": self.ids, "shards": self._shards,
+                "sets": self._sets, "ivf": self._centroids is not None}
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str) -> "CandidateIndex":
+        index = cls(path)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"İndeks eski bir biçimde ({meta.get('format', 1)}), lütfen yeniden kurun")
+        if meta["model"] != index.model_name:
+            raise ValueError(f"İndeks '{meta['model']}' modeliyle kurulmuş, şu anki model '{index.model_name}'")
+
+        shards = [np.load(os.path.join(path, shard)) for shard in meta["shards"]]
+        count = len(meta["ids"])
+        index._dim = meta["dim"]
+        for n, section in enumerate(SEMANTIC_SECTIONS):
+            embeddings = [s[f"emb_{n}"] for s in shards if len(s[f"emb_{n}"])]
+            index._entries[section] = np.concatenate(embeddings) if embeddings else np.zeros((0, index._dim), dtype=np.float32)
+            counts = np.concatenate([s[f"counts_{n}"] for s in shards]) if shards else np.zeros(0, dtype=np.int64)
+            index._offsets[section] = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        index.ids = meta["ids"]
+        index._count = index._saved_count = count
+        index._shards = meta["shards"]
+        for section in SET_SECTIONS:
+            index._sets[section] = meta["sets"][section]
+            for row, tokens in enumerate(index._sets[section]):
+                index._set_sizes[section].append(len(tokens))
+                for token in tokens:
+                    index._postings[section].setdefault(token, []).append(row)
+        index._assign = np.full(count, -1, dtype=np.int32)
+        if meta.get("ivf"):
+            index._centroids = np.load(os.path.join(path, "centroids.npy"))
+            index._assign[:] = np.load(os.path.join(path, "assign.npy"))
+        return index
+
+
+def main(argv: List[str] = None) -> int:
+    from instrumentation import configure_logging
+    from ingestion import ingest_files
+    from parse_cache import analyze_pdf
+
+    parser = argparse.ArgumentParser(description="Aday CV indeksi kurar ve sorgular.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Klasördeki PDF'leri indekse ekler")
+    build.add_argument("input_dir")
+    build.add_argument("--index", required=True)
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--ivf", action="store_true", help="Kaba arama için kümeleri (yeniden) kur")
+    query = sub.add_parser("query", help="Bir referans CV'ye en benzer adayları listeler")
+    query.add_argument("reference_pdf")
+    query.add_argument("--index", required=True)
+    query.add_argument("-k", type=int, default=50)
+    query.add_argument("--approximate", action="store_true")
+    query.add_argument("--nprobe", type=int, default=8)
+    query.add_argument("--min-score", type=float, default=None, help="Yalnızca toplam skoru en az bu kadar olan adaylar")
+    query.add_argument("--no-prune", action="store_true", help="Tüm adayların tüm bölümlerini puanla (budamasız)")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    if args.command == "build":
+        index = CandidateIndex.load(args.index) if os.path.exists(os.path.join(args.index, "meta.json")) else CandidateIndex(args.index)
+        known = set(index.ids)
+        paths = [p for p in sorted(glob.glob(os.path.join(args.input_dir, "*.pdf")))
+                 if os.path.relpath(p, args.input_dir) not in known]
+        results = ingest_files(paths, workers=args.workers)
+        index.add_many([(os.path.relpath(r["path"], args.input_dir), r["record"]["structured"]) for r in results if r["record"]])
+        if args.ivf:
+            index.build_ivf()
+        index.save()
+        print(f"İndekste {len(index)} aday var ({len(paths)} yeni dosya işlendi).", file=sys.stderr)
+        return 0
+
+    index = CandidateIndex.load(args.index)
+    record = analyze_pdf(args.reference_pdf)
+    if not record:
+        print("Referans CV okunamadı.", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    hits = index.query(record["structured"], k=args.k, approximate=args.approximate, nprobe=args.nprobe,
+                       min_score=args.min_score, prune=not args.no_prune)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for rank, hit in enumerate(hits, 1):
+        print(f"{rank:3d}. {hit['total'] * 100:5.1f}%  {hit['id']}")
+    print(f"Sorgu süresi: {elapsed_ms:.1f} ms", file=sys.stderr)
+    if not args.no_prune:
+        print(f"Budama: {PRUNE_STATS['pairs_pruned']}/{PRUNE_STATS['pairs']} aday elendi, "
+              f"{PRUNE_STATS['semantic_skipped']} semantik bölüm değerlendirmesi atlandı", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,98 +1,196 @@
 """CV karşılaştırma ve semantik benzerlik hesaplama modülü."""
 
-from typing import Dict, Any, Tuple, List
+from typing import Callable, Dict, Any, Tuple, List, Optional
 import json
+import logging
+import os
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from embedding_backend import EMBEDDING_BACKEND, backend_model_name, load_embedder
+from embedding_cache import EmbeddingCache
+from instrumentation import incr, observe, span
+from model_loader import LazyModel
+from model_server import remote_model
+from set_similarity import jaccard_matrix, similar_pairs
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Gömme önbelleği ve aday indeksi bu anahtarla tutulur (altyapıya göre gömmeler farklıdır)
+EMBEDDING_MODEL_KEY = backend_model_name(SEMANTIC_MODEL_NAME, EMBEDDING_BACKEND)
+
+
+def _load_semantic_model():
+    remote = remote_model("encode")
+    if remote is not None:
+        if remote.info.get("embedding_model_key") == EMBEDDING_MODEL_KEY:
+            return remote
+        # Farklı model/altyapı gömmeleri önbelleği ve aday indeksini bozar
+        logger.warning("⚠️ Model sunucusunun gömme modeli farklı (%s), SBERT yerel yükleniyor",
+                       remote.info.get("embedding_model_key"))
+    try:
+        model = load_embedder(SEMANTIC_MODEL_NAME, EMBEDDING_BACKEND)
+        logger.info("SBERT modeli başarıyla yüklendi (%s).", EMBEDDING_BACKEND)
+        return model
+    except Exception as e:
+        logger.error("HATA: Sentence Transformer yuklenemedi. Lutfen 'pip install sentence-transformers' komutunu calistirin. Hata: %s", e)
+        return None
+
+
+SEMANTIC_MODEL = LazyModel("SBERT", _load_semantic_model)
+
+
+def get_semantic_model():
+    """Paylaşılan SBERT modelini döndürür (ilk çağrıda yüklenir)."""
+    return SEMANTIC_MODEL.get()
+
+# Kalıcı gömme önbelleği; CV_EMBEDDING_CACHE=0 ile kapatılabilir
+EMBEDDING_CACHE = EmbeddingCache(EMBEDDING_MODEL_KEY) if os.environ.get("CV_EMBEDDING_CACHE", "1") != "0" else None
+
+# Modelin kaç kez çağrıldığı ve kaç metin kodladığı (önbellek etkinliğini doğrulamak için)
+ENCODE_STATS = {"model_calls": 0, "texts_encoded": 0}
+
+ENCODE_BATCH_SIZE = 64
+
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """
+    Metinleri normalize edilmiş gömmelere dönüştürür.
+
+    Önce önbelleğe bakılır; yalnızca bulunamayan benzersiz metinler tek bir toplu çağrıyla modele gönderilir.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    found = EMBEDDING_CACHE.get_many(texts) if EMBEDDING_CACHE is not None else {}
+    missing = [t for t in dict.fromkeys(texts) if t not in found]
+    incr("encode_texts_requested", len(texts))
+    incr("encode_cache_hits", len(found))
+    if missing:
+        observe("encode_batch_size", len(missing))
+        with span("encode", texts=len(missing)):
+            embeddings = get_semantic_model().encode(missing, batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True, convert_to_numpy=True)
+        ENCODE_STATS["model_calls"] += 1
+        ENCODE_STATS["texts_encoded"] += len(missing)
+        computed = {text: np.asarray(vector, dtype=np.float32) for text, vector in zip(missing, embeddings)}
+        if EMBEDDING_CACHE is not None:
+            EMBEDDING_CACHE.put_many(computed)
+        found.update(computed)
+
+    return np.stack([found[t] for t in texts])
+
+
+def embedding_cache_stats() -> Dict[str, int]:
+    """Gömme önbelleği isabet/ıska sayaçlarını ve model çağrı sayılarını döndürür."""
+    stats = dict(ENCODE_STATS)
+    if EMBEDDING_CACHE is not None:
+        stats.update(EMBEDDING_CACHE.stats())
+    return stats
 
-try:
-    SEMANTIC_MODEL = SentenceTransformer('all-MiniLM-L6-v2')
-    print("SBERT modeli başarıyla yüklendi.")
-except Exception as e:
-    print(f"HATA: Sentence Transformer yuklenemedi. Lutfen 'pip install sentence-transformers' komutunu calistirin. Hata: {e}")
-    SEMANTIC_MODEL = None
 
 def calculate_semantic_similarity(text1: str, text2: str) -> float:
     """İki metin arasındaki semantik benzerliği hesaplar."""
-    if SEMANTIC_MODEL is None or not text1 or not text2:
+    if not text1 or not text2 or get_semantic_model() is None:
         return 0.0
     
-    embeddings = SEMANTIC_MODEL.encode([text1, text2])
-    score_matrix = cosine_similarity([embeddings[0]], [embeddings[1]])
-    score = score_matrix[0][0]
+    embeddings = encode_texts([text1, text2])
+    score = float(np.dot(embeddings[0], embeddings[1]))
     return float(max(0.0, score))
 
-def compare_cv_data(data_a: Dict[str, Any], data_b: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
-    """İki CV'yi karşılaştırır ve benzerlik skorları üretir."""
-    WEIGHTS = {
-        "DENEYİM": 0.35,
-        "YETENEKLER": 0.25,
-        "TEKNİK_BECERİLER": 0.15,
-        "EĞİTİM": 0.10,
-        "ÖZET": 0.05,
-        "YABANCI_DİL": 0.03,
-        "KURSLAR": 0.03,
-        "SERTİFİKALAR": 0.02,
-        "KİŞİSEL_BECERİLER": 0.01,
-        "REFERANSLAR": 0.01
-    }
-    
-    section_scores = {}
-    total_score = 0.0
+WEIGHTS = {
+    "DENEYİM": 0.35,
+    "YETENEKLER": 0.25,
+    "TEKNİK_BECERİLER": 0.15,
+    "EĞİTİM": 0.10,
+    "ÖZET": 0.05,
+    "YABANCI_DİL": 0.03,
+    "KURSLAR": 0.03,
+    "SERTİFİKALAR": 0.02,
+    "KİŞİSEL_BECERİLER": 0.01,
+    "REFERANSLAR": 0.01
+}
+
+# Küme (Jaccard) ile puanlanan bölümler
+SET_SECTIONS = ["YETENEKLER", "TEKNİK_BECERİLER", "YABANCI_DİL"]
+
+# SBERT ile puanlanan bölümler (compare_cv_data ile aynı sırada)
+SEMANTIC_SECTIONS = ["DENEYİM", "EĞİTİM", "ÖZET", "SERTİFİKALAR", "KURSLAR", "KİŞİSEL_BECERİLER", "PROJELER", "REFERANSLAR"]
+
+# Bölüm benzerliği girdi hizalamasıyla hesaplanır: "mean" her girdinin karşı CV'deki en iyi eşleşmesinin
+# iki yönlü ortalaması, "max" iki CV arasındaki en iyi tek girdi eşleşmesidir
+ENTRY_ALIGNMENT = os.environ.get("CV_ENTRY_ALIGNMENT", "mean")
+
+# Girdi × girdi benzerlik matrisinin bir seferde hesaplanan en fazla eleman sayısı (bellek sınırı)
+ENTRY_BLOCK_ELEMENTS = 1 << 24
+
+# Budamalı puanlamada bölüm sırası: ucuz küme bölümleri önce, ardından semantik bölümler ağırlıklarına göre
+# azalan sırada (her semantik bölümün maliyeti benzer: bir hizalama). Ağırlığı 0 olan bölümler toplamı
+# etkilemez; yalnızca budanmayan çiftler için en sonda hesaplanır.
+PRUNE_ORDER = SET_SECTIONS + sorted((s for s in SEMANTIC_SECTIONS if WEIGHTS.get(s, 0.0) > 0),
+                                    key=lambda s: -WEIGHTS[s])
+# Toplam skor 3 basamağa yuvarlandığı için üst sınıra eklenen pay (sınırdaki çiftler budanmaz)
+PRUNE_EPSILON = 5e-4
+
+# Budamalı puanlamada değerlendirilen ve atlanan (çift × semantik bölüm) sayıları
+PRUNE_STATS = {"pairs": 0, "pairs_pruned": 0, "semantic_evaluated": 0, "semantic_skipped": 0}
 
-    skills_a = set(data_a.get("YETENEKLER", []))
-    skills_b = set(data_b.get("YETENEKLER", []))
-    union_len = len(skills_a.union(skills_b))
-    skill_score = len(skills_a.intersection(skills_b)) / union_len if union_len > 0 else 0.0
-    section_scores["YETENEKLER"] = skill_score
-
-    tech_a = set(data_a.get("TEKNİK_BECERİLER", []))
-    tech_b = set(data_b.get("TEKNİK_BECERİLER", []))
-    tech_union = len(tech_a.union(tech_b))
-    tech_score = len(tech_a.intersection(tech_b)) / tech_union if tech_union > 0 else 0.0
-    section_scores["TEKNİK_BECERİLER"] = tech_score
-
-    exp_score = calculate_semantic_similarity(
-        json.dumps(data_a.get("DENEYİM", [])), 
-        json.dumps(data_b.get("DENEYİM", []))
-    )
-    section_scores["DENEYİM"] = exp_score
-    
-    edu_score = calculate_semantic_similarity(
-        json.dumps(data_a.get("EĞİTİM", [])),
-        json.dumps(data_b.get("EĞİTİM", []))
-    )
-    section_scores["EĞİTİM"] = edu_score
-
-    summary_score = calculate_semantic_similarity(data_a.get("ÖZET", ""), data_b.get("ÖZET", ""))
-    section_scores["ÖZET"] = summary_score
-    
-    langs_a = data_a.get("YABANCI_DİL", [])
-    langs_b = data_b.get("YABANCI_DİL", [])
-    try:
-        names_a = set([l.get("dil", l).lower() if isinstance(l, dict) else str(l).lower() for l in langs_a])
-        names_b = set([l.get("dil", l).lower() if isinstance(l, dict) else str(l).lower() for l in langs_b])
-        lang_union = len(names_a.union(names_b))
-        lang_score = len(names_a.intersection(names_b)) / lang_union if lang_union > 0 else 0.0
-    except Exception:
-        lang_score = calculate_semantic_similarity(json.dumps(langs_a), json.dumps(langs_b))
-    section_scores["YABANCI_DİL"] = lang_score
 
-    cert_score = calculate_semantic_similarity(json.dumps(data_a.get("SERTİFİKALAR", [])), json.dumps(data_b.get("SERTİFİKALAR", [])))
-    section_scores["SERTİFİKALAR"] = cert_score
+def _section_entries(data: Dict[str, Any], section: str) -> List[str]:
+    """Bir bölümün ayrı ayrı kodlanacak girdileri (Raw_Entry); ÖZET 0 ya da 1 girdidir."""
+    if section == "ÖZET":
+        text = data.get("ÖZET", "")
+        return [text] if text else []
+    entries = []
+    for item in data.get(section) or []:
+        if isinstance(item, dict):
+            text = item.get("Raw_Entry") or item.get("raw") or item.get("name") or ""
+        else:
+            text = str(item)
+        if text.strip():
+            entries.append(text.strip())
+    return list(dict.fromkeys(entries))
 
-    courses_score = calculate_semantic_similarity(json.dumps(data_a.get("KURSLAR", [])), json.dumps(data_b.get("KURSLAR", [])))
-    section_scores["KURSLAR"] = courses_score
 
-    personal_score = calculate_semantic_similarity(json.dumps(data_a.get("KİŞİSEL_BECERİLER", [])), json.dumps(data_b.get("KİŞİSEL_BECERİLER", [])))
-    section_scores["KİŞİSEL_BECERİLER"] = personal_score
+def _section_set(data: Dict[str, Any], section: str) -> set:
+    """Bir bölümün Jaccard için kullanılacak kümesini üretir."""
+    if section == "YABANCI_DİL":
+        return set([l.get("dil", l).lower() if isinstance(l, dict) else str(l).lower() for l in data.get(section, [])])
+    return set(data.get(section, []))
 
-    projects_score = calculate_semantic_similarity(json.dumps(data_a.get("PROJELER", [])), json.dumps(data_b.get("PROJELER", [])))
-    section_scores["PROJELER"] = projects_score
 
-    refs_score = calculate_semantic_similarity(json.dumps(data_a.get("REFERANSLAR", [])), json.dumps(data_b.get("REFERANSLAR", [])))
-    section_scores["REFERANSLAR"] = refs_score
+def _jaccard(set_a: set, set_b: set) -> float:
+    union_len = len(set_a.union(set_b))
+    return len(set_a.intersection(set_b)) / union_len if union_len > 0 else 0.0
+
+
+def _pair_section_score(data_a: Dict[str, Any], data_b: Dict[str, Any], section: str) -> float:
+    """İki CV'nin tek bir bölümdeki benzerliği (küme bölümlerinde Jaccard, diğerlerinde girdi hizalaması)."""
+    if section in SET_SECTIONS:
+        if section != "YABANCI_DİL":
+            return _jaccard(_section_set(data_a, section), _section_set(data_b, section))
+        try:
+            return _jaccard(_section_set(data_a, section), _section_set(data_b, section))
+        except Exception:
+            return calculate_semantic_similarity(json.dumps(data_a.get(section, [])), json.dumps(data_b.get(section, [])))
+
+    entries_a = _section_entries(data_a, section)
+    entries_b = _section_entries(data_b, section)
+    if not entries_a or not entries_b or get_semantic_model() is None:
+        return 0.0
+    embeddings = encode_texts(entries_a + entries_b)
+    split = len(entries_a)
+    return float(align_entries(embeddings[:split], np.array([0, split]),
+                               embeddings[split:], np.array([0, len(entries_b)]))[0, 0])
+
+
+def compare_cv_data(data_a: Dict[str, Any], data_b: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
+    """İki CV'yi karşılaştırır ve benzerlik skorları üretir."""
+    section_scores = {}
+    total_score = 0.0
+    incr("pairs_compared")
+
+    for section in SET_SECTIONS + SEMANTIC_SECTIONS:
+        section_scores[section] = _pair_section_score(data_a, data_b, section)
+
     # 3. Ağırlıklı Toplam Skoru Hesaplama
     for section, weight in WEIGHTS.items():
         if section in section_scores:
@@ -100,6 +198,331 @@ def compare_cv_data(data_a: Dict[str, Any], data_b: Dict[str, Any]) -> Tuple[flo
             
     return round(total_score, 3), section_scores
 
+
+def compare_cv_data_pruned(data_a: Dict[str, Any], data_b: Dict[str, Any],
+                           threshold: float) -> Optional[Tuple[float, Dict[str, float]]]:
+    """
+    compare_cv_data'nın budamalı sürümü: bölümler PRUNE_ORDER sırasıyla puanlanır; şimdiye kadarki toplam ile
+    kalan ağırlıkların toplamı (her bölüm en fazla 1) threshold'a ulaşamıyorsa kalan semantik bölümler
+    hesaplanmadan None döner. Eşiği geçebilen çiftin sonucu compare_cv_data ile aynıdır.
+    """
+    section_scores = {}
+    partial = 0.0
+    remaining = sum(WEIGHTS[s] for s in PRUNE_ORDER)
+    PRUNE_STATS["pairs"] += 1
+
+    def score(section: str) -> None:
+        section_scores[section] = _pair_section_score(data_a, data_b, section)
+        if section in SEMANTIC_SECTIONS:
+            PRUNE_STATS["semantic_evaluated"] += 1
+
+    def prune() -> None:
+        skipped = sum(1 for s in SEMANTIC_SECTIONS if s not in section_scores)
+        PRUNE_STATS["pairs_pruned"] += 1
+        PRUNE_STATS["semantic_skipped"] += skipped
+        incr("semantic_evaluations_skipped", skipped)
+
+    for section in PRUNE_ORDER + [None]:
+        if partial + remaining + PRUNE_EPSILON < threshold:
+            prune()
+            return None
+        if section is not None:
+            score(section)
+            partial += section_scores[section] * WEIGHTS[section]
+            remaining -= WEIGHTS[section]
+    for section in SEMANTIC_SECTIONS:
+        if section not in section_scores:
+            score(section)
+    total_score = sum(section_scores[s] * w for s, w in WEIGHTS.items() if s in section_scores)
+    return round(total_score, 3), {s: section_scores[s] for s in SET_SECTIONS + SEMANTIC_SECTIONS}
+
+
+# Yaklaşık küme modu (MinHash/LSH): 64 bant × 2 satır; Jaccard ~0.1 üzerindeki çiftler büyük olasılıkla aday olur
+APPROX_SET_NUM_PERM = 128
+APPROX_SET_BANDS = 64
+
+
+def _approximate_set_neighbors(sets: List[Optional[set]]) -> List[Dict[int, float]]:
+    """LSH aday çiftlerinin kesin Jaccard skorları, CV başına komşu -> skor sözlüğü olarak."""
+    neighbors: List[Dict[int, float]] = [{} for _ in sets]
+    for (i, j), score in similar_pairs(sets, threshold=0.0, num_perm=APPROX_SET_NUM_PERM,
+                                       bands=APPROX_SET_BANDS).items():
+        neighbors[i][j] = neighbors[j][i] = score
+    return neighbors
+
+
+def build_features(data_list: List[Dict[str, Any]],
+                   encoder: Optional[Callable[[List[str]], np.ndarray]] = None,
+                   approximate_sets: bool = False) -> Dict[str, Any]:
+    """
+    CV listesinin karşılaştırma için gereken özelliklerini bir kez hazırlar.
+
+    Küme bölümleri için Jaccard kümeleri çıkarılır. Semantik bölümlerde her girdi (Raw_Entry) bir kez kodlanır;
+    bölüm başına tüm CV'lerin girdi gömmeleri tek matriste, CV'nin satır aralığı offsets[i]:offsets[i + 1]
+    olarak tutulur. Tüm girdiler tek bir toplu encode çağrısıyla kodlanır; score_block puanlarken model
+    çağrılmaz. encoder verilirse encode_texts yerine o kullanılır (ör. altyapıları karşılaştırırken).
+
+    approximate_sets=True ise küme bölümleri tüm çiftler yerine yalnızca MinHash/LSH aday çiftleri için
+    (kesin) puanlanır; aday olmayan çiftler (çoğunlukla Jaccard < ~0.1) 0 alır. Çok büyük havuzlar içindir.
+    """
+    sets = {}
+    for section in SET_SECTIONS:
+        section_sets = []
+        for data in data_list:
+            try:
+                section_sets.append(_section_set(data, section))
+            except Exception:
+                section_sets.append(None)
+        sets[section] = section_sets
+
+    section_entries = {section: [_section_entries(data, section) for data in data_list] for section in SEMANTIC_SECTIONS}
+    unique_texts = sorted(set(t for per_cv in section_entries.values() for cv_entries in per_cv for t in cv_entries))
+    if unique_texts and (encoder is not None or get_semantic_model() is not None):
+        unique_embeddings = (encoder or encode_texts)(unique_texts)
+        row_of = {text: k for k, text in enumerate(unique_texts)}
+    else:
+        unique_embeddings = None
+        row_of = {}
+
+    entries = {}
+    for section in SEMANTIC_SECTIONS:
+        per_cv = [[t for t in cv_entries if t in row_of] for cv_entries in section_entries[section]]
+        offsets = np.zeros(len(data_list) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(cv_entries) for cv_entries in per_cv])
+        if offsets[-1]:
+            embeddings = unique_embeddings[[row_of[t] for cv_entries in per_cv for t in cv_entries]].astype(np.float32)
+        else:
+            embeddings = np.zeros((0, 0), dtype=np.float32)
+        entries[section] = {"embeddings": embeddings, "offsets": offsets}
+
+    features = {"data": data_list, "sets": sets, "entries": entries}
+    if approximate_sets:
+        with span("lsh_sets", cvs=len(data_list)):
+            features["set_neighbors"] = {section: _approximate_set_neighbors(sets[section]) for section in SET_SECTIONS}
+    return features
+
+
+def take_entries(section_entries: Dict[str, np.ndarray], indices) -> Dict[str, np.ndarray]:
+    """Verilen CV sıralarının girdilerini (sırasıyla) yeni bir gömme matrisi ve offsets olarak döndürür."""
+    indices = np.asarray(indices, dtype=np.int64)
+    offsets = section_entries["offsets"]
+    counts = offsets[indices + 1] - offsets[indices]
+    new_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_offsets[1:])
+    rows = np.repeat(offsets[indices] - new_offsets[:-1], counts) + np.arange(new_offsets[-1])
+    return {"embeddings": section_entries["embeddings"][rows], "offsets": new_offsets}
+
+
+def concat_entries(first: Dict[str, np.ndarray], second: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """İki girdi kümesini art arda ekler; girdisi hiç olmayan (0 genişlikli) taraf genişletilir."""
+    a, b = first["embeddings"], second["embeddings"]
+    width = max(a.shape[1], b.shape[1])
+    if a.shape[1] < width:
+        a = np.zeros((a.shape[0], width), dtype=np.float32)
+    if b.shape[1] < width:
+        b = np.zeros((b.shape[0], width), dtype=np.float32)
+    offsets = np.concatenate([first["offsets"], second["offsets"][1:] + first["offsets"][-1]])
+    return {"embeddings": np.concatenate([a, b]), "offsets": offsets}
+
+
+def align_entries(emb_a: np.ndarray, offsets_a: np.ndarray, emb_b: np.ndarray, offsets_b: np.ndarray,
+                  alignment: str = None) -> np.ndarray:
+    """
+    İki CV grubunun girdi gömmelerinden (len(offsets_a)-1)×(len(offsets_b)-1) bölüm benzerliği üretir.
+
+    Girdi × girdi kosinüs matrisi bellek sınırına göre sütun CV grupları halinde hesaplanır; CV başına en iyi
+    eşleşmeler ve ortalamaları segment indirgemeleriyle (reduceat) alınır. Girdisi olmayan CV 0 alır.
+    """
+    alignment = alignment or ENTRY_ALIGNMENT
+    offsets_a = np.asarray(offsets_a) - offsets_a[0]
+    offsets_b = np.asarray(offsets_b) - offsets_b[0]
+    counts_a, counts_b = np.diff(offsets_a), np.diff(offsets_b)
+    result = np.zeros((len(counts_a), len(counts_b)))
+    rows, cols = np.flatnonzero(counts_a), np.flatnonzero(counts_b)
+    if not len(rows) or not len(cols):
+        return result
+
+    starts_a = offsets_a[rows]
+    # Sütun CV'leri, benzerlik bloğu ENTRY_BLOCK_ELEMENTS'i aşmayacak gruplara bölünür
+    per_group = max(1, ENTRY_BLOCK_ELEMENTS // max(1, len(emb_a)))
+    group_start = 0
+    while group_start < len(cols):
+        group_end = group_start + 1
+        while group_end < len(cols) and offsets_b[cols[group_end] + 1] - offsets_b[cols[group_start]] <= per_group:
+            group_end += 1
+        group = cols[group_start:group_end]
+        first, last = offsets_b[group[0]], offsets_b[group[-1] + 1]
+        starts_b = offsets_b[group] - first
+        sims = np.clip(emb_a @ emb_b[first:last].T, 0.0, None)
+        if alignment == "max":
+            block = np.maximum.reduceat(np.maximum.reduceat(sims, starts_a, axis=0), starts_b, axis=1)
+        else:
+            best_in_b = np.maximum.reduceat(sims, starts_b, axis=1)
+            best_in_a = np.maximum.reduceat(sims, starts_a, axis=0)
+            a_to_b = np.add.reduceat(best_in_b, starts_a, axis=0) / counts_a[rows][:, None]
+            b_to_a = np.add.reduceat(best_in_a, starts_b, axis=1) / counts_b[group][None, :]
+            block = (a_to_b + b_to_a) / 2
+        result[np.ix_(rows, group)] = block
+        group_start = group_end
+    return result
+
+
+def _set_block(features: Dict[str, Any], section: str, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Küme bölümünün rows × cols Jaccard matrisi (seyrek ikili matris çarpımıyla ya da LSH komşularından)."""
+    data_list = features["data"]
+    sets = features["sets"][section]
+    if "set_neighbors" in features:
+        neighbors = features["set_neighbors"][section]
+        col_of = {j: b for b, j in enumerate(cols)}
+        matrix = np.zeros((len(rows), len(cols)))
+        for a, i in enumerate(rows):
+            if i in col_of and sets[i]:
+                matrix[a, col_of[i]] = 1.0
+            for j, score in neighbors[i].items():
+                if j in col_of:
+                    matrix[a, col_of[j]] = score
+    else:
+        matrix = jaccard_matrix([sets[i] for i in rows], [sets[j] for j in cols])
+    # Küme kurulamayan (bozuk) veride compare_cv_data gibi semantik benzerliğe dön
+    bad_rows = {a for a, i in enumerate(rows) if sets[i] is None}
+    bad_cols = {b for b, j in enumerate(cols) if sets[j] is None}
+    if bad_rows or bad_cols:
+        for a, i in enumerate(rows):
+            for b, j in enumerate(cols):
+                if a in bad_rows or b in bad_cols:
+                    matrix[a, b] = calculate_semantic_similarity(json.dumps(data_list[i].get(section, [])), json.dumps(data_list[j].get(section, [])))
+    return matrix
+
+
+def score_block(features: Dict[str, Any], rows: List[int], cols: List[int]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    build_features çıktısından rows × cols bloğunun skorlarını hesaplar.
+
+    Dönen değer (len(rows)×len(cols) toplam skor matrisi, bölüm adı -> benzerlik matrisi) çiftidir.
+    """
+    rows = np.asarray(rows, dtype=int)
+    cols = np.asarray(cols, dtype=int)
+    section_matrices = {}
+
+    incr("pairs_scored", len(rows) * len(cols))
+    with span("score_block", rows=len(rows), cols=len(cols)):
+        # 1. Küme tabanlı bölümler: seyrek ikili matris çarpımıyla Jaccard
+        for section in SET_SECTIONS:
+            section_matrices[section] = _set_block(features, section, rows, cols)
+
+        # 2. Semantik bölümler: önceden kodlanmış girdilerin hizalanması (model çağrılmaz)
+        for section in SEMANTIC_SECTIONS:
+            row_entries = take_entries(features["entries"][section], rows)
+            col_entries = take_entries(features["entries"][section], cols)
+            section_matrices[section] = align_entries(row_entries["embeddings"], row_entries["offsets"],
+                                                      col_entries["embeddings"], col_entries["offsets"])
+
+    total = np.zeros((len(rows), len(cols)), dtype=float)
+    for section, weight in WEIGHTS.items():
+        if section in section_matrices:
+            total += section_matrices[section] * weight
+
+    return np.round(total, 3), section_matrices
+
+
+def prune_bar(lower: np.ndarray, threshold: Optional[float] = None, top_k: Optional[int] = None) -> float:
+    """
+    Bir çiftin sonuca girmek için ulaşması gereken en düşük toplam skor: threshold ile, top_k verilirse
+    alt sınırlar (lower) arasındaki k'ıncı en büyük değerin büyüğü.
+    """
+    bar = -np.inf if threshold is None else threshold
+    if top_k and len(lower) >= top_k:
+        bar = max(bar, float(np.partition(lower, len(lower) - top_k)[len(lower) - top_k]))
+    return bar
+
+
+def _align_where(section_entries: Dict[str, np.ndarray], rows: np.ndarray, cols: np.ndarray,
+                 alive: np.ndarray) -> np.ndarray:
+    """Yalnızca alive hücreleri için bölüm hizalaması; diğer hücreler NaN kalır."""
+    matrix = np.full(alive.shape, np.nan)
+    if alive.mean() > 0.5:
+        # Çiftlerin çoğu hâlâ adaysa bloğun tamamını tek seferde hizalamak daha ucuzdur
+        r, c = take_entries(section_entries, rows), take_entries(section_entries, cols)
+        full = align_entries(r["embeddings"], r["offsets"], c["embeddings"], c["offsets"])
+        matrix[alive] = full[alive]
+        return matrix
+    for a in np.flatnonzero(alive.any(axis=1)):
+        live = np.flatnonzero(alive[a])
+        r, c = take_entries(section_entries, rows[[a]]), take_entries(section_entries, cols[live])
+        matrix[a, live] = align_entries(r["embeddings"], r["offsets"], c["embeddings"], c["offsets"])[0]
+    return matrix
+
+
+def score_block_pruned(features: Dict[str, Any], rows: List[int], cols: List[int], threshold: Optional[float] = None,
+                       top_k: Optional[int] = None, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    score_block'un budamalı sürümü: yalnızca toplam skoru threshold'a ulaşabilen (top_k verilirse bloktaki en
+    iyi k çifte girebilecek) çiftler tam puanlanır.
+
+    Küme bölümleri tüm blok için hesaplanır; semantik bölümler PRUNE_ORDER sırasıyla ve her adımda yalnızca
+    hâlâ aday olan çiftler için hizalanır. Bir çiftin üst sınırı şimdiye kadarki skoru ile kalan ağırlıkların
+    toplamıdır; çıtanın altında kalan çift elenir. mask verilirse yalnızca True hücreler puanlanır.
+    Dönen matrislerde elenen ya da maskelenen hücreler NaN'dır; kalan hücreler score_block ile aynıdır.
+    """
+    rows = np.asarray(rows, dtype=int)
+    cols = np.asarray(cols, dtype=int)
+    alive = np.ones((len(rows), len(cols)), dtype=bool) if mask is None else np.array(mask, dtype=bool)
+    considered = int(alive.sum())
+    partial = np.zeros(alive.shape)
+    remaining = sum(WEIGHTS[s] for s in PRUNE_ORDER)
+    section_matrices = {}
+    evaluated = 0
+
+    incr("pairs_scored", considered)
+    with span("score_block_pruned", rows=len(rows), cols=len(cols)):
+        for section in PRUNE_ORDER + [None]:
+            bar = prune_bar(partial[alive], threshold, top_k)
+            alive &= partial + remaining + PRUNE_EPSILON >= bar
+            if section is None:
+                break
+            if section in SET_SECTIONS:
+                matrix = _set_block(features, section, rows, cols)
+            else:
+                matrix = _align_where(features["entries"][section], rows, cols, alive)
+                evaluated += int(alive.sum())
+            section_matrices[section] = matrix
+            partial += np.where(alive, matrix, 0.0) * WEIGHTS[section]
+            remaining -= WEIGHTS[section]
+
+        for section in SEMANTIC_SECTIONS:
+            if section not in section_matrices:
+                section_matrices[section] = _align_where(features["entries"][section], rows, cols, alive)
+                evaluated += int(alive.sum())
+
+    total = np.zeros(alive.shape)
+    for section, weight in WEIGHTS.items():
+        if section in section_matrices:
+            total += np.nan_to_num(section_matrices[section]) * weight
+    total = np.where(alive, np.round(total, 3), np.nan)
+    for section in section_matrices:
+        section_matrices[section] = np.where(alive, section_matrices[section], np.nan)
+
+    skipped = considered * len(SEMANTIC_SECTIONS) - evaluated
+    PRUNE_STATS["pairs"] += considered
+    PRUNE_STATS["pairs_pruned"] += considered - int(alive.sum())
+    PRUNE_STATS["semantic_evaluated"] += evaluated
+    PRUNE_STATS["semantic_skipped"] += skipped
+    incr("semantic_evaluations_skipped", skipped)
+    return total, section_matrices
+
+
+def compare_many(data_list: List[Dict[str, Any]]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Birden fazla CV'yi tek seferde karşılaştırır.
+
+    Her CV'nin her bölüm girdisi tek bir toplu encode çağrısıyla bir kez kodlanır; bölüm benzerlikleri
+    girdi gömmelerinin toplu hizalanmasından gelir. Dönen değer (N×N toplam skor matrisi,
+    bölüm adı -> N×N benzerlik matrisi) çiftidir; [i, j] hücresi compare_cv_data(data_list[i], data_list[j])
+    ile aynı skoru verir.
+    """
+    indices = list(range(len(data_list)))
+    return score_block(build_features(data_list), indices, indices)
+
 # -------------------------- RAPORLAMA --------------------------
 
 def generate_report(data_a: Dict[str, Any], data_b: Dict[str, Any], total_score: float, section_scores: Dict[str, float]) -> List[str]:
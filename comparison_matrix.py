@@ -0,0 +1,140 @@
+"""CV eklenip çıkarıldıkça artımlı güncellenen ikili karşılaştırma matrisi."""
+
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from comparison_engine import SET_SECTIONS, SEMANTIC_SECTIONS, build_features, concat_entries, score_block, take_entries
+
+SECTION_NAMES = SET_SECTIONS + SEMANTIC_SECTIONS
+
+
+class IncrementalComparison:
+    """
+    Dosya özeti (SHA-256) anahtarlı CV kümesinin skor matrisini tutar.
+
+    Yeni CV eklenince yalnızca onun satırı/sütunu puanlanır, çıkarılınca satırı/sütunu silinir. Bölüm
+    ortalamaları ve genel ortalama, tüm çiftler üzerinden tutulan toplamlardan O(bölüm) sürede okunur.
+    """
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.features: Optional[Dict[str, Any]] = None
+        self.total = np.zeros((0, 0), dtype=np.float32)
+        self.sections = {section: np.zeros((0, 0), dtype=np.float32) for section in SECTION_NAMES}
+        self._total_sum = 0.0
+        self._section_sums = {section: 0.0 for section in SECTION_NAMES}
+        self.pairs_computed = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def data(self, key: str) -> Dict[str, Any]:
+        return self.features["data"][self._index[key]]
+
+    @property
+    def pair_count(self) -> int:
+        n = len(self.keys)
+        return n * (n - 1) // 2
+
+    def add_many(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """(anahtar, yapılandırılmış veri) çiftlerini ekler; yalnızca yeni satırlar puanlanır."""
+        seen = set(self._index)
+        new_items = []
+        for key, data in items:
+            if key not in seen:
+                seen.add(key)
+                new_items.append((key, data))
+        if not new_items:
+            return []
+
+        old_n = len(self.keys)
+        new_features = build_features([data for _, data in new_items])
+        if self.features is None:
+            self.features = new_features
+        else:
+            self.features = {
+                "data": self.features["data"] + new_features["data"],
+                "sets": {s: self.features["sets"][s] + new_features["sets"][s] for s in SET_SECTIONS},
+                "entries": {s: concat_entries(self.features["entries"][s], new_features["entries"][s])
+                            for s in SEMANTIC_SECTIONS},
+            }
+        for key, _ in new_items:
+            self._index[key] = len(self.keys)
+            self.keys.append(key)
+
+        n = len(self.keys)
+        new_rows = list(range(old_n, n))
+        block_total, block_sections = score_block(self.features, new_rows, list(range(n)))
+        self.pairs_computed += len(new_rows) * old_n + len(new_rows) * (len(new_rows) - 1) // 2
+
+        # Yeni çiftler: yeni × eski ve yeni × yeni (üst üçgen)
+        new_pairs = np.ones((len(new_rows), n), dtype=bool)
+        new_pairs[:, old_n:] = np.triu(np.ones((len(new_rows), len(new_rows)), dtype=bool), k=1)
+
+        self.total = self._grow(self.total, block_total, old_n)
+        self._total_sum += float(block_total[new_pairs].sum())
+        for section in SECTION_NAMES:
+            self.sections[section] = self._grow(self.sections[section], block_sections[section], old_n)
+            self._section_sums[section] += float(block_sections[section][new_pairs].sum())
+        return [key for key, _ in new_items]
+
+    @staticmethod
+    def _grow(matrix: np.ndarray, block: np.ndarray, old_n: int) -> np.ndarray:
+        """old_n×old_n matrisi, yeni satırları (block) ve simetrik sütunlarıyla genişletir (float32)."""
+        n = block.shape[1]
+        grown = np.zeros((n, n), dtype=np.float32)
+        grown[:old_n, :old_n] = matrix
+        grown[old_n:, :] = block
+        grown[:, old_n:] = block.T
+        return grown
+
+    def remove(self, key: str) -> bool:
+        """CV'yi ve ona ait satır/sütunu siler."""
+        idx = self._index.get(key)
+        if idx is None:
+            return False
+        others = np.arange(len(self.keys)) != idx
+        self._total_sum -= float(self.total[idx, others].sum())
+        for section in SECTION_NAMES:
+            self._section_sums[section] -= float(self.sections[section][idx, others].sum())
+            self.sections[section] = self.sections[section][others][:, others]
+        self.total = self.total[others][:, others]
+
+        self.features = {
+            "data": [d for k, d in enumerate(self.features["data"]) if k != idx],
+            "sets": {s: [v for k, v in enumerate(self.features["sets"][s]) if k != idx] for s in SET_SECTIONS},
+            "entries": {s: take_entries(self.features["entries"][s], np.flatnonzero(others)) for s in SEMANTIC_SECTIONS},
+        }
+        self.keys.pop(idx)
+        self._index = {k: i for i, k in enumerate(self.keys)}
+        if not self.keys:
+            self.__init__()
+        return True
+
+    def sync(self, items: List[Tuple[str, Dict[str, Any]]]) -> Tuple[List[str], List[str]]:
+        """Kümeyi verilen CV listesine eşitler; (eklenen, çıkarılan) anahtarları döndürür."""
+        wanted = {key for key, _ in items}
+        removed = [key for key in list(self.keys) if key not in wanted]
+        for key in removed:
+            self.remove(key)
+        added = self.add_many(items)
+        return added, removed
+
+    def score(self, key_a: str, key_b: str) -> Tuple[float, Dict[str, float]]:
+        """compare_cv_data ile aynı biçimde (toplam skor, bölüm skorları) döndürür."""
+        i, j = self._index[key_a], self._index[key_b]
+        return float(self.total[i, j]), {s: float(self.sections[s][i, j]) for s in SECTION_NAMES}
+
+    def section_means(self) -> Dict[str, float]:
+        """Bölüm başına tüm çiftlerin ortalama benzerliği."""
+        pairs = self.pair_count
+        return {s: (self._section_sums[s] / pairs if pairs else 0.0) for s in SECTION_NAMES}
+
+    def mean_total(self) -> float:
+        pairs = self.pair_count
+        return self._total_sum / pairs if pairs else 0.0
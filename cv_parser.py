@@ -1,91 +1,499 @@
 """PDF dosyalarından metin çıkarma ve CV bölümlerini ayrıştırma modülü."""
 
+import hashlib
+import importlib.util
+import io
+import logging
+import math
+import os
 import pdfplumber
 import re
-from typing import Dict, Optional
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from cache_store import SqliteBlobStore, cache_path
+from instrumentation import incr, observe, span
+from model_loader import LazyModel
+from model_server import client_enabled, remote_model
+
+logger = logging.getLogger(__name__)
+
+# Dosya yolu, bellekteki PDF baytları (bytes / memoryview, ör. UploadedFile.getbuffer()) ya da ikili dosya nesnesi
+PdfSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+# Çıktı biçimini etkileyen değişikliklerde artırın (ayrıştırma önbelleğini geçersiz kılar)
+PARSER_VERSION = "4"
+
+# Metin katmanı bu kadar karakterden kısa olan (ve görsel içeren) sayfalar OCR'a gönderilir
+PAGE_OCR_MIN_CHARS = 40
+
+# Aynı anda OCR'lanan en fazla sayfa sayısı
+OCR_MAX_WORKERS = int(os.environ.get("CV_OCR_WORKERS", "2"))
+
+# OCR çözünürlüğü sayfa boyutuna göre seçilir: sayfa en fazla OCR_MAX_PIXELS piksel olacak şekilde
+# OCR_MIN_DPI ile OCR_MAX_DPI arasında (A4 için varsayılan ~144 DPI, eski sabit 2x ölçek)
+OCR_MIN_DPI = int(os.environ.get("CV_OCR_MIN_DPI", "100"))
+OCR_MAX_DPI = int(os.environ.get("CV_OCR_MAX_DPI", "200"))
+OCR_MAX_PIXELS = int(float(os.environ.get("CV_OCR_MAX_MEGAPIXELS", "2.0")) * 1_000_000)
+
+# Aynı anda bellekte tutulan (rasterleştirilmiş ya da tanınmakta olan) sayfa görüntülerinin toplam tavanı
+OCR_MEMORY_LIMIT = int(os.environ.get("CV_OCR_MEMORY_MB", "256")) * 1024 * 1024
+
+# Bütçeler: belge başına OCR'lanan en fazla sayfa (0 = sınırsız), tek sayfa görüntüsünün en fazla piksel
+# sayısı (DPI alt sınırını da aşar) ve belge başına süre (saniye, 0 = sınırsız). Bütçe dolunca o ana
+# kadar çıkarılan metin "kesildi" işaretiyle döner.
+OCR_MAX_PAGES = int(os.environ.get("CV_OCR_MAX_PAGES", "20"))
+OCR_MAX_RASTER_PIXELS = int(float(os.environ.get("CV_OCR_MAX_RASTER_MEGAPIXELS", "8")) * 1_000_000)
+DOC_DEADLINE_SECONDS = float(os.environ.get("CV_DOC_DEADLINE_SECONDS", "120"))
+
+# Sayfa görüntüsü özeti -> OCR metni; aynı taranmış sayfa yeniden yüklendiğinde tanıma atlanır
+OCR_CACHE_VERSION = "1"
+OCR_CACHE = (SqliteBlobStore(cache_path("ocr.sqlite"), int(os.environ.get("CV_OCR_CACHE_MB", "64")) * 1024 * 1024)
+             if os.environ.get("CV_OCR_CACHE", "1") != "0" else None)
+
+# Süreç boyunca OCR sayaçları ve en yüksek eşzamanlı görüntü belleği (bayt)
+OCR_STATS = {"pages_recognized": 0, "cache_hits": 0, "peak_raster_bytes": 0}
 
 try:
-    import easyocr
     import fitz
     import numpy as np
-    print("EasyOCR modülleri yükleniyor...")
-    OCR_READER = easyocr.Reader(['tr', 'en'], gpu=False, verbose=False)
-    print("✅ EasyOCR hazır (Türkçe + İngilizce, PyMuPDF ile)")
+    PYMUPDF_AVAILABLE = True
+    # Model sunucusu kullanılıyorsa EasyOCR'ın bu süreçte kurulu olması gerekmez
+    OCR_AVAILABLE = importlib.util.find_spec("easyocr") is not None or client_enabled()
+    if not OCR_AVAILABLE:
+        logger.warning("⚠️ EasyOCR yüklenemedi: easyocr paketi bulunamadı")
 except ImportError as e:
-    print(f"⚠️ EasyOCR yüklenemedi: {e}")
-    OCR_READER = None
-except Exception as e:
-    print(f"⚠️ EasyOCR başlatılamadı: {e}")
-    OCR_READER = None
-
-def extract_text_with_ocr(pdf_path: str) -> Optional[str]:
-    """EasyOCR ile taranmış PDF'den metin çıkarır."""
-    if not OCR_READER:
-        print("❌ OCR mevcut değil")
+    logger.warning("⚠️ EasyOCR yüklenemedi: %s", e)
+    PYMUPDF_AVAILABLE = False
+    OCR_AVAILABLE = False
+
+# Metin katmanı motoru: pymupdf (hızlı, varsayılan) ya da pdfplumber (karakter düzeyinde yerleşim, daha yavaş)
+PDF_ENGINES = ("pymupdf", "pdfplumber")
+
+
+def resolve_pdf_engine(name: Optional[str]) -> str:
+    """İstenen metin motorunu doğrular; PyMuPDF yoksa pdfplumber döndürür."""
+    engine = (name or "pymupdf").lower()
+    if engine not in PDF_ENGINES:
+        raise ValueError(f"Bilinmeyen PDF motoru: {engine} (seçenekler: {', '.join(PDF_ENGINES)})")
+    if engine == "pymupdf" and not PYMUPDF_AVAILABLE:
+        logger.warning("⚠️ PyMuPDF bulunamadı, metin pdfplumber ile çıkarılacak")
+        return "pdfplumber"
+    return engine
+
+
+PDF_ENGINE = resolve_pdf_engine(os.environ.get("CV_PDF_ENGINE", "pymupdf"))
+
+
+def _load_ocr_reader():
+    remote = remote_model("ocr")
+    if remote is not None:
+        return remote
+    import easyocr
+    logger.info("EasyOCR modülleri yükleniyor...")
+    reader = easyocr.Reader(['tr', 'en'], gpu=False, verbose=False)
+    logger.info("✅ EasyOCR hazır (Türkçe + İngilizce, PyMuPDF ile)")
+    return reader
+
+
+# EasyOCR yalnızca bir sayfa gerçekten OCR gerektirdiğinde yüklenir
+OCR_MODEL = LazyModel("EasyOCR", _load_ocr_reader)
+
+
+def get_ocr_reader():
+    """Paylaşılan EasyOCR okuyucusunu döndürür (ilk çağrıda yüklenir)."""
+    return OCR_MODEL.get() if OCR_AVAILABLE else None
+
+def read_source(source: PdfSource) -> Union[str, os.PathLike, bytes, memoryview]:
+    """
+    Kaynağı dosya yolu ya da bellekteki baytlar olarak döndürür. Bellekteki veriler kopyalanmaz: bytearray
+    ve getbuffer() sunan dosya nesneleri (BytesIO, Streamlit UploadedFile) memoryview olarak döner;
+    yalnızca diğer dosya nesneleri okunur.
+    """
+    if isinstance(source, (str, os.PathLike, bytes, memoryview)):
+        return source
+    if isinstance(source, bytearray):
+        return memoryview(source)
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer()
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source.read()
+    raise TypeError(f"Desteklenmeyen PDF kaynağı: {type(source).__name__}")
+
+
+def source_label(source: PdfSource) -> str:
+    """Günlük iletileri için kaynağın kısa adı."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", None) or "<bellekteki PDF>"
+
+
+class _MemoryFile(io.RawIOBase):
+    """memoryview üzerinde kopyasız, salt okunur dosya nesnesi (pdfplumber için)."""
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        count = max(0, min(len(buffer), len(self._view) - self._pos))
+        buffer[:count] = self._view[self._pos:self._pos + count]
+        self._pos += count
+        return count
+
+
+def _open_pdfplumber(source: PdfSource):
+    data = read_source(source)
+    if isinstance(data, (str, os.PathLike)):
+        return pdfplumber.open(data)
+    return pdfplumber.open(_MemoryFile(data))
+
+
+def _open_fitz(source: PdfSource) -> "fitz.Document":
+    data = read_source(source)
+    if isinstance(data, (str, os.PathLike)):
+        return fitz.open(data)
+    # PyMuPDF bytes ve memoryview'u kopyalamadan okur; belge açık kaldıkça veriye referans tutar
+    return fitz.open(stream=data, filetype="pdf")
+
+
+@contextmanager
+def _open_document(pdf):
+    """Açık bir fitz belgesini olduğu gibi kullanır, diğer kaynakları açıp iş bitince kapatır."""
+    if isinstance(pdf, fitz.Document):
+        yield pdf
+    else:
+        with _open_fitz(pdf) as doc:
+            yield doc
+
+
+def document_deadline(deadline: Optional[float] = None) -> Optional[float]:
+    """Belgenin mutlak bitiş zamanı (time.time()): şimdiden DOC_DEADLINE_SECONDS sonrası ile deadline'ın erkeni."""
+    own = time.time() + DOC_DEADLINE_SECONDS if DOC_DEADLINE_SECONDS > 0 else None
+    bounds = [d for d in (own, deadline) if d is not None]
+    return min(bounds) if bounds else None
+
+
+def deadline_passed(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.time() >= deadline
+
+
+def _ocr_zoom(rect) -> float:
+    """Sayfa boyutuna göre rasterleştirme ölçeği (72 DPI = 1); raster ve bellek tavanları DPI alt sınırından önce gelir."""
+    area = max(rect.width * rect.height, 1.0)
+    zoom = max(min(OCR_MAX_DPI / 72, math.sqrt(OCR_MAX_PIXELS / area)), OCR_MIN_DPI / 72)
+    return min(zoom, math.sqrt(OCR_MAX_RASTER_PIXELS / area), math.sqrt(OCR_MEMORY_LIMIT / area))
+
+
+def _render_page(page, zoom: float = 2.0) -> "fitz.Pixmap":
+    """Sayfayı doğrudan gri tonlamalı (alfa kanalsız, piksel başına 1 bayt) görüntüye dönüştürür."""
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+
+
+def _pixmap_array(pix) -> "np.ndarray":
+    """Pixmap belleği üzerinde kopyasız numpy görünümü; pixmap tanıma bitene kadar tutulmalıdır."""
+    return np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.h, pix.stride)[:, :pix.w]
+
+
+def _image_key(pix) -> str:
+    digest = hashlib.sha256(pix.samples_mv)
+    digest.update(f"{pix.w}x{pix.h}".encode())
+    return f"{OCR_CACHE_VERSION}:{digest.hexdigest()}"
+
+
+def _read_image(reader, img_data) -> str:
+    with span("ocr_recognize"):
+        return " ".join(reader.readtext(img_data, detail=0, paragraph=True))
+
+
+def _read_pixmap(reader, pix) -> str:
+    # Görünüm iş parçacığında kurulur; pixmap, tanıma bitene kadar bu çağrının argümanı olarak canlı kalır
+    # (süresi dolup beklenmeden bırakılan tanımalar için de)
+    return _read_image(reader, _pixmap_array(pix))
+
+
+def iter_ocr_pages(pdf, page_numbers: List[int], deadline: Optional[float] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Verilen sayfaları (0 tabanlı) OCR ile okur (pdf: PdfSource ya da açık fitz belgesi); (sayfa numarası,
+    metin) çiftlerini sayfa sırasıyla, her sayfa hazır oldukça üretir.
+
+    Sayfalar sırayla rasterleştirilir, tanıma en fazla OCR_MAX_WORKERS sayfa için eşzamanlı yürür. Yeni sayfa,
+    bellekteki görüntülerin toplamı OCR_MEMORY_LIMIT'i aşmayacaksa rasterleştirilir; aksi halde önce
+    tanınmakta olan bir sayfanın bitmesi beklenir. Görüntü özeti önbellekte olan sayfalar tanınmaz; OCR
+    modeli yalnızca önbellekte olmayan bir sayfa için yüklenir. Okunamayan sayfalar atlanır.
+
+    deadline (time.time()) geçince yeni sayfa başlatılmaz, süren tanımalar beklenmez; o ana kadar biten
+    sayfalar sırayla üretilir ve akış biter.
+    """
+    if not page_numbers:
+        return
+    ready: Dict[int, str] = {}
+    scheduled: List[int] = []   # önbellekten gelen ya da tanımaya gönderilen sayfalar, sırayla
+    emitted = 0
+    inflight_bytes = 0
+    peak_bytes = 0
+    recognized = 0
+    hits = 0
+    expired = False
+    pool = ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS)
+    pending = {}
+
+    def collect(futures) -> None:
+        nonlocal inflight_bytes, recognized
+        for future in futures:
+            page_no, key, nbytes = pending.pop(future)
+            inflight_bytes -= nbytes
+            try:
+                text = future.result()
+            except Exception as e:
+                # Tek sayfanın hatası (ör. model sunucusu bağlantısı) diğer sayfaları düşürmesin
+                logger.warning("⚠️ Sayfa %d OCR ile okunamadı: %s", page_no + 1, e)
+                incr("ocr_page_errors")
+                scheduled.remove(page_no)
+                continue
+            recognized += 1
+            ready[page_no] = text
+            if OCR_CACHE is not None:
+                OCR_CACHE.put(key, text.encode("utf-8"))
+
+    def wait_one() -> bool:
+        """Bir tanımanın bitmesini bekler; süre bu arada dolarsa False döner."""
+        timeout = None if deadline is None else max(0.0, deadline - time.time())
+        finished = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED).done
+        collect(finished)
+        return bool(finished)
+
+    try:
+        with _open_document(pdf) as doc:
+            for page_no in page_numbers:
+                if deadline_passed(deadline):
+                    expired = True
+                    break
+                page = doc[page_no]
+                zoom = _ocr_zoom(page.rect)
+                nbytes = math.ceil(page.rect.width * zoom) * math.ceil(page.rect.height * zoom)
+                while pending and (len(pending) >= OCR_MAX_WORKERS or inflight_bytes + nbytes > OCR_MEMORY_LIMIT):
+                    if not wait_one():
+                        expired = True
+                        break
+                while emitted < len(scheduled) and scheduled[emitted] in ready:
+                    yield scheduled[emitted], ready.pop(scheduled[emitted])
+                    emitted += 1
+                if expired:
+                    break
+
+                logger.debug("  📖 Sayfa %d/%d OCR ile okunuyor (%.0f DPI)...", page_no + 1, len(doc), zoom * 72)
+                with span("ocr_render"):
+                    pix = _render_page(page, zoom)
+                key = _image_key(pix)
+                cached = OCR_CACHE.get(key) if OCR_CACHE is not None else None
+                if cached is not None:
+                    hits += 1
+                    ready[page_no] = cached.decode("utf-8")
+                    scheduled.append(page_no)
+                    continue
+                reader = get_ocr_reader()
+                if reader is None:
+                    continue
+                nbytes = len(pix.samples_mv)
+                inflight_bytes += nbytes
+                peak_bytes = max(peak_bytes, inflight_bytes)
+                pending[pool.submit(_read_pixmap, reader, pix)] = (page_no, key, nbytes)
+                scheduled.append(page_no)
+                del pix
+
+        while emitted < len(scheduled):
+            if scheduled[emitted] in ready:
+                yield scheduled[emitted], ready.pop(scheduled[emitted])
+                emitted += 1
+            elif expired or not wait_one():
+                expired = True
+                break
+        if expired:
+            # Süre doldu: bitmiş sayfalar (aradaki eksiklere rağmen) sırayla verilir
+            for page_no in scheduled[emitted:]:
+                if page_no in ready:
+                    yield page_no, ready.pop(page_no)
+            incr("ocr_deadline_expired")
+            logger.warning("⏱️ OCR süresi doldu: %d/%d sayfa okunabildi", recognized + hits, len(page_numbers))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    incr("ocr_pages", recognized)
+    incr("ocr_cache_hits", hits)
+    observe("ocr_raster_peak_bytes", peak_bytes)
+    OCR_STATS["pages_recognized"] += recognized
+    OCR_STATS["cache_hits"] += hits
+    OCR_STATS["peak_raster_bytes"] = max(OCR_STATS["peak_raster_bytes"], peak_bytes)
+    logger.debug("OCR: %d sayfa tanındı, %d sayfa önbellekten, en yüksek görüntü belleği %.1f MB",
+                 recognized, hits, peak_bytes / (1024 * 1024))
+
+
+def ocr_pages(pdf, page_numbers: List[int], deadline: Optional[float] = None) -> Dict[int, str]:
+    """Verilen sayfaları (0 tabanlı) OCR ile okur; sayfa numarası -> metin döndürür."""
+    results = dict(iter_ocr_pages(pdf, page_numbers, deadline))
+    for page_no in sorted(results):
+        logger.debug("  ✅ Sayfa %d: %d karakter okundu", page_no + 1, len(results[page_no]))
+    return results
+
+
+def extract_text_with_ocr(pdf_path: PdfSource, deadline: Optional[float] = None) -> Optional[str]:
+    """
+    EasyOCR ile taranmış PDF'den metin çıkarır; sayfalar okundukça listeye eklenir. En fazla OCR_MAX_PAGES
+    sayfa okunur ve belge süresi (DOC_DEADLINE_SECONDS, deadline) dolunca o ana kadarki metin döner.
+    """
+    if not OCR_AVAILABLE:
+        logger.error("❌ OCR mevcut değil")
         return None
+    deadline = document_deadline(deadline)
     try:
-        import fitz
-        print(f"📄 OCR başlatılıyor: {pdf_path}")
-        
-        # PyMuPDF ile PDF'i aç
-        doc = fitz.open(pdf_path)
-        print(f"✅ {len(doc)} sayfa bulundu")
-        
-        full_text = ""
-        for i, page in enumerate(doc, 1):
-            print(f"  📖 Sayfa {i}/{len(doc)} okunuyor...")
-            
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            img_data = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
-            
-            if pix.n == 4:
-                img_data = img_data[:, :, :3]
-            result = OCR_READER.readtext(img_data, detail=0, paragraph=True)
-            page_text = " ".join(result)
-            full_text += page_text + "\n\n"
-            print(f"  ✅ Sayfa {i}: {len(page_text)} karakter okundu")
-        
-        doc.close()
-        
+        logger.debug("📄 OCR başlatılıyor: %s", source_label(pdf_path))
+        parts = []
+        with _open_fitz(pdf_path) as doc:
+            logger.debug("✅ %d sayfa bulundu", len(doc))
+            page_numbers = list(range(len(doc)))
+            if OCR_MAX_PAGES > 0 and len(page_numbers) > OCR_MAX_PAGES:
+                logger.warning("⏱️ Yalnızca ilk %d/%d sayfa OCR ile okunuyor", OCR_MAX_PAGES, len(page_numbers))
+                page_numbers = page_numbers[:OCR_MAX_PAGES]
+            for _, text in iter_ocr_pages(doc, page_numbers, deadline):
+                parts.append(text)
+                parts.append("\n\n")
+        full_text = "".join(parts)
+
         if full_text.strip():
-            print(f"✅ OCR tamamlandı: Toplam {len(full_text)} karakter")
+            logger.debug("✅ OCR tamamlandı: Toplam %d karakter", len(full_text))
             return full_text
         else:
-            print("⚠️ OCR hiç metin bulamadı")
+            logger.warning("⚠️ OCR hiç metin bulamadı: %s", source_label(pdf_path))
             return None
     except Exception as e:
-        print(f"❌ OCR Hatası: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ OCR Hatası: %s", e)
         return None
 
-def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
-    """PDF dosyasından metin çıkarır, gerekirse OCR kullanır."""
+def _pymupdf_pages(doc, deadline: Optional[float] = None) -> Tuple[List[str], List[int], bool]:
+    """
+    PyMuPDF metin katmanı (bloklar okuma sırasına göre); metni kısa ve görsel içeren sayfalar ve süre
+    dolduğu için okunmadan kalan sayfa olup olmadığı da döner.
+    """
+    page_texts = []
+    scanned_pages = []
+    for page_no, page in enumerate(doc):
+        if deadline_passed(deadline):
+            return page_texts, scanned_pages, True
+        text = page.get_text("text", sort=True)
+        page_texts.append(text)
+        # Gömülü (inline) görseller de sayılsın diye get_image_info; yalnızca kısa sayfalarda çağrılır
+        if len(text.strip()) < PAGE_OCR_MIN_CHARS and (page.get_images() or page.get_image_info()):
+            scanned_pages.append(page_no)
+    return page_texts, scanned_pages, False
+
+
+def _pdfplumber_pages(pdf, deadline: Optional[float] = None) -> Tuple[List[str], List[int], bool]:
+    page_texts = []
+    scanned_pages = []
+    for page_no, page in enumerate(pdf.pages):
+        if deadline_passed(deadline):
+            return page_texts, scanned_pages, True
+        text = page.extract_text() or ""
+        page_texts.append(text)
+        if len(text.strip()) < PAGE_OCR_MIN_CHARS and page.images:
+            scanned_pages.append(page_no)
+    return page_texts, scanned_pages, False
+
+
+def _ocr_scanned_pages(pdf, page_texts: List[str], scanned_pages: List[int], deadline: Optional[float] = None) -> bool:
+    """
+    Metin katmanı olmayan sayfaları OCR ile okur; OCR metni daha uzunsa page_texts'te yerine koyar.
+    OCR_MAX_PAGES, deadline ya da hata yüzünden okunmadan kalan sayfa varsa True döner.
+    """
+    if not scanned_pages or not OCR_AVAILABLE:
+        return False
+    logger.info("⚠️ %d/%d sayfada metin katmanı yok, bu sayfalar OCR ile okunuyor...", len(scanned_pages), len(page_texts))
+    truncated = False
+    if OCR_MAX_PAGES > 0 and len(scanned_pages) > OCR_MAX_PAGES:
+        logger.warning("⏱️ Yalnızca ilk %d/%d taranmış sayfa OCR ile okunuyor", OCR_MAX_PAGES, len(scanned_pages))
+        scanned_pages = scanned_pages[:OCR_MAX_PAGES]
+        truncated = True
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text += text + "\n\n"
-            
-            if full_text and len(full_text.strip()) > 100:
-                print(f"✅ pdfplumber başarılı: {len(full_text)} karakter")
-                return full_text
-            
-            if OCR_READER:
-                print(f"⚠️ PDF'de metin yetersiz ({len(full_text.strip())} karakter), OCR deneniyor...")
-                ocr_text = extract_text_with_ocr(pdf_path)
-                if ocr_text:
-                    return ocr_text
-                else:
-                    print("⚠️ OCR de başarısız, mevcut metin döndürülüyor")
-            
-            return full_text if full_text else None
-            
+        ocr_texts = ocr_pages(pdf, scanned_pages, deadline)
     except Exception as e:
-        print(f"Hata: PDF okunamadı {pdf_path}. Hata: {e}")
-        return None
+        logger.error("❌ OCR Hatası: %s", e)
+        ocr_texts = {}
+    for page_no, text in ocr_texts.items():
+        if len(text.strip()) > len(page_texts[page_no].strip()):
+            page_texts[page_no] = text
+    if not ocr_texts:
+        logger.warning("⚠️ OCR de başarısız, mevcut metin döndürülüyor")
+    return truncated or len(ocr_texts) < len(scanned_pages)
+
+
+def extract_text_budgeted(pdf_path: PdfSource, engine: Optional[str] = None,
+                          deadline: Optional[float] = None) -> Tuple[Optional[str], bool]:
+    """
+    PDF'ten metin çıkarır; metin katmanı olmayan sayfaları tek tek OCR ile okur. (metin, kesildi) döndürür.
+
+    Metin katmanı yeterli olan sayfalar olduğu gibi kalır; yalnızca PAGE_OCR_MIN_CHARS'tan az metin
+    içeren ve görsel barındıran sayfalar OCR'a gönderilir ve sonuç sayfa sırasıyla birleştirilir.
+    engine verilmezse PDF_ENGINE (CV_PDF_ENGINE) kullanılır; pymupdf motorunda belge bir kez açılır ve
+    aynı belge OCR rasterleştirmesinde de kullanılır. pdf_path bir dosya yolu ya da bellekteki PDF olabilir
+    (bkz. PdfSource); bellekteki veri diske yazılmadan ve kopyalanmadan okunur.
+
+    Bütçeler: en fazla OCR_MAX_PAGES sayfa OCR'lanır; belge DOC_DEADLINE_SECONDS içinde ya da verilen
+    deadline'a (time.time()) kadar bitmezse kalan sayfalar bırakılır. Bu durumlarda o ana kadarki metin
+    kesildi=True ile döner.
+    """
+    engine = resolve_pdf_engine(engine) if engine else PDF_ENGINE
+    deadline = document_deadline(deadline)
+    try:
+        data = read_source(pdf_path)
+        if engine == "pymupdf":
+            with _open_fitz(data) as doc:
+                with span("pdf_text"):
+                    page_texts, scanned_pages, truncated = _pymupdf_pages(doc, deadline)
+                native_chars = sum(len(t.strip()) for t in page_texts)
+                truncated = _ocr_scanned_pages(doc, page_texts, scanned_pages, deadline) or truncated
+        else:
+            with span("pdf_text"), _open_pdfplumber(data) as pdf:
+                page_texts, scanned_pages, truncated = _pdfplumber_pages(pdf, deadline)
+            native_chars = sum(len(t.strip()) for t in page_texts)
+            truncated = _ocr_scanned_pages(data, page_texts, scanned_pages, deadline) or truncated
+
+        full_text = "".join(t + "\n\n" for t in page_texts if t)
+        incr("pdf_pages", len(page_texts))
+        incr("chars_extracted", len(full_text))
+        if truncated:
+            incr("documents_truncated")
+            logger.warning("⏱️ Bütçe doldu, %s kısmen okundu: %d karakter", source_label(pdf_path), len(full_text))
+        elif not scanned_pages:
+            logger.debug("✅ %s başarılı: %d karakter", engine, len(full_text))
+        else:
+            logger.debug("✅ Metin çıkarıldı: %d karakter metin katmanından, toplam %d karakter", native_chars, len(full_text))
+        return (full_text if full_text else None), truncated
+
+    except Exception as e:
+        logger.error("Hata: PDF okunamadı %s. Hata: %s", source_label(pdf_path), e)
+        return None, False
+
+
+def extract_text_from_pdf(pdf_path: PdfSource, engine: Optional[str] = None) -> Optional[str]:
+    """PDF'ten metin çıkarır (bkz. extract_text_budgeted); bütçe dolduysa o ana kadarki metin döner."""
+    return extract_text_budgeted(pdf_path, engine)[0]
 
 def preprocess_text(text: str) -> str:
     """Metni temizler ve düzenler."""
@@ -95,55 +503,96 @@ def preprocess_text(text: str) -> str:
     text = re.sub(r'\s{2,}', ' ', text)
     return text.strip()
 
-def extract_sections_simple(text: str) -> Dict[str, str]:
-    """CV metninden bölümleri ayırır ve yapılandırır."""
-    section_titles = [
-        "EĞİTİM", "Egitim", "DENEYİM", "Deneyim", "YETENEKLER", "Yetenekler",
-        "TEKNİK BECERİLER", "TEKNIK BECERILER", "TEKNİK", "TECHNICAL SKILLS",
-        "YABANCI DİL", "YABANCI DİLLER", "LANGUAGES", "DİL", "DIL",
-        "KURSLAR", "KURS", "COURSES",
-        "SERTİFİKALAR", "CERTIFICATIONS",
-        "KİŞİSEL BECERİLER", "KISISEL BECERILER", "PERSONAL SKILLS",
-        "REFERANSLAR", "REFERANS", "REFERENCES",
-        "SKILLS", "EXPERIENCE", "EDUCATION", "SUMMARY", "ÖZET", "CONTACT", "İLETİŞİM", "PROJELER"
-    ]
-    
-    pattern = r'\b(' + '|'.join(re.escape(title) for title in section_titles) + r')\b'
-    
-    parts = replit_with_content(pattern, text)
-    
-    sections = {}
-    current_title = "GENERAL"
-    
-    for part in parts:
-        if part.strip().upper() in [t.upper() for t in section_titles]:
-            current_title = part.strip().upper()
-            sections[current_title] = ""
-        elif current_title in sections:
-            sections[current_title] += part.strip() + " "
-        else:
-            sections["GENERAL"] = sections.get("GENERAL", "") + part.strip() + " "
+# Kanonik bölüm anahtarı -> metinde geçebilecek başlıklar. ASCII yazımlar (Egitim, DIL, ...) otomatik eklenir.
+SECTION_ALIASES = {
+    "EĞİTİM": ["EĞİTİM", "EDUCATION"],
+    "DENEYİM": ["DENEYİM", "EXPERIENCE"],
+    "YETENEKLER": ["YETENEKLER", "SKILLS"],
+    "TEKNİK BECERİLER": ["TEKNİK BECERİLER", "TEKNİK", "TECHNICAL SKILLS"],
+    "YABANCI DİL": ["YABANCI DİL", "YABANCI DİLLER", "LANGUAGES", "DİL"],
+    "KURSLAR": ["KURSLAR", "KURS", "COURSES"],
+    "SERTİFİKALAR": ["SERTİFİKALAR", "CERTIFICATIONS"],
+    "KİŞİSEL BECERİLER": ["KİŞİSEL BECERİLER", "PERSONAL SKILLS"],
+    "REFERANSLAR": ["REFERANSLAR", "REFERANS", "REFERENCES"],
+    "ÖZET": ["ÖZET", "SUMMARY"],
+    "İLETİŞİM": ["İLETİŞİM", "CONTACT"],
+    "PROJELER": ["PROJELER"],
+}
+
+_TR_FOLD = str.maketrans("İIŞĞÜÖÇ", "IISGUOC")
+
 
-    return {k: v.strip() for k, v in sections.items() if v.strip()}
+def _fold_title(title: str) -> str:
+    """Başlığı büyük harfe çevirip Türkçe karakterleri ve boşlukları sadeleştirir (EĞİTİM, Egitim -> EGITIM)."""
+    return " ".join(title.upper().translate(_TR_FOLD).split())
 
-def replit_with_content(pattern: str, text: str) -> list:
-    """re.split'in yakalanan grupları dahil etme versiyonu."""
-    parts = re.split(pattern, text, flags=re.IGNORECASE)
-    return [p for p in parts if p and p.strip()]
 
-def parse_cv(pdf_path: str) -> Dict[str, str]:
-    """PDF'den metin çıkarır ve bölümlere ayırır."""
+# Sadeleştirilmiş başlık -> kanonik anahtar (O(1) arama)
+_TITLE_TO_SECTION = {}
+for _section, _aliases in SECTION_ALIASES.items():
+    for _alias in _aliases:
+        _TITLE_TO_SECTION[_fold_title(_alias)] = _section
+
+# Uzun başlıklar önce denensin diye uzunluğa göre sıralı, boşluklar esnek tek bir desen
+_SECTION_PATTERN = re.compile(
+    r'\b(' + '|'.join(
+        r'\s+'.join(re.escape(word) for word in title.split())
+        for title in sorted(set(_TITLE_TO_SECTION) | {a for aliases in SECTION_ALIASES.values() for a in aliases},
+                            key=len, reverse=True)
+    ) + r')\b',
+    re.IGNORECASE,
+)
+
+
+def find_section_spans(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Metni tek geçişte tarar; her bölüm için (kanonik anahtar, içerik başlangıcı, içerik sonu) döndürür.
+
+    İlk başlıktan önceki metin GENERAL olarak işaretlenir. Yalnızca tamamı büyük harf olan ya da satır
+    başında büyük harfle başlayan eşleşmeler başlık sayılır; "iletişim protokolleri", "... Teknik liderlik"
+    gibi metin içi geçişler bulunduğu bölümde kalır.
+    """
+    spans = []
+    current_key, content_start = "GENERAL", 0
+    for match in _SECTION_PATTERN.finditer(text):
+        title = match.group(1)
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        at_line_start = not text[line_start:match.start()].strip()
+        if not (title.isupper() or (title[0].isupper() and at_line_start)):
+            continue
+        spans.append((current_key, content_start, match.start()))
+        current_key = _TITLE_TO_SECTION.get(_fold_title(title), current_key)
+        content_start = match.end()
+    spans.append((current_key, content_start, len(text)))
+    return spans
+
+
+def extract_sections_simple(text: str) -> Dict[str, str]:
+    """CV metninden bölümleri ayırır; anahtarlar SECTION_ALIASES'taki kanonik adlardır."""
+    sections = {}
+    with span("sections"):
+        spans = find_section_spans(text)
+    for key, start, end in spans:
+        content = text[start:end].strip()
+        if not content:
+            continue
+        # Aynı bölüm yeniden başlarsa içerik kaybolmasın diye ekle
+        sections[key] = f"{sections[key]}\n\n{content}" if key in sections else content
+    return sections
+
+def parse_cv(pdf_path: PdfSource) -> Dict[str, str]:
+    """PDF'den (dosya yolu ya da bellekteki baytlar) metin çıkarır ve bölümlere ayırır."""
     raw_text = extract_text_from_pdf(pdf_path)
     if not raw_text:
         return {}
     
-    print(f"\n🔍 DEBUG - Ham metin ilk 600 karakter:\n{raw_text[:600]}\n")
-    print(f"🔍 DEBUG - Ham metin son 300 karakter:\n{raw_text[-300:]}\n")
-    
     sections = extract_sections_simple(raw_text)
-    
-    print(f"🔍 DEBUG - Bulunan bölümler: {list(sections.keys())}")
-    for key, value in sections.items():
-        print(f"  - {key}: {len(value)} karakter (ilk 100: {value[:100]}...)")
-    
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔍 Ham metin ilk 600 karakter:\n%s", raw_text[:600])
+        logger.debug("🔍 Ham metin son 300 karakter:\n%s", raw_text[-300:])
+        logger.debug("🔍 Bulunan bölümler: %s", list(sections.keys()))
+        for key, value in sections.items():
+            logger.debug("  - %s: %d karakter (ilk 100: %s...)", key, len(value), value[:100])
+
     return sections
\ No newline at end of file
@@ -1,23 +1,54 @@
 """CV verilerinden yapılandırılmış bilgi çıkarma modülü."""
 
-import spacy
 from typing import Dict, List, Any
 from collections import defaultdict
+import logging
 import re
+from instrumentation import observe, span
+from model_loader import LazyModel
+from model_server import remote_model
+
+logger = logging.getLogger(__name__)
 
 CUSTOM_NER_MODEL_NAME = "en_core_web_sm"
 
-try:
-    nlp = spacy.load(CUSTOM_NER_MODEL_NAME)
-    print(f"NLP: '{CUSTOM_NER_MODEL_NAME}' modeli başarıyla yüklendi.")
-except OSError:
-    print(f"HATA: '{CUSTOM_NER_MODEL_NAME}' modeli bulunamadi. Temel spaCy modeline geri donuluyor.")
+# Çıktı biçimini etkileyen değişikliklerde artırın (ayrıştırma önbelleğini geçersiz kılar)
+EXTRACTOR_VERSION = "3"
+
+# Yalnızca NER kullanıldığı için diğer bileşenler yüklenmez
+NER_EXCLUDED_PIPES = ["tagger", "morphologizer", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+NLP_BATCH_SIZE = 64
+
+def _load_nlp():
+    remote = remote_model("ner")
+    if remote is not None:
+        return remote
+    import spacy
     try:
-        nlp = spacy.load("en_core_web_sm")
-        print("NLP: Temel 'en_core_web_sm' modeli yüklendi.")
-    except Exception as e:
-        print(f"KRİTİK HATA: Hiçbir spaCy modeli yüklenemedi. NLP islemleri yapilamayacak. Hata: {e}")
-        nlp = None
+        nlp = spacy.load(CUSTOM_NER_MODEL_NAME, exclude=NER_EXCLUDED_PIPES)
+        logger.info("NLP: '%s' modeli başarıyla yüklendi.", CUSTOM_NER_MODEL_NAME)
+    except OSError:
+        logger.warning("HATA: '%s' modeli bulunamadi. Temel spaCy modeline geri donuluyor.", CUSTOM_NER_MODEL_NAME)
+        try:
+            nlp = spacy.load("en_core_web_sm", exclude=NER_EXCLUDED_PIPES)
+            logger.info("NLP: Temel 'en_core_web_sm' modeli yüklendi.")
+        except Exception as e:
+            logger.error("KRİTİK HATA: Hiçbir spaCy modeli yüklenemedi. NLP islemleri yapilamayacak. Hata: %s", e)
+            nlp = None
+    if nlp is not None and "tok2vec" in nlp.pipe_names:
+        # tok2vec'i yalnızca NER onu dinliyorsa çalıştır
+        if "ner" not in getattr(nlp.get_pipe("tok2vec"), "listening_components", []):
+            nlp.disable_pipe("tok2vec")
+    return nlp
+
+
+NLP_MODEL = LazyModel("spaCy", _load_nlp)
+
+
+def get_nlp():
+    """Paylaşılan spaCy modelini döndürür (ilk çağrıda yüklenir)."""
+    return NLP_MODEL.get()
 
 def extract_skills(text: str) -> List[str]:
     """Yetenekler bölümünden teknolojileri ve becerileri çıkarır."""
@@ -75,21 +106,32 @@ def extract_references(text: str) -> List[Dict[str, str]]:
     return refs
 
 
-def extract_experience_details(experience_text: str) -> List[Dict[str, str]]:
-    """Deneyim bilgilerini yapılandırır."""
-    if not nlp or not experience_text:
+def _split_entries(text: str) -> List[str]:
+    """Bölüm metnini boş satırlarla ayrılmış girdilere böler."""
+    return [e.strip() for e in text.split('\n\n') if e.strip()]
+
+
+def _pipe_entries(entries: List[str]) -> list:
+    """Girdileri tek bir toplu nlp.pipe çağrısıyla işler."""
+    nlp = get_nlp()
+    if not nlp or not entries:
         return []
+    observe("ner_batch_size", len(entries))
+    with span("ner", entries=len(entries)):
+        return list(nlp.pipe(entries, batch_size=NLP_BATCH_SIZE))
 
-    doc = nlp(experience_text)
-    experiences = []
-    current_experience = defaultdict(str)
-    experience_entries = experience_text.split('\n\n')
-    
-    for entry in experience_entries:
-        if not entry.strip():
-            continue
 
-        entry_doc = nlp(entry.strip())
+def extract_experience_details(experience_text: str, docs: list = None) -> List[Dict[str, str]]:
+    """Deneyim bilgilerini yapılandırır. docs verilirse girdiler yeniden işlenmez."""
+    if not experience_text or not get_nlp():
+        return []
+
+    experience_entries = _split_entries(experience_text)
+    if docs is None:
+        docs = _pipe_entries(experience_entries)
+
+    experiences = []
+    for entry, entry_doc in zip(experience_entries, docs):
         details = defaultdict(str)
         
         for ent in entry_doc.ents:
@@ -110,20 +152,18 @@ def extract_experience_details(experience_text: str) -> List[Dict[str, str]]:
     return experiences
 
 
-def extract_education_details(education_text: str) -> List[Dict[str, str]]:
-    """Eğitim bilgilerini yapılandırır."""
-    if not nlp or not education_text:
+def extract_education_details(education_text: str, docs: list = None) -> List[Dict[str, str]]:
+    """Eğitim bilgilerini yapılandırır. docs verilirse girdiler yeniden işlenmez."""
+    if not education_text or not get_nlp():
         return []
 
-    education_entries = education_text.split('\n\n')
-    education_list = []
+    education_entries = _split_entries(education_text)
+    if docs is None:
+        docs = _pipe_entries(education_entries)
 
-    for entry in education_entries:
-        if not entry.strip():
-            continue
-        
+    education_list = []
+    for entry, entry_doc in zip(education_entries, docs):
         details = defaultdict(str)
-        entry_doc = nlp(entry.strip())
         
         for ent in entry_doc.ents:
              if ent.label_ in ["DATE"]:
@@ -131,7 +171,7 @@ def extract_education_details(education_text: str) -> List[Dict[str, str]]:
              elif ent.label_ in ["ORG"]:
                 details["Kurum"] = ent.text
 
-        details["Raw_Entry"] = entry.strip()
+        details["Raw_Entry"] = entry
         
         if details.get("Raw_Entry"):
             education_list.append(dict(details))
@@ -140,9 +180,23 @@ def extract_education_details(education_text: str) -> List[Dict[str, str]]:
 
 
 # --- ANA ÇIKARIM FONKSİYONU ---
-def extract_structured_data(sections: Dict[str, str]) -> Dict[str, Any]:
+def _experience_text(sections: Dict[str, str]) -> str:
+    return sections.get("DENEYİM", "")
+
+
+def _education_text(sections: Dict[str, str]) -> str:
+    return sections.get("EĞİTİM", "")
+
+
+def extract_structured_data(sections: Dict[str, str], experience_docs: list = None,
+                            education_docs: list = None) -> Dict[str, Any]:
     """
     Tüm bölümlerden yapılandırılmış veriyi çıkarır (Hafta 7-9 görevi).
+
+    sections anahtarları cv_parser.SECTION_ALIASES'taki kanonik adlardır (EXPERIENCE -> DENEYİM gibi eşlemeler
+    ayrıştırıcıda yapılır).
+
+    experience_docs / education_docs önceden işlenmiş spaCy belgeleridir (bkz. extract_structured_data_many).
     """
     structured_data = {
         "DENEYİM": [],
@@ -155,61 +209,85 @@ def extract_structured_data(sections: Dict[str, str]) -> Dict[str, Any]:
         "KURSLAR": [],
         "KİŞİSEL_BECERİLER": [],
         "REFERANSLAR": [],
-        "ÖZET": sections.get("ÖZET", sections.get("SUMMARY", ""))
+        "ÖZET": sections.get("ÖZET", "")
     }
     
     # 1. Deneyim Çıkarımı
-    experience_text = sections.get("DENEYİM", sections.get("EXPERIENCE", ""))
+    experience_text = _experience_text(sections)
     if experience_text:
-        structured_data["DENEYİM"] = extract_experience_details(experience_text)
+        structured_data["DENEYİM"] = extract_experience_details(experience_text, experience_docs)
         
     # 2. Eğitim Çıkarımı
-    education_text = sections.get("EĞİTİM", sections.get("EDUCATION", ""))
+    education_text = _education_text(sections)
     if education_text:
-        structured_data["EĞİTİM"] = extract_education_details(education_text)
+        structured_data["EĞİTİM"] = extract_education_details(education_text, education_docs)
         
     # 3. Yetenek Çıkarımı
-    skills_text = sections.get("YETENEKLER", sections.get("SKILLS", ""))
+    skills_text = sections.get("YETENEKLER", "")
     if skills_text:
         structured_data["YETENEKLER"] = extract_skills(skills_text)
 
     # 3b. Teknik Beceriler (ayrı bir bölüm varsa)
-    tech_text = sections.get("TEKNİK BECERİLER", sections.get("TEKNIK BECERILER", ""))
+    tech_text = sections.get("TEKNİK BECERİLER", "")
     if tech_text:
         structured_data["TEKNİK_BECERİLER"] = extract_skills(tech_text)
 
     # 4. Sertifikalar Çıkarımı (Sadece metni al)
     # İleride NER ile Sertifika Adı ve Veriliş Tarihi gibi alt alanlar çıkarılmalıdır.
-    certs_text = sections.get("SERTİFİKALAR", sections.get("CERTIFICATIONS", ""))
+    certs_text = sections.get("SERTİFİKALAR", "")
     if certs_text:
         structured_data["SERTİFİKALAR"].append({"Raw_Entry": certs_text.strip()})
 
     # 4b. Kurslar
-    courses_text = sections.get("KURSLAR", sections.get("COURSES", ""))
+    courses_text = sections.get("KURSLAR", "")
     if courses_text:
         structured_data["KURSLAR"].append({"Raw_Entry": courses_text.strip()})
 
-    # 5. Projeler Çıkarımı (Sadece metni al)
-
     # 5. Projeler Çıkarımı (Sadece metni al)
     projects_text = sections.get("PROJELER", "")
     if projects_text:
         structured_data["PROJELER"].append({"Raw_Entry": projects_text.strip()})
 
     # 6. Yabancı Dil
-    languages_text = sections.get("YABANCI DİL", sections.get("YABANCI DİLLER", sections.get("LANGUAGES", "")))
+    languages_text = sections.get("YABANCI DİL", "")
     if languages_text:
         structured_data["YABANCI_DİL"] = extract_languages(languages_text)
 
     # 7. Kişisel Beceriler
-    personal_text = sections.get("KİŞİSEL BECERİLER", sections.get("KISISEL BECERILER", sections.get("PERSONAL SKILLS", "")))
+    personal_text = sections.get("KİŞİSEL BECERİLER", "")
     if personal_text:
         structured_data["KİŞİSEL_BECERİLER"] = extract_skills(personal_text)
 
     # 8. Referanslar
-    refs_text = sections.get("REFERANSLAR", sections.get("REFERANS", sections.get("REFERENCES", "")))
+    refs_text = sections.get("REFERANSLAR", "")
     if refs_text:
         structured_data["REFERANSLAR"] = extract_references(refs_text)
 
 
-    return structured_data
\ No newline at end of file
+    return structured_data
+
+
+def extract_structured_data_many(sections_list: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Birden fazla CV için yapılandırılmış veriyi çıkarır.
+
+    Tüm CV'lerin deneyim ve eğitim girdileri tek bir nlp.pipe çağrısında işlenir.
+    """
+    entries = []
+    spans = []
+    for sections in sections_list:
+        for text in (_experience_text(sections), _education_text(sections)):
+            split = _split_entries(text) if text else []
+            spans.append((len(entries), len(entries) + len(split)))
+            entries.extend(split)
+
+    docs = _pipe_entries(entries)
+    results = []
+    for k, sections in enumerate(sections_list):
+        exp_span, edu_span = spans[2 * k], spans[2 * k + 1]
+        results.append(extract_structured_data(
+            sections,
+            experience_docs=docs[exp_span[0]:exp_span[1]] if docs else None,
+            education_docs=docs[edu_span[0]:edu_span[1]] if docs else None,
+        ))
+    return results
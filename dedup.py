@@ -0,0 +1,92 @@
+"""Aynı adayın tekrar gönderilen CV'lerini metin parmak iziyle (SimHash) bulma."""
+
+import hashlib
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = int(os.environ.get("CV_DEDUP_SHINGLE", "3"))
+# Bu kadar veya daha az bit farkı olan parmak izleri aynı CV sayılır
+MAX_DISTANCE = int(os.environ.get("CV_DEDUP_DISTANCE", "6"))
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> Optional[int]:
+    """Kelime k-gramlarının (shingle) SimHash parmak izi; metin boşsa None."""
+    tokens = _tokens(text or "")
+    if not tokens:
+        return None
+    if len(tokens) < shingle_size:
+        shingles = Counter([" ".join(tokens)])
+    else:
+        shingles = Counter(" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1))
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, count in shingles.items():
+        h = _hash64(shingle)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+    return sum(1 << bit for bit in range(FINGERPRINT_BITS) if weights[bit] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _find(parent: List[int], x: int) -> int:
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def group_duplicates(fingerprints: List[Optional[int]], max_distance: int = MAX_DISTANCE) -> List[int]:
+    """
+    Her öğe için temsilcisinin sırasını döndürür (tekrar değilse kendisi).
+
+    Parmak izi max_distance + 1 banda bölünür; güvercin yuvası ilkesiyle en fazla max_distance bit farklı iki
+    iz en az bir bantta aynıdır. Yalnızca aynı kovaya düşen çiftler karşılaştırılır ve union-find ile
+    gruplanır; temsilci grubun en küçük sıralı öğesidir. Parmak izi None olan öğeler gruplanmaz.
+    """
+    n = len(fingerprints)
+    parent = list(range(n))
+    bands = min(max_distance + 1, FINGERPRINT_BITS)
+    # Bant genişlikleri neredeyse eşit: ilk FINGERPRINT_BITS % bands bant bir bit daha geniş
+    base, extra = divmod(FINGERPRINT_BITS, bands)
+    widths = [base + 1 if band < extra else base for band in range(bands)]
+    shifts = [sum(widths[:band]) for band in range(bands)]
+    masks = [(1 << width) - 1 for width in widths]
+
+    for shift, mask in zip(shifts, masks):
+        buckets: Dict[int, List[int]] = defaultdict(list)
+        for idx, fp in enumerate(fingerprints):
+            if fp is not None:
+                buckets[fp >> shift & mask].append(idx)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    a, b = members[x], members[y]
+                    ra, rb = _find(parent, a), _find(parent, b)
+                    if ra != rb and hamming(fingerprints[a], fingerprints[b]) <= max_distance:
+                        parent[max(ra, rb)] = min(ra, rb)
+
+    return [_find(parent, idx) for idx in range(n)]
+
+
+def duplicate_groups(representatives: List[int]) -> List[List[int]]:
+    """group_duplicates çıktısından en az iki üyeli grupları (temsilci ilk sırada) döndürür."""
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for idx, rep in enumerate(representatives):
+        groups[rep].append(idx)
+    return [members for members in groups.values() if len(members) > 1]
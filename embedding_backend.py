@@ -0,0 +1,161 @@
+"""Cümle gömme modeli için seçilebilir CPU çalıştırma altyapısı.
+
+torch: SentenceTransformer (fp32, varsayılan ve referans).
+onnx / onnx-int8: Transformer gövdesi bir kez ONNX'e aktarılır (onnx-int8'de ağırlıklar dinamik int8
+nicemlenir) ve ONNX Runtime ile çalıştırılır; havuzlama ve normalizasyon numpy'da yapılır.
+ONNX Runtime kurulu değilse torch'a dönülür.
+"""
+
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+
+from cache_store import cache_path
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_AVAILABLE = importlib.util.find_spec("onnxruntime") is not None
+# Çıkarım iş parçacığı sayısı; 0 = çalışma zamanının varsayılanı
+EMBEDDING_THREADS = int(os.environ.get("CV_EMBEDDING_THREADS", "0"))
+ONNX_OPSET = 14
+
+
+def resolve_backend(name: Optional[str]) -> str:
+    """İstenen altyapıyı doğrular; ONNX Runtime yoksa torch döndürür."""
+    backend = (name or "torch").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Bilinmeyen gömme altyapısı: {backend} (seçenekler: {', '.join(BACKENDS)})")
+    if backend != "torch" and not ONNX_AVAILABLE:
+        logger.warning("⚠️ onnxruntime bulunamadı, gömmeler PyTorch ile hesaplanacak")
+        return "torch"
+    return backend
+
+
+EMBEDDING_BACKEND = resolve_backend(os.environ.get("CV_EMBEDDING_BACKEND", "torch"))
+
+
+def backend_model_name(model_name: str, backend: str) -> str:
+    """Önbellek ve indeks anahtarlarında kullanılan ad; torch dışı altyapıların gömmeleri ayrı tutulur."""
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def onnx_model_dir(model_name: str) -> str:
+    return os.environ.get("CV_ONNX_DIR") or cache_path(os.path.join("onnx", model_name.replace("/", "__")))
+
+
+def export_onnx(model_name: str, out_dir: str) -> None:
+    """
+    SentenceTransformer'ın transformer gövdesini out_dir/model.onnx olarak aktarır, int8 nicemlenmiş
+    kopyasını model_int8.onnx olarak yazar; tokenizer ve havuzlama ayarları da yanına kaydedilir.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    sample = tokenizer(["örnek metin"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class _TokenEmbeddings(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_dir)), exist_ok=True)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(out_dir)))
+    try:
+        fp32_path = os.path.join(staging, "model.onnx")
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]}
+        with torch.no_grad():
+            torch.onnx.export(_TokenEmbeddings(transformer), tuple(sample[name] for name in input_names), fp32_path,
+                              input_names=input_names, output_names=["token_embeddings"], dynamic_axes=dynamic_axes,
+                              opset_version=ONNX_OPSET, dynamo=False)
+        quantize_dynamic(fp32_path, os.path.join(staging, "model_int8.onnx"), weight_type=QuantType.QInt8)
+        tokenizer.save_pretrained(staging)
+        pooling = st_model[1].get_config_dict() if len(st_model) > 1 else {}
+        with open(os.path.join(staging, "embedding.json"), "w", encoding="utf-8") as f:
+            json.dump({"model": model_name, "max_seq_length": st_model.max_seq_length, "pooling": pooling}, f)
+        # Yarım kalmış bir aktarım kullanılmasın diye dizin tamamlandıktan sonra yerine taşınır
+        if os.path.isdir(out_dir):
+            shutil.rmtree(out_dir)
+        os.replace(staging, out_dir)
+    finally:
+        if os.path.isdir(staging):
+            shutil.rmtree(staging)
+    logger.info("ONNX modeli aktarıldı: %s", out_dir)
+
+
+class OnnxEmbedder:
+    """SentenceTransformer.encode arayüzüyle ONNX Runtime üzerinde cümle gömmeleri (ortalama ya da CLS havuzlama)."""
+
+    def __init__(self, model_dir: str, quantized: bool = True, threads: int = EMBEDDING_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, "embedding.json"), encoding="utf-8") as f:
+            config = json.load(f)
+        self.max_seq_length = config["max_seq_length"]
+        self.cls_pooling = bool(config.get("pooling", {}).get("pooling_mode_cls_token"))
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        model_file = "model_int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(os.path.join(model_dir, model_file), options,
+                                            providers=["CPUExecutionProvider"])
+        self._input_names = {node.name for node in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+
+    def encode(self, sentences: List[str], batch_size: int = 32, normalize_embeddings: bool = False,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        result = np.zeros((len(sentences), self._dimension), dtype=np.float32)
+        # Benzer uzunluktaki metinler aynı partiye girsin diye (dolgu azalır) uzunluğa göre sıralanır
+        order = np.argsort([-len(text) for text in sentences], kind="stable")
+        for start in range(0, len(sentences), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = self.tokenizer([sentences[i] for i in batch], padding=True, truncation=True,
+                                     max_length=self.max_seq_length, return_tensors="np")
+            feeds = {name: value.astype(np.int64) for name, value in encoded.items() if name in self._input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+            if self.cls_pooling:
+                result[batch] = token_embeddings[:, 0]
+                continue
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            result[batch] = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if normalize_embeddings:
+            result /= np.clip(np.linalg.norm(result, axis=1, keepdims=True), 1e-12, None)
+        return result
+
+
+def load_embedder(model_name: str, backend: str = EMBEDDING_BACKEND, threads: int = EMBEDDING_THREADS):
+    """Seçilen altyapı için encode() sunan gömme modelini yükler (ONNX modeli yoksa önce aktarılır)."""
+    if backend == "torch":
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+
+    model_dir = onnx_model_dir(model_name)
+    if not os.path.exists(os.path.join(model_dir, "embedding.json")):
+        export_onnx(model_name, model_dir)
+    return OnnxEmbedder(model_dir, quantized=backend == "onnx-int8", threads=threads)
@@ -0,0 +1,117 @@
+"""SBERT gömmeleri için içerik özetli (SHA-256) kalıcı önbellek."""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+from cache_store import SqliteBlobStore, cache_path
+
+logger = logging.getLogger(__name__)
+
+MEMORY_MAX_ITEMS = int(os.environ.get("CV_EMBEDDING_MEMORY_ITEMS", "8192"))
+DISK_MAX_BYTES = int(os.environ.get("CV_EMBEDDING_DISK_MB", "512")) * 1024 * 1024
+
+
+def text_digest(text: str) -> str:
+    """Metnin SHA-256 özetini döndürür."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    (model adı, metin özeti) anahtarlı gömme önbelleği.
+
+    Önde süreç içi bir LRU, arkada boyut sınırlı SQLite deposu bulunur. Gömmeler
+    normalize edilmiş float32 vektörler olarak saklanır.
+    """
+
+    def __init__(self, model_name: str, path: str = None,
+                 max_memory_items: int = MEMORY_MAX_ITEMS, max_disk_bytes: int = DISK_MAX_BYTES):
+        self.model_name = model_name
+        self.max_memory_items = max_memory_items
+        self._path = path
+        self._max_disk_bytes = max_disk_bytes
+        self._store = None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def store(self) -> SqliteBlobStore:
+        if self._store is None:
+            self._store = SqliteBlobStore(self._path or cache_path("embeddings.sqlite"), self._max_disk_bytes)
+        return self._store
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}:{text_digest(text)}"
+
+    def get_many(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Önbellekte bulunan metinlerin gömmelerini döndürür."""
+        found = {}
+        disk_lookup = {}
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                key = self._key(text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[text] = vector
+                else:
+                    disk_lookup[key] = text
+            self.memory_hits += len(found)
+
+        if disk_lookup:
+            try:
+                blobs = self.store.get_many(disk_lookup.keys())
+            except Exception as e:
+                logger.warning("⚠️ Gömme önbelleği okunamadı: %s", e)
+                blobs = {}
+            with self._lock:
+                for key, blob in blobs.items():
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[disk_lookup[key]] = vector
+                    self._remember(key, vector)
+                self.disk_hits += len(blobs)
+                self.misses += len(disk_lookup) - len(blobs)
+        return found
+
+    def put_many(self, embeddings: Dict[str, np.ndarray]) -> None:
+        """Yeni hesaplanan gömmeleri bellek ve diske yazar."""
+        items = []
+        with self._lock:
+            for text, vector in embeddings.items():
+                key = self._key(text)
+                vector = np.ascontiguousarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                items.append((key, vector.tobytes()))
+        try:
+            self.store.put_many(items)
+        except Exception as e:
+            logger.warning("⚠️ Gömme önbelleğine yazılamadı: %s", e)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """İsabet/ıska sayaçlarını döndürür."""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_items": len(self._memory),
+            "disk_evictions": self._store.evictions if self._store else 0,
+        }
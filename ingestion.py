@@ -0,0 +1,354 @@
+"""Birden fazla CV'nin süreç havuzuyla paralel ayrıştırılması.
+
+Kaynaklar dosya yolu ya da bellekteki yüklemeler için (ad, PDF baytları / memoryview) çiftleridir; bellekteki
+yüklemeler diske yazılmaz (sıralı çalışmada kopyalanmaz, süreç havuzuna bayt olarak gönderilir).
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 0 = otomatik (çekirdek sayısı); 1 = sıralı çalışma
+INGEST_WORKERS = int(os.environ.get("CV_INGEST_WORKERS", "0"))
+
+# Toplu işin süresi (saniye, 0 = sınırsız); dolunca kalan belgeler kısmen ya da hiç okunmadan "truncated" döner.
+# Belge başına süre ve sayfa bütçeleri cv_parser'dadır (CV_DOC_DEADLINE_SECONDS, CV_OCR_MAX_PAGES).
+BATCH_DEADLINE_SECONDS = float(os.environ.get("CV_BATCH_DEADLINE_SECONDS", "0"))
+
+# Dosya yolu ya da (ad, bytes / memoryview) bellekteki yükleme
+Source = Union[str, Tuple[str, Any]]
+
+# İsteğe bağlı denetim kopyaları: ayarlanırsa yüklemeler bu dizine yazılır ve saklama süresi dolunca silinir
+AUDIT_DIR = os.environ.get("CV_AUDIT_DIR", "")
+AUDIT_RETENTION_DAYS = float(os.environ.get("CV_AUDIT_RETENTION_DAYS", "30"))
+# Dizinde tutulacak en fazla dosya (0 = sınırsız); fazlası en eskiden başlayarak silinir
+AUDIT_MAX_FILES = int(os.environ.get("CV_AUDIT_MAX_FILES", "0"))
+
+
+def default_workers(num_files: int) -> int:
+    """Dosya sayısı ve yapılandırmaya göre işçi sayısını belirler."""
+    configured = INGEST_WORKERS or (os.cpu_count() or 1)
+    return max(1, min(configured, num_files))
+
+
+def prune_audit_dir(audit_dir: str = AUDIT_DIR) -> int:
+    """Saklama süresini aşan ya da AUDIT_MAX_FILES'ı aşan (en eski) denetim kopyalarını siler; silinen sayısı döner."""
+    if not audit_dir or not os.path.isdir(audit_dir):
+        return 0
+    entries = sorted((entry for entry in os.scandir(audit_dir) if entry.is_file()), key=lambda e: e.stat().st_mtime)
+    cutoff = time.time() - AUDIT_RETENTION_DAYS * 86400
+    expired = [e for e in entries if e.stat().st_mtime < cutoff]
+    kept = len(entries) - len(expired)
+    if AUDIT_MAX_FILES and kept > AUDIT_MAX_FILES:
+        expired += [e for e in entries if e.stat().st_mtime >= cutoff][:kept - AUDIT_MAX_FILES]
+    removed = 0
+    for entry in expired:
+        try:
+            os.remove(entry.path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def audit_upload(name: str, data, digest: str, audit_dir: str = AUDIT_DIR) -> Optional[str]:
+    """
+    Bellekteki yüklemenin denetim kopyasını audit_dir'e yazar (ayarlı değilse hiçbir şey yapmaz) ve eski
+    kopyaları temizler. Aynı içerik (özet) bir kez yazılır; yazılan dosyanın yolu döner.
+    """
+    if not audit_dir:
+        return None
+    os.makedirs(audit_dir, exist_ok=True)
+    path = os.path.join(audit_dir, f"{digest[:16]}_{os.path.basename(name)}")
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    prune_audit_dir(audit_dir)
+    return path
+
+
+def _init_worker(torch_threads: int) -> None:
+    """Her işçide spaCy modelini bir kez yükler ve iş parçacığı sayısını sınırlar (OCR gerekirse yüklenir)."""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    from instrumentation import configure_logging
+    from data_extractor import get_nlp
+    configure_logging()
+    get_nlp()
+
+
+def _describe(source: Source) -> Dict[str, Any]:
+    """Sonuç kaydının path ve name alanları; bellekteki yüklemelerin yolu yoktur."""
+    if isinstance(source, tuple):
+        return {"path": None, "name": source[0]}
+    return {"path": source, "name": os.path.basename(source)}
+
+
+def _pdf(source: Source):
+    return source[1] if isinstance(source, tuple) else source
+
+
+def _portable(source: Source) -> Source:
+    """Süreç havuzuna gönderilebilir kaynak (memoryview süreçler arasında taşınamaz, baytlara çevrilir)."""
+    if isinstance(source, tuple) and not isinstance(source[1], bytes):
+        return source[0], bytes(source[1])
+    return source
+
+
+def _failed(source: Source, error: str, seconds: float = 0.0) -> Dict[str, Any]:
+    return {**_describe(source), "record": None, "error": error, "seconds": seconds, "truncated": False}
+
+
+def _expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.time() >= deadline
+
+
+def _no_text_error(deadline: Optional[float]) -> str:
+    return "Süre doldu, PDF'den metin çıkarılamadı" if _expired(deadline) else "PDF'den metin çıkarılamadı"
+
+
+def _ingest_one(source: Source, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Tek bir PDF'i işler; hatalar sonucu düşürmez, kayıt içinde döner."""
+    from parse_cache import analyze_pdf
+
+    started = time.perf_counter()
+    result = {**_describe(source), "record": None, "error": None, "truncated": False}
+    try:
+        result["record"] = analyze_pdf(_pdf(source), deadline=deadline)
+        if result["record"] is None:
+            result["error"] = _no_text_error(deadline)
+            result["truncated"] = _expired(deadline)
+        else:
+            result["truncated"] = bool(result["record"].get("truncated"))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def _extract_one(source: Source, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Tekrar tespiti için ilk aşama: yalnızca metin çıkarma ve parmak izi."""
+    from dedup import simhash
+    from parse_cache import extract_pdf_text
+
+    started = time.perf_counter()
+    result = {**_describe(source), "record": None, "error": None,
+              "sha256": None, "raw_text": None, "truncated": False, "fingerprint": None}
+    try:
+        extracted = extract_pdf_text(_pdf(source), deadline=deadline)
+        result.update(extracted)
+        result["fingerprint"] = simhash(extracted["raw_text"]) if extracted["raw_text"] else None
+        if not extracted["raw_text"]:
+            result["error"] = _no_text_error(deadline)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def _analyze_one(job: Tuple[Source, str, str, bool]) -> Dict[str, Any]:
+    """İkinci aşama: metni çıkarılmış PDF'in bölüm ayrıştırması ve NER işlemi (PDF yeniden okunmaz)."""
+    from parse_cache import analyze_pdf
+
+    source, pdf_sha, raw_text, truncated = job
+    started = time.perf_counter()
+    result = {**_describe(source), "record": None, "error": None}
+    try:
+        result["record"] = analyze_pdf(_pdf(source), raw_text=raw_text, pdf_sha=pdf_sha, truncated=truncated)
+        if result["record"] is None:
+            result["error"] = "CV bölümleri ayrıştırılamadı"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+class _ProcessPool:
+    """
+    Süreç havuzu; bir işçi çöküp (segfault, OOM) havuzu bozduğunda (BrokenProcessPool) yeniden kurulabilir.
+    """
+
+    def __init__(self, workers: int, torch_threads: int):
+        self._workers = workers
+        self._torch_threads = torch_threads
+        self._pool = self._create()
+
+    def _create(self) -> ProcessPoolExecutor:
+        # fork, yüklü torch/OCR iş parçacıklarıyla güvenli değil; spawn kullan
+        context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(max_workers=self._workers, mp_context=context,
+                                   initializer=_init_worker, initargs=(self._torch_threads,))
+
+    def submit(self, func: Callable, job: Any):
+        return self._pool.submit(func, job)
+
+    def restart(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._create()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
+
+
+@contextmanager
+def _executor(workers: int):
+    """workers > 1 ise süreç havuzu, aksi halde None (sıralı çalışma) verir."""
+    if workers <= 1:
+        yield None
+        return
+    pool = _ProcessPool(workers, max(1, (os.cpu_count() or 1) // workers))
+    try:
+        yield pool
+    finally:
+        pool.shutdown()
+
+
+def _imap(pool: Optional[_ProcessPool], func: Callable, jobs: List[Any],
+          sources: List[Source]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    func'u işlere uygular ve (sıra, sonuç) çiftlerini bittikçe üretir; çöken işçi yalnızca kendi dosyasını etkiler.
+
+    Bir işçi süreci çöktüğünde havuz yeniden kurulur ve bitmemiş işler yeniden gönderilir. İki çökme
+    sırasında bitmemiş olan işler (çökertenin de aralarında olduğu) tek başına çalıştırılır; tek başına
+    havuzu çökerten iş hata kaydıyla döner.
+    """
+    if pool is None:
+        for idx, job in enumerate(jobs):
+            yield idx, func(job)
+        return
+
+    remaining = dict(enumerate(jobs))
+    crashes: Dict[int, int] = {}
+    while remaining:
+        for idx in [i for i in remaining if crashes.get(i, 0) >= 2]:
+            try:
+                result = pool.submit(func, remaining[idx]).result()
+            except BrokenProcessPool as e:
+                pool.restart()
+                result = _failed(sources[idx], f"İşçi süreci çöktü: {e}")
+            except Exception as e:
+                result = _failed(sources[idx], f"{type(e).__name__}: {e}")
+            del remaining[idx]
+            yield idx, result
+
+        futures = {pool.submit(func, job): idx for idx, job in remaining.items()}
+        broken = False
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                broken = True
+                crashes[idx] = crashes.get(idx, 0) + 1
+                continue
+            except Exception as e:
+                result = _failed(sources[idx], f"{type(e).__name__}: {e}")
+            del remaining[idx]
+            yield idx, result
+        if broken:
+            logger.warning("⚠️ Bir işçi süreci çöktü; havuz yeniden kuruluyor, %d iş yeniden gönderiliyor", len(remaining))
+            pool.restart()
+
+
+def iter_ingest(sources: List[Source], workers: Optional[int] = None, dedup: bool = False,
+                deadline: Optional[float] = None) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+    """
+    PDF'leri işler ve (aşama, sıra, sonuç) olaylarını bittikçe üretir.
+
+    Aşama "done" ise sonuç son halidir (path, name, record, error, seconds, truncated, duplicate_of,
+    duplicate_index). deadline (time.time(); verilmezse BATCH_DEADLINE_SECONDS ayarlıysa şimdiden o kadar
+    sonrası) geçince metin çıkarma kesilir: sürmekte olan belgeler o ana kadarki metinle truncated=True
+    döner, başlamamış belgeler önbellekte yoksa okunmaz.
+    dedup=True ise önce her dosya için "text" olayı (metin çıkarıldı) gelir; ardından neredeyse aynı CV'ler
+    SimHash ile gruplanır ve bölüm ayrıştırma ve NER yalnızca grup temsilcileri için yapılır. Tekrarlar
+    temsilcinin kaydını paylaşır; duplicate_of temsilcinin yolunu (bellekteki yüklemelerde adını),
+    duplicate_index sırasını taşır.
+    """
+    total = len(sources)
+    workers = default_workers(total) if workers is None else max(1, min(workers, total or 1))
+    if deadline is None and BATCH_DEADLINE_SECONDS > 0:
+        deadline = time.time() + BATCH_DEADLINE_SECONDS
+
+    with _executor(workers) as pool:
+        jobs = sources if pool is None else [_portable(source) for source in sources]
+        if not dedup:
+            for idx, result in _imap(pool, partial(_ingest_one, deadline=deadline), jobs, sources):
+                result.update(duplicate_of=None, duplicate_index=None)
+                yield "done", idx, result
+            return
+
+        from dedup import group_duplicates
+
+        extracted: List[Optional[Dict[str, Any]]] = [None] * total
+        for idx, result in _imap(pool, partial(_extract_one, deadline=deadline), jobs, sources):
+            extracted[idx] = result
+            yield "text", idx, result
+        representatives = group_duplicates([r["fingerprint"] for r in extracted])
+        results = [{"path": r["path"], "name": r["name"], "record": r["record"], "error": r["error"],
+                    "seconds": r["seconds"], "truncated": r["truncated"], "duplicate_of": None, "duplicate_index": None}
+                   for r in extracted]
+        duplicates_of: Dict[int, List[int]] = {}
+        for idx, rep in enumerate(representatives):
+            if rep != idx:
+                duplicates_of.setdefault(rep, []).append(idx)
+
+        def finish(rep: int):
+            yield "done", rep, results[rep]
+            for idx in duplicates_of.get(rep, []):
+                results[idx].update(record=results[rep]["record"], error=results[rep]["error"],
+                                    truncated=results[rep]["truncated"], duplicate_of=results[rep]["path"] or results[rep]["name"], duplicate_index=rep)
+                yield "done", idx, results[idx]
+
+        todo = [idx for idx, r in enumerate(extracted)
+                if representatives[idx] == idx and r["record"] is None and not r["error"]]
+        for idx in range(total):
+            if representatives[idx] == idx and idx not in todo:
+                yield from finish(idx)
+        # Metni çıkarılmış bellekteki yüklemelerin baytları yeniden gönderilmez
+        analyze_jobs = [((sources[idx][0], None) if isinstance(sources[idx], tuple) else sources[idx],
+                         extracted[idx]["sha256"], extracted[idx]["raw_text"], extracted[idx]["truncated"])
+                        for idx in todo]
+        for k, result in _imap(pool, _analyze_one, analyze_jobs, [sources[idx] for idx in todo]):
+            idx = todo[k]
+            results[idx].update(record=result["record"], error=result["error"],
+                                seconds=results[idx]["seconds"] + result["seconds"])
+            yield from finish(idx)
+
+
+def ingest_files(sources: List[Source], workers: Optional[int] = None,
+                 progress: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+                 dedup: bool = False, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    PDF'leri ayrıştırır ve yapılandırılmış veriyi çıkarır.
+
+    workers > 1 ise dosyalar süreç havuzuna dağıtılır, aksi halde sıralı işlenir. Sonuçlar giriş sırasıyla
+    döner; her biri path, name, record, error, seconds, truncated ve duplicate_of alanlarını içerir. progress(bitmiş,
+    toplam, sonuç) her dosya bittiğinde çağrılır; dedup=True ise (bkz. iter_ingest) metin çıkarma aşamasını izler.
+    """
+    total = len(sources)
+    results: List[Optional[Dict[str, Any]]] = [None] * total
+    progress_stage = "text" if dedup else "done"
+    done = 0
+    for stage, idx, result in iter_ingest(sources, workers=workers, dedup=dedup, deadline=deadline):
+        if stage == "done":
+            results[idx] = result
+        if stage == progress_stage:
+            done += 1
+            if progress:
+                progress(done, total, result)
+    return results
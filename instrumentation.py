@@ -0,0 +1,159 @@
+"""Aşama süreleri, sayaçlar ve günlükleme için hafif ölçüm katmanı.
+
+CV_METRICS=1 ile açılır. Kapalıyken span() paylaşılan boş bir bağlam döndürür, incr()/observe() hemen döner.
+CV_METRICS_FILE verilirse biten her aşama bu dosyaya bir JSON satırı olarak eklenir. Günlük seviyesi
+CV_LOG_LEVEL ile belirlenir (varsayılan INFO).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+METRICS_ENABLED = os.environ.get("CV_METRICS", "0") not in ("", "0")
+METRICS_FILE = os.environ.get("CV_METRICS_FILE")
+LOG_LEVEL = os.environ.get("CV_LOG_LEVEL", "INFO")
+
+_NULL_SPAN = nullcontext()
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+# ad -> {"count", "sum", "min", "max"}
+_summaries: Dict[str, Dict[str, float]] = {}
+_hooks: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """Giriş noktaları (app.py, komut satırı araçları) için kök günlükleyiciyi ayarlar."""
+    logging.basicConfig(level=(level or LOG_LEVEL).upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+def enable(enabled: bool = True) -> None:
+    """Ölçümü çalışma anında açar/kapatır (ör. kıyaslama betikleri için)."""
+    global METRICS_ENABLED
+    METRICS_ENABLED = enabled
+
+
+def _record(name: str, value: float) -> None:
+    with _lock:
+        summary = _summaries.get(name)
+        if summary is None:
+            _summaries[name] = {"count": 1, "sum": value, "min": value, "max": value}
+        else:
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["min"] = min(summary["min"], value)
+            summary["max"] = max(summary["max"], value)
+
+
+class _Span:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: str, labels: Dict[str, Any]):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        seconds = time.perf_counter() - self.started
+        _record(f"{self.name}_seconds", seconds)
+        if _hooks:
+            event = {"type": "span", "name": self.name, "seconds": round(seconds, 6), "ts": time.time(),
+                     "error": exc_type.__name__ if exc_type else None}
+            event.update(self.labels)
+            for hook in list(_hooks):
+                hook(event)
+        return False
+
+
+def span(name: str, **labels: Any):
+    """Bir aşamanın süresini ölçen bağlam yöneticisi: with span("ocr_page", page=3): ..."""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _Span(name, labels)
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Sayaç artırır (ör. ocr_pages, chars_extracted, parse_cache_hits)."""
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, value: float) -> None:
+    """Bir dağılıma değer ekler (ör. encode_batch_size)."""
+    if not METRICS_ENABLED:
+        return
+    _record(name, value)
+
+
+def snapshot() -> Dict[str, Any]:
+    """Sayaçların ve özetlerin (count/sum/min/max) kopyası."""
+    with _lock:
+        return {"counters": dict(_counters), "summaries": {k: dict(v) for k, v in _summaries.items()}}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _summaries.clear()
+
+
+def add_export_hook(hook: Callable[[Dict[str, Any]], None]) -> None:
+    """Biten her aşama için hook(olay sözlüğü) çağrılır."""
+    _hooks.append(hook)
+
+
+def remove_export_hook(hook: Callable[[Dict[str, Any]], None]) -> None:
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+class JsonLinesExporter:
+    """Olayları bir dosyaya JSON satırları olarak ekleyen dışa aktarım kancası."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def _metric_name(name: str) -> str:
+    return "cv_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def prometheus_text() -> str:
+    """Sayaçları ve özetleri Prometheus metin biçiminde döndürür."""
+    data = snapshot()
+    lines = []
+    for name, value in sorted(data["counters"].items()):
+        metric = _metric_name(name)
+        lines += [f"# TYPE {metric}_total counter", f"{metric}_total {value}"]
+    for name, summary in sorted(data["summaries"].items()):
+        metric = _metric_name(name)
+        lines += [f"# TYPE {metric} summary", f"{metric}_count {summary['count']}", f"{metric}_sum {summary['sum']}",
+                  f"# TYPE {metric}_max gauge", f"{metric}_max {summary['max']}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+if METRICS_FILE:
+    add_export_hook(JsonLinesExporter(METRICS_FILE))
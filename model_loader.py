@@ -0,0 +1,66 @@
+"""Ağır modellerin ilk kullanımda, iş parçacığı güvenli biçimde yüklenmesi."""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_REGISTRY: List["LazyModel"] = []
+
+
+class LazyModel:
+    """
+    Bir modeli ilk get() çağrısında bir kez yükler ve süreç boyunca paylaşır.
+
+    Yükleme başarısız olursa hata günlüğe yazılır, None döner ve tekrar denenmez.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._model = None
+        self._attempted = False
+        self.load_seconds: Optional[float] = None
+        _REGISTRY.append(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._attempted and self._model is not None
+
+    def get(self) -> Any:
+        if self._attempted:
+            return self._model
+        with self._lock:
+            if not self._attempted:
+                started = time.perf_counter()
+                try:
+                    self._model = self._loader()
+                except Exception as e:
+                    logger.error("⚠️ %s yüklenemedi: %s", self.name, e)
+                    self._model = None
+                self.load_seconds = time.perf_counter() - started
+                logger.info("⏱️ %s yükleme süresi: %.2f sn", self.name, self.load_seconds)
+                self._attempted = True
+        return self._model
+
+
+def load_times() -> Dict[str, Optional[float]]:
+    """Model adı -> yükleme süresi (saniye; henüz yüklenmediyse None)."""
+    return {model.name: model.load_seconds for model in _REGISTRY}
+
+
+def warm_up(getters: List[Callable[[], Any]], background: bool = True) -> Optional[threading.Thread]:
+    """Verilen modelleri önceden yükler; background=True ise arka plan iş parçacığında."""
+    def run():
+        for getter in getters:
+            getter()
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
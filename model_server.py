@@ -0,0 +1,425 @@
+"""Modelleri tek süreçte barındıran yerel çıkarım sunucusu ve istemci vekilleri.
+
+Sunucu SBERT, spaCy ve EasyOCR modellerini bir kez yükler; Streamlit oturumları ve ingestion işçileri
+modelleri kendileri yüklemek yerine multiprocessing.connection üzerinden (Unix soketi ya da localhost TCP)
+bu sunucuya bağlanır. Aynı anda gelen encode ve NER istekleri kısa bir bekleme penceresinde birleştirilip
+tek model çağrısıyla (mikro yığın) işlenir.
+
+    python model_server.py                          # <CV_CACHE_DIR>/model_server.sock
+    python model_server.py --address 127.0.0.1:8765 --models encode ner
+
+İstemci tarafı CV_MODEL_SERVER ile açılır (adres; "1" = varsayılan adres). Sunucuya ulaşılamazsa modeller
+eskisi gibi süreç içinde yüklenir.
+
+Bağlantılar pickle taşıdığından kimlik doğrulaması zorunludur: CV_MODEL_SERVER_AUTHKEY ayarlı değilse sunucu
+her açılışta rastgele bir anahtar üretir ve adresin yanındaki yalnızca sahibinin okuyabildiği (0600)
+"<adres>.key" dosyasına yazar; aynı kullanıcının istemcileri anahtarı oradan okur.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import secrets
+import signal
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from cache_store import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Unix soketi yalnızca dosya izinleriyle erişilebilir; Windows'ta localhost TCP kullanılır
+DEFAULT_ADDRESS = os.path.join(CACHE_DIR, "model_server.sock") if os.name != "nt" else "127.0.0.1:8765"
+
+# İstemci: sunucu adresi ("host:port" ya da Unix soketi yolu; boş = kapalı, "1" = DEFAULT_ADDRESS)
+MODEL_SERVER = os.environ.get("CV_MODEL_SERVER", "")
+# Ortak anahtar; boşsa sunucu açılışta rastgele üretir ve authkey_path(adres) dosyasına yazar
+MODEL_SERVER_AUTHKEY = os.environ.get("CV_MODEL_SERVER_AUTHKEY", "").encode("utf-8")
+
+# Sunucu: bir mikro yığın için ilk istekten sonra en fazla bekleme (ms) ve en fazla girdi sayısı
+BATCH_WAIT_MS = float(os.environ.get("CV_MODEL_SERVER_BATCH_MS", "10"))
+BATCH_MAX_ITEMS = int(os.environ.get("CV_MODEL_SERVER_BATCH_ITEMS", "256"))
+
+MODEL_KINDS = ("encode", "ner", "ocr")
+
+# Sunucu süreci kendi modellerini yerel yükler (CV_MODEL_SERVER ayarlı olsa bile)
+_SERVING = False
+
+# Sunucu sayaçları: istekler, model çağrıları (mikro yığınlar) ve işlenen girdiler
+SERVER_STATS = {"requests": 0, "batches": 0, "items": 0}
+
+# NER sonucu: spaCy Doc/Span yerine data_extractor'ın kullandığı alanlar (ents, text, label_)
+Entity = namedtuple("Entity", "text label_")
+RemoteDoc = namedtuple("RemoteDoc", "ents")
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """"host:port" -> (host, port); diğer değerler Unix soketi yolu sayılır."""
+    if address == "1":
+        address = DEFAULT_ADDRESS
+    host, sep, port = address.rpartition(":")
+    if sep and host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def authkey_path(address: str) -> str:
+    """Sunucunun ürettiği anahtarın dosyası: soketin yanında, TCP adresleri için önbellek dizininde."""
+    parsed = parse_address(address)
+    if isinstance(parsed, str):
+        return parsed + ".key"
+    host, port = parsed
+    return os.path.join(CACHE_DIR, f"model_server-{host}-{port}.key")
+
+
+def load_authkey(address: str) -> bytes:
+    """CV_MODEL_SERVER_AUTHKEY ya da sunucunun bu adres için yazdığı anahtar (yoksa FileNotFoundError)."""
+    if MODEL_SERVER_AUTHKEY:
+        return MODEL_SERVER_AUTHKEY
+    with open(authkey_path(address), "rb") as f:
+        return f.read()
+
+
+def _write_authkey(path: str, key: bytes) -> None:
+    """Anahtarı baştan 0600 izinle oluşturulan yeni bir dosyaya yazar."""
+    if os.path.exists(path):
+        os.remove(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+
+
+def client_enabled() -> bool:
+    return bool(MODEL_SERVER) and not _SERVING
+
+
+# --- Sunucu ---
+
+class MicroBatcher:
+    """
+    Eşzamanlı istekleri tek model çağrısında birleştirir.
+
+    İlk istek geldikten sonra en fazla max_wait saniye ya da max_items girdiye ulaşılana kadar gelen
+    istekler aynı yığına alınır; func tüm girdilere bir kez uygulanır ve sonuç isteklere bölünür.
+    """
+
+    def __init__(self, name: str, func: Callable[[List[Any]], Any], max_wait: float = BATCH_WAIT_MS / 1000,
+                 max_items: int = BATCH_MAX_ITEMS):
+        self.name = name
+        self._func = func
+        self._max_wait = max_wait
+        self._max_items = max_items
+        self._queue: "queue.Queue[Tuple[List[Any], Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"batch-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, items: List[Any]) -> Future:
+        future: Future = Future()
+        self._queue.put((items, future))
+        return future
+
+    def _collect(self) -> List[Tuple[List[Any], Future]]:
+        batch = [self._queue.get()]
+        count = len(batch[0][0])
+        deadline = time.monotonic() + self._max_wait
+        while count < self._max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            count += len(request[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            items = [item for request, _ in batch for item in request]
+            try:
+                results = self._func(items) if items else []
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            SERVER_STATS["batches"] += 1
+            SERVER_STATS["items"] += len(items)
+            logger.debug("%s: %d istek, %d girdi tek yığında", self.name, len(batch), len(items))
+            start = 0
+            for request, future in batch:
+                future.set_result(results[start:start + len(request)])
+                start += len(request)
+
+
+def _encode_batch(texts: List[str]):
+    """Yığındaki benzersiz metinleri bir kez kodlar (normalize edilmiş float32 gömmeler)."""
+    import numpy as np
+    from comparison_engine import ENCODE_BATCH_SIZE, get_semantic_model
+
+    model = get_semantic_model()
+    if model is None:
+        raise RuntimeError("SBERT modeli sunucuda yüklenemedi")
+    unique = list(dict.fromkeys(texts))
+    embeddings = np.asarray(model.encode(unique, batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True,
+                                         convert_to_numpy=True), dtype=np.float32)
+    row_of = {text: k for k, text in enumerate(unique)}
+    return embeddings[[row_of[t] for t in texts]]
+
+
+def _ner_batch(texts: List[str]) -> List[List[Tuple[str, str]]]:
+    from data_extractor import NLP_BATCH_SIZE, get_nlp
+
+    nlp = get_nlp()
+    if nlp is None:
+        raise RuntimeError("spaCy modeli sunucuda yüklenemedi")
+    return [[(ent.text, ent.label_) for ent in doc.ents] for doc in nlp.pipe(texts, batch_size=NLP_BATCH_SIZE)]
+
+
+def _ocr_image(image) -> str:
+    import cv_parser
+
+    reader = cv_parser.get_ocr_reader()
+    if reader is None:
+        raise RuntimeError("EasyOCR sunucuda yüklenemedi")
+    return cv_parser._read_image(reader, image)
+
+
+def _info(kinds: List[str]) -> Dict[str, Any]:
+    info = {"pid": os.getpid(), "models": list(kinds)}
+    if "encode" in kinds:
+        from comparison_engine import EMBEDDING_MODEL_KEY
+        info["embedding_model_key"] = EMBEDDING_MODEL_KEY
+    return info
+
+
+def _handlers(kinds: List[str]) -> Dict[str, Callable[[Any], Any]]:
+    handlers: Dict[str, Callable[[Any], Any]] = {
+        "info": lambda _: _info(kinds),
+        "stats": lambda _: dict(SERVER_STATS),
+    }
+    if "encode" in kinds:
+        encoder = MicroBatcher("encode", _encode_batch)
+        handlers["encode"] = lambda texts: encoder.submit(texts).result()
+    if "ner" in kinds:
+        ner = MicroBatcher("ner", _ner_batch)
+        handlers["ner"] = lambda texts: ner.submit(texts).result()
+    if "ocr" in kinds:
+        # EasyOCR sayfa başına çalışır (farklı boyutlu görüntüler yığınlanamaz); eşzamanlı istekler iş parçacıklarında yürür
+        handlers["ocr"] = _ocr_image
+    return handlers
+
+
+def _serve_connection(conn, handlers: Dict[str, Callable[[Any], Any]]) -> None:
+    """Bir istemci bağlantısındaki (işlem, veri) isteklerini sırayla yanıtlar."""
+    with conn:
+        while True:
+            try:
+                op, payload = conn.recv()
+            except (EOFError, OSError):
+                return
+            SERVER_STATS["requests"] += 1
+            handler = handlers.get(op)
+            try:
+                if handler is None:
+                    raise ValueError(f"Bilinmeyen işlem: {op}")
+                response = ("ok", handler(payload))
+            except Exception as e:
+                response = ("error", f"{type(e).__name__}: {e}")
+            try:
+                conn.send(response)
+            except (EOFError, OSError):
+                return
+
+
+def _preload(kinds: List[str]) -> None:
+    if "encode" in kinds:
+        from comparison_engine import get_semantic_model
+        get_semantic_model()
+    if "ner" in kinds:
+        from data_extractor import get_nlp
+        get_nlp()
+    if "ocr" in kinds:
+        import cv_parser
+        cv_parser.get_ocr_reader()
+
+
+def serve(address: str = DEFAULT_ADDRESS, kinds: Optional[List[str]] = None, preload: bool = True,
+          authkey: Optional[bytes] = None) -> None:
+    """
+    Sunucuyu başlatır ve bağlantıları kabul eder (her bağlantı ayrı iş parçacığında).
+
+    authkey verilmezse CV_MODEL_SERVER_AUTHKEY kullanılır; o da yoksa rastgele bir anahtar üretilip
+    authkey_path(address) dosyasına yazılır ve sunucu kapanınca silinir.
+    """
+    global _SERVING
+    _SERVING = True
+    kinds = list(kinds or MODEL_KINDS)
+    if preload:
+        _preload(kinds)
+    handlers = _handlers(kinds)
+    parsed = parse_address(address)
+    key_file = authkey_path(address)
+    if isinstance(parsed, str):
+        os.makedirs(os.path.dirname(parsed) or ".", exist_ok=True)
+        if os.path.exists(parsed):
+            os.remove(parsed)
+    authkey = authkey or MODEL_SERVER_AUTHKEY
+    if authkey:
+        # Eski bir açılıştan kalan üretilmiş anahtar istemcileri yanıltmasın
+        if os.path.exists(key_file):
+            os.remove(key_file)
+    else:
+        authkey = secrets.token_bytes(32)
+        os.makedirs(os.path.dirname(key_file) or ".", exist_ok=True)
+        _write_authkey(key_file, authkey)
+    try:
+        with Listener(parsed, authkey=authkey) as listener:
+            if isinstance(parsed, str):
+                os.chmod(parsed, 0o600)
+            logger.info("🚀 Model sunucusu hazır: %s (%s)", address, ", ".join(kinds))
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError, EOFError) as e:
+                    logger.warning("⚠️ Bağlantı reddedildi: %s", e)
+                    continue
+                threading.Thread(target=_serve_connection, args=(conn, handlers), daemon=True).start()
+    finally:
+        if os.path.exists(key_file):
+            os.remove(key_file)
+
+
+# --- İstemci ---
+
+class ModelClient:
+    """Sunucuya iş parçacığı başına bir bağlantı; kopan bağlantı bir kez yeniden kurulur."""
+
+    def __init__(self, address: str, authkey: Optional[bytes] = None):
+        self.address = address
+        self._address = parse_address(address)
+        self._authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Üretilmiş anahtar her bağlantıda yeniden okunur (sunucu yeniden başlamış olabilir)
+            conn = Client(self._address, authkey=self._authkey or load_authkey(self.address))
+            self._local.conn = conn
+        return conn
+
+    def call(self, op: str, payload: Any = None) -> Any:
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.send((op, payload))
+                status, result = conn.recv()
+                break
+            except (EOFError, OSError):
+                self._local.conn = None
+                if attempt:
+                    raise ConnectionError(f"Model sunucusuna ulaşılamadı: {self.address}")
+        if status == "error":
+            raise RuntimeError(f"Model sunucusu: {result}")
+        return result
+
+
+class RemoteEmbedder:
+    """SentenceTransformer.encode yerine geçer; gömmeler her zaman normalize edilmiş float32 döner."""
+
+    def __init__(self, client: ModelClient, info: Dict[str, Any]):
+        self.client = client
+        self.info = info
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = True,
+               convert_to_numpy: bool = True, **kwargs):
+        return self.client.call("encode", list(sentences))
+
+
+class RemoteNlp:
+    """spaCy nlp.pipe yerine geçer; belgeler yalnızca varlıkları (ents) taşır."""
+
+    def __init__(self, client: ModelClient, info: Dict[str, Any]):
+        self.client = client
+        self.info = info
+
+    def pipe(self, texts, batch_size: int = 64, **kwargs):
+        for ents in self.client.call("ner", list(texts)):
+            yield RemoteDoc([Entity(text, label) for text, label in ents])
+
+
+class RemoteReader:
+    """easyocr.Reader.readtext yerine geçer (detail=0, paragraph=True biçiminde)."""
+
+    def __init__(self, client: ModelClient, info: Dict[str, Any]):
+        self.client = client
+        self.info = info
+
+    def readtext(self, image, detail: int = 0, paragraph: bool = True, **kwargs) -> List[str]:
+        import numpy as np
+        return [self.client.call("ocr", np.ascontiguousarray(image))]
+
+
+_PROXIES = {"encode": RemoteEmbedder, "ner": RemoteNlp, "ocr": RemoteReader}
+_CLIENT: Optional[ModelClient] = None
+
+
+def get_client() -> ModelClient:
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = ModelClient(MODEL_SERVER)
+    return _CLIENT
+
+
+def remote_model(kind: str):
+    """
+    CV_MODEL_SERVER ayarlıysa sunucudaki modelin vekilini döndürür. Sunucu kapalıysa, ulaşılamıyorsa ya da
+    bu modeli barındırmıyorsa None döner (çağıran modeli yerel yükler).
+    """
+    if not client_enabled():
+        return None
+    try:
+        info = get_client().call("info")
+    except Exception as e:
+        logger.warning("⚠️ Model sunucusuna bağlanılamadı (%s), %s yerel yükleniyor: %s", MODEL_SERVER, kind, e)
+        return None
+    if kind not in info["models"]:
+        logger.warning("⚠️ Model sunucusu %s barındırmıyor, yerel yükleniyor", kind)
+        return None
+    logger.info("🔌 %s model sunucusundan kullanılıyor (%s, pid %s)", kind, MODEL_SERVER, info["pid"])
+    return _PROXIES[kind](get_client(), info)
+
+
+def main(argv=None) -> int:
+    from instrumentation import configure_logging
+
+    parser = argparse.ArgumentParser(description="SBERT, spaCy ve EasyOCR modellerini paylaşan yerel model sunucusu")
+    parser.add_argument("--address", default=MODEL_SERVER if MODEL_SERVER not in ("", "1") else DEFAULT_ADDRESS,
+                        help="host:port ya da Unix soketi yolu")
+    parser.add_argument("--models", nargs="+", choices=MODEL_KINDS, default=list(MODEL_KINDS))
+    parser.add_argument("--lazy", action="store_true", help="Modelleri ilk istekte yükle")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    # __main__ olarak çalışırken yükleyiciler model_server modülündeki _SERVING bayrağına bakar
+    import model_server
+    # SIGTERM ile durdurulurken de soket ve üretilmiş anahtar dosyası temizlensin
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        model_server.serve(args.address, args.models, preload=not args.lazy)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
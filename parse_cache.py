@@ -0,0 +1,181 @@
+"""PDF içerik özetine (SHA-256) dayalı ayrıştırma önbelleği."""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Any, List, Optional
+
+from cache_store import SqliteBlobStore, cache_path
+from cv_parser import (PARSER_VERSION, PDF_ENGINE, PdfSource, extract_text_budgeted, extract_sections_simple,
+                       read_source, source_label)
+from data_extractor import EXTRACTOR_VERSION, extract_structured_data, extract_structured_data_many
+from instrumentation import incr
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_MAX_BYTES = int(os.environ.get("CV_PARSE_CACHE_MB", "256")) * 1024 * 1024
+
+
+def _source_digest() -> str:
+    """Ayrıştırıcı ve çıkarıcı kaynak kodunun özetini döndürür; kod değişince önbellek geçersizleşir."""
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for filename in ("cv_parser.py", "data_extractor.py"):
+        try:
+            with open(os.path.join(root, filename), "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(filename.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+PIPELINE_VERSION = f"{PARSER_VERSION}-{PDF_ENGINE}+{EXTRACTOR_VERSION}+{_source_digest()}"
+
+
+def file_digest(pdf_bytes: bytes) -> str:
+    """PDF baytlarının SHA-256 özetini döndürür."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def source_digest(source: PdfSource) -> str:
+    """Dosya yolu ya da bellekteki PDF'in SHA-256 özeti; bellekteki veri kopyalanmadan özetlenir."""
+    data = read_source(source)
+    if isinstance(data, (str, os.PathLike)):
+        with open(data, "rb") as f:
+            data = f.read()
+    return file_digest(data)
+
+
+class ParseCache:
+    """
+    PDF özeti + hat sürümü anahtarlı önbellek.
+
+    Ham metin, extract_sections_simple çıktısı ve extract_structured_data çıktısı tek kayıt olarak saklanır.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = PARSE_CACHE_MAX_BYTES):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._store = None
+
+    @property
+    def store(self) -> SqliteBlobStore:
+        if self._store is None:
+            self._store = SqliteBlobStore(self._path or cache_path("parse.sqlite"), self._max_bytes)
+        return self._store
+
+    @staticmethod
+    def _key(pdf_sha: str) -> str:
+        return f"{PIPELINE_VERSION}:{pdf_sha}"
+
+    def get(self, pdf_sha: str) -> Optional[Dict[str, Any]]:
+        try:
+            blob = self.store.get(self._key(pdf_sha))
+        except Exception as e:
+            logger.warning("⚠️ Ayrıştırma önbelleği okunamadı: %s", e)
+            return None
+        incr("parse_cache_hits" if blob is not None else "parse_cache_misses")
+        return json.loads(blob.decode("utf-8")) if blob is not None else None
+
+    def put(self, pdf_sha: str, record: Dict[str, Any]) -> None:
+        try:
+            self.store.put(self._key(pdf_sha), json.dumps(record, ensure_ascii=False).encode("utf-8"))
+        except Exception as e:
+            logger.warning("⚠️ Ayrıştırma önbelleğine yazılamadı: %s", e)
+
+    def stats(self) -> Dict[str, int]:
+        return self._store.stats() if self._store else {"hits": 0, "misses": 0, "evictions": 0}
+
+
+PARSE_CACHE = ParseCache() if os.environ.get("CV_PARSE_CACHE", "1") != "0" else None
+
+
+def extract_pdf_text(pdf_path: PdfSource, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Yalnızca metin çıkarma aşaması (tekrar tespiti için): sha256, raw_text, truncated (bütçe dolduğu için
+    kısmen okundu) ve önbellekte varsa tam kayıt (record). deadline: time.time() cinsinden bitiş zamanı.
+    """
+    pdf_path = read_source(pdf_path)
+    pdf_sha = source_digest(pdf_path)
+    record = PARSE_CACHE.get(pdf_sha) if PARSE_CACHE is not None else None
+    if record is not None:
+        record["cached"] = True
+        return {"sha256": pdf_sha, "raw_text": record["raw_text"], "truncated": False, "record": record}
+    raw_text, truncated = extract_text_budgeted(pdf_path, deadline=deadline)
+    return {"sha256": pdf_sha, "raw_text": raw_text, "truncated": truncated, "record": None}
+
+
+def analyze_pdf(pdf_path: PdfSource, pdf_bytes: bytes = None, raw_text: str = None, pdf_sha: str = None,
+                truncated: bool = False, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    PDF'i ayrıştırır ve yapılandırılmış veriyi çıkarır; aynı içerik daha önce işlendiyse önbellekten döner.
+
+    pdf_path dosya yolu ya da bellekteki PDF olabilir (bkz. cv_parser.PdfSource).
+    raw_text ve pdf_sha önceden (extract_pdf_text ile) çıkarıldıysa PDF yeniden okunmaz; truncated o
+    metnin bütçe dolduğu için kısmen okunduğunu belirtir. deadline metin çıkarma için bitiş zamanıdır.
+    Dönen kayıt: sha256, raw_text, sections, structured, truncated ve cached alanları. Kısmen okunan
+    (truncated) kayıtlar önbelleğe yazılmaz.
+    """
+    if pdf_sha is None:
+        pdf_sha = file_digest(pdf_bytes) if pdf_bytes is not None else source_digest(pdf_path)
+
+    if PARSE_CACHE is not None:
+        record = PARSE_CACHE.get(pdf_sha)
+        if record is not None:
+            record["cached"] = True
+            return record
+
+    if raw_text is None:
+        raw_text, truncated = extract_text_budgeted(pdf_path, deadline=deadline)
+    if not raw_text:
+        return None
+    sections = extract_sections_simple(raw_text)
+    if not sections:
+        return None
+    record = {
+        "sha256": pdf_sha,
+        "raw_text": raw_text,
+        "sections": sections,
+        "structured": extract_structured_data(sections),
+        "truncated": truncated,
+    }
+    if PARSE_CACHE is not None and not truncated:
+        PARSE_CACHE.put(pdf_sha, record)
+    record["cached"] = False
+    return record
+
+
+def analyze_pdfs(pdf_paths: List[PdfSource]) -> List[Optional[Dict[str, Any]]]:
+    """
+    analyze_pdf'in toplu sürümü: önbellekte olmayan CV'lerin NER işlemi tek bir nlp.pipe çağrısında yapılır.
+
+    Okunamayan dosyalar için None döner.
+    """
+    records: List[Optional[Dict[str, Any]]] = [None] * len(pdf_paths)
+    pending = []
+    for idx, pdf_path in enumerate(pdf_paths):
+        try:
+            data = read_source(pdf_path)
+            pdf_sha = source_digest(data)
+            cached = PARSE_CACHE.get(pdf_sha) if PARSE_CACHE is not None else None
+            if cached is not None:
+                cached["cached"] = True
+                records[idx] = cached
+                continue
+            raw_text, truncated = extract_text_budgeted(data)
+            sections = extract_sections_simple(raw_text) if raw_text else {}
+            if sections:
+                pending.append((idx, {"sha256": pdf_sha, "raw_text": raw_text, "sections": sections,
+                                      "truncated": truncated}))
+        except Exception as e:
+            logger.error("Hata: %s işlenemedi. Hata: %s", source_label(pdf_path), e)
+
+    structured_list = extract_structured_data_many([record["sections"] for _, record in pending])
+    for (idx, record), structured in zip(pending, structured_list):
+        record["structured"] = structured
+        if PARSE_CACHE is not None and not record["truncated"]:
+            PARSE_CACHE.put(record["sha256"], record)
+        record["cached"] = False
+        records[idx] = record
+    return records
@@ -0,0 +1,57 @@
+"""Ayrıştırma ve karşılaştırmayı olay akışı olarak yürüten hat (arayüzün canlı güncellenmesi için)."""
+
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from comparison_matrix import IncrementalComparison
+from dedup import MAX_DISTANCE, hamming, simhash
+from ingestion import Source, iter_ingest
+
+
+def stream_analysis(jobs: List[Tuple[str, Source]], comparison: IncrementalComparison,
+                    fingerprints: Optional[Dict[str, Optional[int]]] = None, workers: Optional[int] = None,
+                    dedup: bool = False, deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    jobs içindeki (anahtar, kaynak) çiftlerini işler; her CV biter bitmez karşılaştırmaya ekler. Kaynak PDF
+    yolu ya da bellekteki (ad, baytlar) yüklemesidir (bkz. ingestion).
+
+    Üretilen olaylar:
+      {"type": "text", "key", "result", "done", "total"}    dedup modunda metin çıkarıldığında
+      {"type": "parsed", "key", "result", "record", "duplicate_of", "fingerprint", "done", "total"}
+      {"type": "pair", "key_a", "key_b", "total", "sections"}  yeni CV × karşılaştırmadaki her CV için
+
+    fingerprints, karşılaştırmada zaten bulunan CV'lerin SimHash izleridir; dedup=True ise bunlara
+    MAX_DISTANCE içinde yakın olan yeni CV'ler de tekrar sayılır ve karşılaştırmaya eklenmez. deadline
+    (time.time()) toplu işin bitiş zamanıdır; sonuçlardaki truncated alanı kısmen okunan CV'leri gösterir.
+    """
+    fingerprints = dict(fingerprints or {})
+    keys = [key for key, _ in jobs]
+    total = len(jobs)
+    text_done = 0
+    parsed_done = 0
+
+    for stage, idx, result in iter_ingest([source for _, source in jobs], workers=workers, dedup=dedup,
+                                           deadline=deadline):
+        key = keys[idx]
+        if stage == "text":
+            text_done += 1
+            yield {"type": "text", "key": key, "result": result, "done": text_done, "total": total}
+            continue
+
+        parsed_done += 1
+        record = result["record"]
+        fingerprint = simhash(record["raw_text"]) if record else None
+        duplicate_of = keys[result["duplicate_index"]] if result["duplicate_index"] is not None else None
+        if dedup and record and duplicate_of is None and fingerprint is not None:
+            duplicate_of = next((other for other, fp in fingerprints.items()
+                                 if fp is not None and other in comparison and hamming(fp, fingerprint) <= MAX_DISTANCE), None)
+        yield {"type": "parsed", "key": key, "result": result, "record": record, "duplicate_of": duplicate_of,
+               "fingerprint": fingerprint, "done": parsed_done, "total": total}
+
+        if not record or duplicate_of is not None or key in comparison:
+            continue
+        fingerprints[key] = fingerprint
+        comparison.add_many([(key, record["structured"])])
+        for other in comparison.keys:
+            if other != key:
+                score, sections = comparison.score(other, key)
+                yield {"type": "pair", "key_a": other, "key_b": key, "total": score, "sections": sections}
@@ -0,0 +1,163 @@
+"""İkili karşılaştırma sonuçlarının dizi tabanlı, sıkıştırılmış saklanması.
+
+Her çift, CV sıralarını tutan idx_a/idx_b (int32) ile toplam skor ve çift × bölüm skor matrisinin
+(float32) bir satırıdır; CV'lerin yapılandırılmış verisi ids ile hizalı tek bir listede bir kez tutulur.
+Ortalamalar ve sıralamalar bu diziler üzerinde vektörel indirgemelerdir.
+"""
+
+import importlib.util
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from comparison_matrix import SECTION_NAMES, IncrementalComparison
+
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+class ResultStore:
+    """Çift skorları için büyüyebilen float32/int32 dizileri."""
+
+    def __init__(self, ids: List[str], data: Optional[List[Optional[Dict[str, Any]]]] = None,
+                 section_names: Optional[List[str]] = None):
+        self.ids = list(ids)
+        self.data = list(data) if data is not None else [None] * len(self.ids)
+        self.section_names = list(section_names or SECTION_NAMES)
+        self._section_index = {s: k for k, s in enumerate(self.section_names)}
+        self._size = 0
+        self._idx_a = np.zeros(0, dtype=np.int32)
+        self._idx_b = np.zeros(0, dtype=np.int32)
+        self._total = np.zeros(0, dtype=np.float32)
+        self._scores = np.zeros((0, len(self.section_names)), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def idx_a(self) -> np.ndarray:
+        return self._idx_a[:self._size]
+
+    @property
+    def idx_b(self) -> np.ndarray:
+        return self._idx_b[:self._size]
+
+    @property
+    def total(self) -> np.ndarray:
+        return self._total[:self._size]
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Çift × bölüm skor matrisi (sütunlar section_names sırasında)."""
+        return self._scores[:self._size]
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed <= len(self._total):
+            return
+        capacity = max(needed, 2 * len(self._total), 64)
+        for name in ("_idx_a", "_idx_b", "_total", "_scores"):
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+
+    def append(self, idx_a: np.ndarray, idx_b: np.ndarray, total: np.ndarray, sections: Dict[str, np.ndarray]) -> None:
+        """Bir grup çifti ekler; sections bölüm adı -> çift başına skor dizisidir."""
+        count = len(idx_a)
+        self._reserve(count)
+        end = self._size + count
+        self._idx_a[self._size:end] = idx_a
+        self._idx_b[self._size:end] = idx_b
+        self._total[self._size:end] = total
+        for section, values in sections.items():
+            self._scores[self._size:end, self._section_index[section]] = values
+        self._size = end
+
+    @classmethod
+    def from_matrices(cls, ids: List[str], total: np.ndarray, sections: Dict[str, np.ndarray],
+                      data: Optional[List[Optional[Dict[str, Any]]]] = None) -> "ResultStore":
+        """Simetrik n×n skor matrislerinin üst üçgeninden (i < j) deposu oluşturur."""
+        store = cls(ids, data, section_names=list(sections))
+        rows, cols = np.triu_indices(len(ids), k=1)
+        store.append(rows, cols, total[rows, cols], {s: m[rows, cols] for s, m in sections.items()})
+        return store
+
+    @classmethod
+    def from_comparison(cls, comparison: IncrementalComparison, ids: Optional[List[str]] = None) -> "ResultStore":
+        """Artımlı karşılaştırmanın anlık görüntüsü; ids verilmezse dosya özetleri kullanılır."""
+        data = comparison.features["data"] if comparison.features else []
+        return cls.from_matrices(ids or comparison.keys, comparison.total, comparison.sections, data)
+
+    def section_means(self) -> Dict[str, float]:
+        """Bölüm başına tüm çiftlerin ortalama benzerliği."""
+        if not self._size:
+            return {s: 0.0 for s in self.section_names}
+        means = self.scores.mean(axis=0, dtype=np.float64)
+        return {s: float(means[k]) for k, s in enumerate(self.section_names)}
+
+    def mean_total(self) -> float:
+        return float(self.total.mean(dtype=np.float64)) if self._size else 0.0
+
+    def _values(self, section: Optional[str]) -> np.ndarray:
+        return self.total if section is None else self.scores[:, self._section_index[section]]
+
+    def top_pairs(self, k: int = 10, section: Optional[str] = None) -> List[Tuple[str, str, float]]:
+        """En benzer k çift (section verilirse o bölüme göre), azalan sırada."""
+        values = self._values(section)
+        k = min(k, self._size)
+        if k <= 0:
+            return []
+        top = np.argpartition(-values, k - 1)[:k]
+        top = top[np.argsort(-values[top], kind="stable")]
+        return [(self.ids[self.idx_a[p]], self.ids[self.idx_b[p]], float(values[p])) for p in top]
+
+    def candidate_means(self, section: Optional[str] = None) -> np.ndarray:
+        """Her CV'nin diğer CV'lerle ortalama benzerliği (ids sırasında)."""
+        values = self._values(section).astype(np.float64)
+        n = len(self.ids)
+        sums = np.bincount(self.idx_a, weights=values, minlength=n) + np.bincount(self.idx_b, weights=values, minlength=n)
+        counts = np.bincount(self.idx_a, minlength=n) + np.bincount(self.idx_b, minlength=n)
+        return np.divide(sums, counts, out=np.zeros(n), where=counts > 0)
+
+    def ranking(self, section: Optional[str] = None) -> List[Tuple[str, float]]:
+        """CV'leri ortalama benzerliklerine göre azalan sırada döndürür."""
+        means = self.candidate_means(section)
+        return [(self.ids[i], float(means[i])) for i in np.argsort(-means, kind="stable")]
+
+    def pairs_of(self, cv_id: str) -> np.ndarray:
+        """Verilen CV'nin yer aldığı çiftlerin sıraları."""
+        idx = self.ids.index(cv_id)
+        return np.flatnonzero((self.idx_a == idx) | (self.idx_b == idx))
+
+    def to_frame(self):
+        """Çift başına bir satırlık pandas DataFrame (CV adları kategorik)."""
+        import pandas as pd
+        frame = pd.DataFrame({
+            "cv_a": pd.Categorical.from_codes(self.idx_a, categories=self.ids),
+            "cv_b": pd.Categorical.from_codes(self.idx_b, categories=self.ids),
+            "total": self.total,
+        })
+        for k, section in enumerate(self.section_names):
+            frame[section] = self.scores[:, k]
+        return frame
+
+    def save_npz(self, path) -> None:
+        """Dizileri ve CV adlarını sıkıştırılmış .npz olarak yazar (yapılandırılmış veri hariç)."""
+        np.savez_compressed(path, ids=np.asarray(self.ids, dtype=str), sections=np.asarray(self.section_names, dtype=str),
+                            idx_a=self.idx_a, idx_b=self.idx_b, total=self.total, scores=self.scores)
+
+    @classmethod
+    def load_npz(cls, path) -> "ResultStore":
+        with np.load(path) as archive:
+            store = cls(archive["ids"].tolist(), section_names=archive["sections"].tolist())
+            scores = archive["scores"]
+            store.append(archive["idx_a"], archive["idx_b"], archive["total"],
+                         {s: scores[:, k] for k, s in enumerate(store.section_names)})
+        return store
+
+    def save_parquet(self, path) -> None:
+        """Çiftleri Parquet olarak yazar (pyarrow gerekir; yapılandırılmış veri hariç)."""
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Parquet çıktısı için pyarrow paketi gerekli")
+        self.to_frame().to_parquet(path, index=False)
+
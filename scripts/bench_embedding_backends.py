@@ -0,0 +1,153 @@
+"""Speed and accuracy of the sentence embedding backends on the CVs in data/.
+
+Every backend encodes the unique semantic section entries of the corpus (the embedding cache is bypassed).
+Speed is reported as texts/s over --repeat runs plus model load time and peak RSS. Accuracy is measured
+against the torch backend: per-entry cosine to the reference embedding, and all CV pairs are scored with
+score_block so the differences in section scores, total scores and pair ranking are visible.
+
+    python scripts/bench_embedding_backends.py --threads 4
+    python scripts/bench_embedding_backends.py --backends torch onnx-int8 --max-total-diff 0.02
+
+The exit code is 1 when a backend's largest total score difference exceeds --max-total-diff.
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import sys
+import time
+
+# Ensure project root is on sys.path when running from `scripts/`
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+from scipy.stats import spearmanr
+
+from comparison_engine import (ENCODE_BATCH_SIZE, SEMANTIC_MODEL_NAME, SEMANTIC_SECTIONS, _section_entries,
+                               build_features, score_block)
+from embedding_backend import BACKENDS, EMBEDDING_THREADS, ONNX_AVAILABLE, load_embedder
+from parse_cache import analyze_pdf
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def load_corpus(data_dir, limit):
+    paths = sorted(glob.glob(os.path.join(data_dir, "*.pdf")))
+    if limit:
+        paths = paths[:limit]
+    data_list = []
+    for path in paths:
+        record = analyze_pdf(path)
+        if record:
+            data_list.append(record["structured"])
+    return data_list
+
+
+def run_backend(model_name, backend, texts, threads, batch_size, repeat):
+    started = time.perf_counter()
+    embedder = load_embedder(model_name, backend, threads=threads)
+    load_seconds = time.perf_counter() - started
+
+    def encode(batch):
+        return np.asarray(embedder.encode(batch, batch_size=batch_size, normalize_embeddings=True,
+                                          convert_to_numpy=True), dtype=np.float32)
+
+    encode(texts[:batch_size])  # warm-up
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        embeddings = encode(texts)
+        runs.append(time.perf_counter() - started)
+    return {"load_seconds": load_seconds, "runs": runs, "embeddings": embeddings,
+            "lookup": dict(zip(texts, embeddings)), "peak_rss_mb": peak_rss_mb()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare embedding backends for speed and accuracy.")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "data"))
+    parser.add_argument("--model", default=SEMANTIC_MODEL_NAME, help="SentenceTransformer name or local path")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--threads", type=int, default=EMBEDDING_THREADS, help="Inference threads (0 = runtime default)")
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=0, help="Use at most this many PDFs")
+    parser.add_argument("--max-total-diff", type=float, default=0.02,
+                        help="Fail when a total score differs from torch by more than this")
+    parser.add_argument("-o", "--output", help="Write the results JSON here")
+    args = parser.parse_args(argv)
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    if not ONNX_AVAILABLE and len(backends) > 1:
+        print("onnxruntime is not installed; only the torch backend can run.", file=sys.stderr)
+        backends = ["torch"]
+
+    data_list = load_corpus(args.data_dir, args.limit)
+    if len(data_list) < 2:
+        print("Need at least two parsed CVs.", file=sys.stderr)
+        return 1
+    texts = sorted({text for data in data_list for s in SEMANTIC_SECTIONS for text in _section_entries(data, s)})
+    n = len(data_list)
+    rows = list(range(n))
+    print(f"{n} CVs, {len(texts)} unique section entries, {n * (n - 1) // 2} pairs, threads={args.threads}")
+
+    results = {}
+    reference = None
+    upper = np.triu_indices(n, k=1)
+    failed = False
+    print(f"{'backend':<10} {'load s':>7} {'texts/s':>9} {'speedup':>8} {'rss MB':>7} {'min cos':>8} "
+          f"{'max |dTotal|':>12} {'max |dSection|':>14} {'spearman':>9} {'top10':>6}")
+    for backend in backends:
+        run = run_backend(args.model, backend, texts, args.threads, args.batch_size, args.repeat)
+        features = build_features(data_list, encoder=lambda batch: np.stack([run["lookup"][t] for t in batch]))
+        total, sections = score_block(features, rows, rows)
+        run["total"] = total[upper]
+        run["sections"] = {s: sections[s][upper] for s in SEMANTIC_SECTIONS}
+        best = min(run["runs"])
+        entry = {"load_seconds": round(run["load_seconds"], 3), "encode_seconds": [round(r, 4) for r in run["runs"]],
+                 "texts_per_second": round(len(texts) / best, 1), "peak_rss_mb": round(run["peak_rss_mb"], 1)}
+        if reference is None:
+            reference = run
+            entry.update({"speedup": 1.0})
+        else:
+            cosine = (run["embeddings"] * reference["embeddings"]).sum(axis=1)
+            total_diff = np.abs(run["total"] - reference["total"])
+            section_diff = max(float(np.abs(run["sections"][s] - reference["sections"][s]).max()) for s in SEMANTIC_SECTIONS)
+            k = min(10, len(run["total"]))
+            top_ref = set(np.argsort(-reference["total"], kind="stable")[:k])
+            top_new = set(np.argsort(-run["total"], kind="stable")[:k])
+            entry.update({
+                "speedup": round(min(reference["runs"]) / best, 2),
+                "min_cosine": round(float(cosine.min()), 5),
+                "mean_cosine": round(float(cosine.mean()), 5),
+                "max_total_diff": round(float(total_diff.max()), 4),
+                "mean_total_diff": round(float(total_diff.mean()), 5),
+                "max_section_diff": round(section_diff, 4),
+                "spearman_total": round(float(spearmanr(reference["total"], run["total"]).correlation), 4),
+                "top10_overlap": len(top_ref & top_new) / k,
+            })
+            failed = failed or entry["max_total_diff"] > args.max_total_diff
+        results[backend] = entry
+        print(f"{backend:<10} {entry['load_seconds']:>7.2f} {entry['texts_per_second']:>9.1f} {entry['speedup']:>7.2f}x "
+              f"{entry['peak_rss_mb']:>7.0f} {entry.get('min_cosine', 1.0):>8.4f} {entry.get('max_total_diff', 0.0):>12.4f} "
+              f"{entry.get('max_section_diff', 0.0):>14.4f} {entry.get('spearman_total', 1.0):>9.4f} "
+              f"{entry.get('top10_overlap', 1.0):>6.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "threads": args.threads, "cvs": n, "texts": len(texts),
+                       "backends": results}, f, indent=2)
+    if failed:
+        print(f"Total score difference above {args.max_total_diff}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import sys
+import os
+import glob
+import time
+
+# Ensure project root is on sys.path when running from `scripts/`
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import spacy
+from cv_parser import extract_text_from_pdf, extract_sections_simple
+from data_extractor import (CUSTOM_NER_MODEL_NAME, NLP_BATCH_SIZE, get_nlp,
+                            _split_entries, _experience_text, _education_text)
+
+# Compares the old per-entry nlp() calls on the full pipeline with batched nlp.pipe on the
+# NER-only pipeline, over the experience/education entries of the PDFs in data/.
+if __name__ == "__main__":
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "data")
+    entries = []
+    for pdf_path in sorted(glob.glob(os.path.join(data_dir, "*.pdf"))):
+        raw_text = extract_text_from_pdf(pdf_path)
+        if not raw_text:
+            continue
+        sections = extract_sections_simple(raw_text)
+        for text in (_experience_text(sections), _education_text(sections)):
+            if text:
+                entries.extend(_split_entries(text))
+
+    if not entries:
+        print("No entries found.")
+        sys.exit(1)
+
+    full_nlp = spacy.load(CUSTOM_NER_MODEL_NAME)
+    slim_nlp = get_nlp()
+    print(f"Entries: {len(entries)}")
+    print(f"Full pipeline: {full_nlp.pipe_names}")
+    print(f"Slim pipeline: {[name for name, _ in slim_nlp.pipeline]}")
+
+    started = time.perf_counter()
+    old_ents = [[(e.text, e.label_) for e in full_nlp(entry).ents] for entry in entries]
+    old_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    new_ents = [[(e.text, e.label_) for e in doc.ents] for doc in slim_nlp.pipe(entries, batch_size=NLP_BATCH_SIZE)]
+    new_seconds = time.perf_counter() - started
+
+    same = sum(1 for a, b in zip(old_ents, new_ents) if a == b)
+    print(f"Per-entry nlp(), full pipeline: {len(entries) / old_seconds:.1f} entries/s ({old_seconds:.2f}s)")
+    print(f"Batched nlp.pipe, NER only:     {len(entries) / new_seconds:.1f} entries/s ({new_seconds:.2f}s)")
+    print(f"Speedup: {old_seconds / new_seconds:.2f}x, identical entities in {same}/{len(entries)} entries")
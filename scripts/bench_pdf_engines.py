@@ -0,0 +1,149 @@
+"""Throughput and section-split comparison of the PDF text engines on the PDFs in data/.
+
+Every PDF is extracted with each engine (--repeat runs, best run kept) and split with
+extract_sections_simple. Speed is reported as files/s and pages/s. The section split of every engine is
+compared with the reference engine (the first in --engines): same set of detected sections, and the token
+Jaccard similarity of each section text both engines found.
+
+    python scripts/bench_pdf_engines.py
+    python scripts/bench_pdf_engines.py --engines pdfplumber pymupdf --with-ocr -o bench/pdf_engines.json
+
+OCR is switched off unless --with-ocr is given, so the numbers measure the text layer alone.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+import sys
+import time
+
+# Ensure project root is on sys.path when running from `scripts/`
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import cv_parser
+from cv_parser import PDF_ENGINES, extract_sections_simple, extract_text_from_pdf
+
+
+def tokens(text):
+    return set(re.findall(r"\w+", (text or "").lower()))
+
+
+def jaccard(a, b):
+    ta, tb = tokens(a), tokens(b)
+    if not ta and not tb:
+        return 1.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def page_count(path):
+    import fitz
+    with fitz.open(path) as doc:
+        return len(doc)
+
+
+def run_engine(engine, paths, repeat):
+    best = {}
+    texts = {}
+    quiet = io.StringIO()
+    for _ in range(repeat):
+        for path in paths:
+            with contextlib.redirect_stdout(quiet):
+                started = time.perf_counter()
+                text = extract_text_from_pdf(path, engine=engine)
+                elapsed = time.perf_counter() - started
+            best[path] = min(elapsed, best.get(path, elapsed))
+            texts[path] = text
+    return best, texts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare PDF text engines for speed and section split.")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "data"))
+    parser.add_argument("--engines", nargs="+", choices=PDF_ENGINES, default=["pdfplumber", "pymupdf"],
+                        help="Engines to run; the first one is the reference for the section comparison")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=0, help="Use at most this many PDFs")
+    parser.add_argument("--with-ocr", action="store_true", help="Also OCR pages without a text layer")
+    parser.add_argument("--verbose", action="store_true", help="Print the per-file section differences")
+    parser.add_argument("-o", "--output", help="Write the results JSON here")
+    args = parser.parse_args(argv)
+
+    if not args.with_ocr:
+        cv_parser.OCR_AVAILABLE = False
+
+    paths = sorted(glob.glob(os.path.join(args.data_dir, "*.pdf")))
+    if args.limit:
+        paths = paths[:args.limit]
+    if not paths:
+        print(f"No PDFs found in {args.data_dir}", file=sys.stderr)
+        return 1
+    pages = sum(page_count(p) for p in paths)
+    print(f"{len(paths)} PDFs, {pages} pages, best of {args.repeat} run(s), OCR {'on' if args.with_ocr else 'off'}")
+
+    runs = {}
+    for engine in args.engines:
+        runs[engine] = run_engine(engine, paths, args.repeat)
+
+    reference = args.engines[0]
+    ref_sections = {p: extract_sections_simple(runs[reference][1][p] or "") for p in paths}
+    results = {}
+    print(f"\n{'engine':<12}{'total s':>9}{'files/s':>9}{'pages/s':>9}{'speedup':>9}{'chars':>9}"
+          f"{'sections':>10}{'same split':>12}{'mean jacc':>11}{'min jacc':>10}")
+    ref_seconds = sum(runs[reference][0].values())
+    for engine in args.engines:
+        seconds_by_file, texts = runs[engine]
+        seconds = sum(seconds_by_file.values())
+        same_split = 0
+        similarities = []
+        differences = []
+        section_count = 0
+        for path in paths:
+            sections = extract_sections_simple(texts[path] or "")
+            section_count += len(sections)
+            ref = ref_sections[path]
+            if set(sections) == set(ref):
+                same_split += 1
+            else:
+                differences.append((os.path.basename(path), sorted(set(ref) - set(sections)),
+                                    sorted(set(sections) - set(ref))))
+            similarities.extend(jaccard(ref[s], sections[s]) for s in set(ref) & set(sections))
+        entry = {
+            "seconds": round(seconds, 4),
+            "files_per_second": round(len(paths) / seconds, 2) if seconds else None,
+            "pages_per_second": round(pages / seconds, 2) if seconds else None,
+            "speedup": round(ref_seconds / seconds, 2) if seconds else None,
+            "chars": sum(len(t or "") for t in texts.values()),
+            "empty_files": sum(1 for t in texts.values() if not t),
+            "sections": section_count,
+            "same_section_split": same_split,
+            "mean_section_jaccard": round(sum(similarities) / len(similarities), 4) if similarities else None,
+            "min_section_jaccard": round(min(similarities), 4) if similarities else None,
+            "split_differences": [{"file": f, "missing": m, "extra": e} for f, m, e in differences],
+        }
+        results[engine] = entry
+        fmt = lambda v, width, digits: f"{v:>{width}.{digits}f}" if v is not None else f"{'-':>{width}}"
+        print(f"{engine:<12}{fmt(entry['seconds'], 9, 3)}{fmt(entry['files_per_second'], 9, 1)}"
+              f"{fmt(entry['pages_per_second'], 9, 1)}{fmt(entry['speedup'], 8, 2)}x{entry['chars']:>9}"
+              f"{entry['sections']:>10}{same_split:>7}/{len(paths):<4}{fmt(entry['mean_section_jaccard'], 11, 3)}"
+              f"{fmt(entry['min_section_jaccard'], 10, 3)}")
+        if args.verbose:
+            for name, missing, extra in differences:
+                print(f"    {name}: missing {missing or '-'}, extra {extra or '-'}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"files": len(paths), "pages": pages, "repeat": args.repeat, "ocr": args.with_ocr,
+                       "reference": reference, "engines": results}, f, ensure_ascii=False, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
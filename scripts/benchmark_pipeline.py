@@ -0,0 +1,248 @@
+"""Per-stage benchmark of the real CV pipeline over the PDFs in data/.
+
+Stages: pdf_text (text layer), ocr_render / ocr_recognize (per OCR'd page), sections, ner
+(extract_structured_data), encode (per-CV section embeddings) and compare_pair (compare_cv_data).
+Each stage reports p50/p95 latency, throughput and the process peak RSS after the stage.
+
+    python scripts/benchmark_pipeline.py --save-baseline bench/baseline.json
+    python scripts/benchmark_pipeline.py --baseline bench/baseline.json --tolerance 0.25
+
+With --baseline the exit code is 1 when any stage's p50 or p95 got slower than the tolerance allows.
+Parse, embedding and OCR page caches are disabled unless --with-cache is given, so the numbers measure compute.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from itertools import combinations
+
+# Ensure project root is on sys.path when running from `scripts/`
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+STAGES = ["pdf_text", "ocr_render", "ocr_recognize", "sections", "ner", "encode", "compare_pair"]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q
+    low, high = int(pos), min(int(pos) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class StageTimer:
+    """Collects per-call durations per stage; safe to use from the OCR worker threads."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.rss = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def wrap(self, module, name, stage):
+        """Replaces module.name with a timed version (used for the OCR internals)."""
+        original = getattr(module, name)
+
+        def timed(*args, **kwargs):
+            with self.measure(stage):
+                return original(*args, **kwargs)
+
+        setattr(module, name, timed)
+
+    def summary(self):
+        result = {}
+        for stage in STAGES:
+            values = self.samples.get(stage, [])
+            total = sum(values)
+            result[stage] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 3) if values else None,
+                "p95_ms": round(percentile(values, 0.95) * 1000, 3) if values else None,
+                "total_s": round(total, 4),
+                "throughput_per_s": round(len(values) / total, 2) if total > 0 else None,
+                "peak_rss_mb": round(self.rss[stage], 1) if stage in self.rss else None,
+            }
+        return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare_with_baseline(current, baseline, tolerance, min_ms):
+    """Returns a list of (stage, metric, baseline_ms, current_ms) that regressed."""
+    regressions = []
+    for stage, stats in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            before, after = old.get(metric), stats.get(metric)
+            if before is None or after is None:
+                continue
+            # Tiny stages are dominated by timer noise; require an absolute difference as well
+            if after > before * (1 + tolerance) and after - before > min_ms:
+                regressions.append((stage, metric, before, after))
+    return regressions
+
+
+def run(args):
+    if not args.with_cache:
+        os.environ["CV_PARSE_CACHE"] = "0"
+        os.environ["CV_EMBEDDING_CACHE"] = "0"
+        os.environ["CV_OCR_CACHE"] = "0"
+
+    import cv_parser
+    from comparison_engine import build_features, compare_cv_data, get_semantic_model
+    from data_extractor import extract_structured_data, get_nlp
+    from model_loader import load_times
+
+    paths = sorted(glob.glob(os.path.join(args.data_dir, "*.pdf")))
+    if args.limit:
+        # Keep the scanned samples in a limited run so OCR is always measured
+        scanned = [p for p in paths if "taranmis" in os.path.basename(p)]
+        paths = scanned + [p for p in paths if p not in scanned][:max(0, args.limit - len(scanned))]
+    if not paths:
+        print(f"No PDFs found in {args.data_dir}")
+        return 1
+
+    timer = StageTimer()
+    timer.wrap(cv_parser, "_render_page", "ocr_render")
+    timer.wrap(cv_parser, "_read_image", "ocr_recognize")
+
+    # Load models up front so their load time is reported separately from the stage latencies
+    quiet = io.StringIO()
+    with contextlib.redirect_stdout(quiet):
+        get_nlp()
+        get_semantic_model()
+        if cv_parser.OCR_AVAILABLE:
+            cv_parser.get_ocr_reader()
+
+    structured = []
+    print(f"Benchmarking {len(paths)} PDFs from {args.data_dir} ({args.repeat} repeat(s))")
+    for _ in range(args.repeat):
+        structured = []
+        for path in paths:
+            with contextlib.redirect_stdout(quiet):
+                before = sum(timer.samples["ocr_render"]) + sum(timer.samples["ocr_recognize"])
+                started = time.perf_counter()
+                raw_text = cv_parser.extract_text_from_pdf(path)
+                elapsed = time.perf_counter() - started
+                # OCR runs inside extract_text_from_pdf; count only the text-layer share here
+                ocr = sum(timer.samples["ocr_render"]) + sum(timer.samples["ocr_recognize"]) - before
+                timer.add("pdf_text", max(0.0, elapsed - ocr))
+            if not raw_text:
+                print(f"  skipped (no text): {os.path.basename(path)}")
+                continue
+            with timer.measure("sections"):
+                sections = cv_parser.extract_sections_simple(raw_text)
+            with contextlib.redirect_stdout(quiet), timer.measure("ner"):
+                structured.append(extract_structured_data(sections))
+    for stage in ("pdf_text", "ocr_render", "ocr_recognize", "sections", "ner"):
+        timer.rss[stage] = peak_rss_mb()
+
+    for data in structured:
+        with timer.measure("encode"):
+            build_features([data])
+    timer.rss["encode"] = peak_rss_mb()
+
+    pairs = list(combinations(range(len(structured)), 2))[:args.max_pairs]
+    for i, j in pairs:
+        with timer.measure("compare_pair"):
+            compare_cv_data(structured[i], structured[j])
+    timer.rss["compare_pair"] = peak_rss_mb()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "files": len(paths),
+        "parsed": len(structured),
+        "pairs": len(pairs),
+        "caches_enabled": args.with_cache,
+        "model_load_seconds": {name: round(s, 3) if s is not None else None for name, s in load_times().items()},
+        "stages": timer.summary(),
+        "ocr_raster_peak_mb": round(cv_parser.OCR_STATS["peak_raster_bytes"] / (1024 * 1024), 2),
+        "ocr_cache_hits": cv_parser.OCR_STATS["cache_hits"],
+    }
+
+    print(f"\n{'stage':<15}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'per s':>10}{'peak RSS MB':>13}")
+    for stage, s in report["stages"].items():
+        fmt = lambda v, width, digits: f"{v:>{width}.{digits}f}" if v is not None else f"{'-':>{width}}"
+        print(f"{stage:<15}{s['count']:>7}{fmt(s['p50_ms'], 11, 2)}{fmt(s['p95_ms'], 11, 2)}"
+              f"{fmt(s['throughput_per_s'], 10, 1)}{fmt(s['peak_rss_mb'], 13, 1)}")
+    print(f"Model load times (s): {report['model_load_seconds']}")
+    print(f"OCR raster peak: {report['ocr_raster_peak_mb']} MB in flight, {report['ocr_cache_hits']} page cache hit(s)")
+
+    for target in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Wrote {target}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.tolerance, args.min_ms)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for stage, metric, before, after in regressions:
+                print(f"  {stage} {metric}: {before:.2f} -> {after:.2f} ms ({after / before - 1:+.0%})")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of the CV pipeline.")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "data"))
+    parser.add_argument("--limit", type=int, default=0, help="Use at most this many PDFs (scanned samples always kept)")
+    parser.add_argument("--repeat", type=int, default=1, help="Parse the corpus this many times")
+    parser.add_argument("--max-pairs", type=int, default=300, help="Upper bound on compare_cv_data calls")
+    parser.add_argument("--with-cache", action="store_true", help="Keep parse/embedding caches enabled")
+    parser.add_argument("-o", "--output", help="Write the results JSON here")
+    parser.add_argument("--save-baseline", help="Write the results JSON as a new baseline")
+    parser.add_argument("--baseline", help="Compare against this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="Allowed relative slowdown (0.20 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this many ms")
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Beceri ve dil kümeleri için vektörel Jaccard benzerliği.
+
+Kesin mod: her CV'nin kümesi ortak sözlük üzerinde seyrek ikili bir satırdır; tüm kesişim sayıları tek bir
+seyrek matris çarpımından gelir ve sonuç compare_cv_data'daki _jaccard ile birebir aynıdır.
+Yaklaşık mod: çok büyük havuzlarda MinHash imzaları ve LSH bantlarıyla yalnızca benzer olması muhtemel
+çiftler bulunur (comparison_engine.build_features(approximate_sets=True), batch_compare --approx-sets).
+"""
+
+import hashlib
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# MinHash permütasyonları (a*h + b) mod p biçimindedir; p Mersenne asalı 2^61 - 1
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def build_vocabulary(*set_lists: Iterable[Optional[Set[Hashable]]]) -> Dict[Hashable, int]:
+    """Kümelerdeki tüm öğelere sütun numarası verir (None kümeler atlanır)."""
+    vocab: Dict[Hashable, int] = {}
+    for sets in set_lists:
+        for items in sets:
+            for item in items or ():
+                if item not in vocab:
+                    vocab[item] = len(vocab)
+    return vocab
+
+
+def to_sparse(sets: List[Optional[Set[Hashable]]], vocab: Dict[Hashable, int]) -> sparse.csr_matrix:
+    """Kümeleri N×V seyrek ikili matrise dönüştürür; sözlükte olmayan öğeler yok sayılır."""
+    indptr = [0]
+    indices: List[int] = []
+    for items in sets:
+        indices.extend(vocab[item] for item in items or () if item in vocab)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((data, np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+                             shape=(len(sets), len(vocab)))
+
+
+def jaccard_matrix(sets_a: List[Optional[Set[Hashable]]],
+                   sets_b: Optional[List[Optional[Set[Hashable]]]] = None) -> np.ndarray:
+    """
+    len(sets_a)×len(sets_b) Jaccard matrisi; sets_b verilmezse sets_a × sets_a.
+
+    Birleşimi boş olan çiftler 0 alır. None kümeler boş küme gibi puanlanır; çağıran taraf bu hücreleri
+    gerekirse ayrıca doldurur.
+    """
+    if sets_b is None:
+        sets_b = sets_a
+    vocab = build_vocabulary(sets_a, sets_b)
+    a = to_sparse(sets_a, vocab)
+    b = a if sets_b is sets_a else to_sparse(sets_b, vocab)
+    intersections = (a @ b.T).toarray().astype(float)
+    sizes_a = np.asarray(a.sum(axis=1), dtype=float).ravel()
+    sizes_b = np.asarray(b.sum(axis=1), dtype=float).ravel()
+    unions = sizes_a[:, None] + sizes_b[None, :] - intersections
+    return np.divide(intersections, unions, out=np.zeros_like(intersections), where=unions > 0)
+
+
+def _item_hash(item: Hashable) -> int:
+    """Süreçler arasında kararlı 32 bit öğe özeti (Python hash() tuzlu olduğu için kullanılmaz)."""
+    return int.from_bytes(hashlib.blake2b(str(item).encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def minhash_signatures(sets: List[Optional[Set[Hashable]]], num_perm: int = 128, seed: int = 1) -> np.ndarray:
+    """Her küme için num_perm uzunluğunda MinHash imzası (N×num_perm, uint64); boş küme en büyük değeri alır."""
+    rng = np.random.default_rng(seed)
+    # a, b < 2^32 ve h < 2^32 olduğundan a*h + b uint64'e taşmadan sığar
+    a = rng.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    signatures = np.full((len(sets), num_perm), _MAX_HASH, dtype=np.uint64)
+    for row, items in enumerate(sets):
+        if not items:
+            continue
+        hashes = np.fromiter((_item_hash(item) for item in items), dtype=np.uint64, count=len(items))
+        permuted = ((hashes[:, None] * a[None, :] + b[None, :]) % _MERSENNE_PRIME) & _MAX_HASH
+        signatures[row] = permuted.min(axis=0)
+    return signatures
+
+
+def estimate_jaccard(signatures: np.ndarray, i: int, j: int) -> float:
+    """İki imzanın eşleşen konum oranı (Jaccard tahmini)."""
+    return float(np.mean(signatures[i] == signatures[j]))
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int = 32) -> Set[Tuple[int, int]]:
+    """
+    İmzaları bantlara böler; en az bir bantta aynı kovaya düşen (i < j) çiftleri döndürür.
+
+    r = num_perm / bands satırlı bantlarda bir çiftin aday olma olasılığı 1 - (1 - J^r)^bands'tir; eşik
+    yaklaşık (1 / bands)^(1 / r) civarındadır.
+    """
+    n, num_perm = signatures.shape
+    rows_per_band = num_perm // bands
+    candidates: Set[Tuple[int, int]] = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        chunk = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        for row in range(n):
+            if chunk[row, 0] == _MAX_HASH:
+                continue  # boş küme
+            buckets[chunk[row].tobytes()].append(row)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    candidates.add((members[x], members[y]))
+    return candidates
+
+
+def similar_pairs(sets: List[Optional[Set[Hashable]]], threshold: float = 0.5, num_perm: int = 128,
+                  bands: int = 32, exact: bool = True) -> Dict[Tuple[int, int], float]:
+    """
+    Jaccard benzerliği threshold ve üzeri olan (i, j) çiftlerini LSH ile bulur.
+
+    exact=True ise aday çiftlerin skoru kümelerden kesin hesaplanır, aksi halde MinHash tahmini kullanılır.
+    Boş ya da None kümeler hiçbir çifte girmez.
+    """
+    signatures = minhash_signatures(sets, num_perm=num_perm)
+    result = {}
+    for i, j in lsh_candidate_pairs(signatures, bands=bands):
+        if not sets[i] or not sets[j]:
+            continue
+        if exact:
+            union = len(sets[i] | sets[j])
+            score = len(sets[i] & sets[j]) / union if union else 0.0
+        else:
+            score = estimate_jaccard(signatures, i, j)
+        if score >= threshold:
+            result[(i, j)] = score
+    return result
@@ -0,0 +1,37 @@
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Testler depo kökündeki modülleri doğrudan içe aktarır
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class HashingEncoder:
+    """Kelime özetlerinden deterministik gömme üreten küçük SBERT yerine geçen model."""
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        vectors = np.full((len(texts), 16), 0.01, dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                h = int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16)
+                vectors[row, h % 16] += 1.0
+                vectors[row, h // 16 % 16] += 0.5
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    """comparison_engine'in SBERT modelini HashingEncoder ile değiştirir; gömme önbelleği kapatılır."""
+    import comparison_engine
+
+    monkeypatch.setattr(comparison_engine.SEMANTIC_MODEL, "_model", HashingEncoder())
+    monkeypatch.setattr(comparison_engine.SEMANTIC_MODEL, "_attempted", True)
+    monkeypatch.setattr(comparison_engine, "EMBEDDING_CACHE", None)
+    return comparison_engine
@@ -0,0 +1,85 @@
+"""Toplu girdi hizalamasının (align_entries/score_block) compare_cv_data ile tutarlılığı."""
+
+import numpy as np
+import pytest
+
+from comparison_engine import (SEMANTIC_SECTIONS, SET_SECTIONS, _section_entries, align_entries,
+                               build_features, compare_cv_data, encode_texts, score_block)
+
+CVS = [
+    {
+        "ÖZET": "python backend developer",
+        "DENEYİM": [{"Raw_Entry": "python django api development"}, {"Raw_Entry": "sql database tuning"}],
+        "EĞİTİM": [{"Raw_Entry": "computer engineering bachelor"}],
+        "PROJELER": [{"Raw_Entry": "docker deployment pipeline"}],
+        "YETENEKLER": ["python", "sql", "docker"],
+        "YABANCI_DİL": [{"dil": "İngilizce"}],
+    },
+    {
+        "ÖZET": "java backend engineer",
+        "DENEYİM": [{"Raw_Entry": "java spring api development"}, {"Raw_Entry": "sql database tuning"},
+                    {"Raw_Entry": "team lead"}],
+        "EĞİTİM": [{"Raw_Entry": "computer engineering master"}],
+        "REFERANSLAR": [{"raw": "Ayşe Yılmaz, Acme", "name": "Ayşe Yılmaz"}],
+        "YETENEKLER": ["java", "sql"],
+        "YABANCI_DİL": [{"dil": "ingilizce"}, {"dil": "Almanca"}],
+    },
+    {
+        # Deneyimi ve özeti olmayan CV: bu bölümler her karşılaştırmada 0 almalı
+        "EĞİTİM": [{"Raw_Entry": "business administration"}],
+        "KİŞİSEL_BECERİLER": ["communication", "teamwork"],
+        "YETENEKLER": ["excel"],
+    },
+    {
+        "ÖZET": "python backend developer",
+        "DENEYİM": [{"Raw_Entry": "sql database tuning"}, {"Raw_Entry": "python django api development"}],
+        "KURSLAR": ["machine learning"],
+        "YETENEKLER": ["python", "sql", "docker", "aws"],
+    },
+]
+
+
+def _brute_force(data_a, data_b, section, alignment):
+    entries_a, entries_b = _section_entries(data_a, section), _section_entries(data_b, section)
+    if not entries_a or not entries_b:
+        return 0.0
+    sims = np.clip(encode_texts(entries_a) @ encode_texts(entries_b).T, 0.0, None)
+    if alignment == "max":
+        return float(sims.max())
+    return float((sims.max(axis=1).mean() + sims.max(axis=0).mean()) / 2)
+
+
+@pytest.mark.parametrize("alignment", ["mean", "max"])
+def test_align_entries_matches_brute_force(fake_encoder, monkeypatch, alignment):
+    monkeypatch.setattr(fake_encoder, "ENTRY_ALIGNMENT", alignment)
+    features = build_features(CVS)
+    for section in SEMANTIC_SECTIONS:
+        entries = features["entries"][section]
+        matrix = align_entries(entries["embeddings"], entries["offsets"], entries["embeddings"], entries["offsets"])
+        for i, data_a in enumerate(CVS):
+            for j, data_b in enumerate(CVS):
+                assert matrix[i, j] == pytest.approx(_brute_force(data_a, data_b, section, alignment), abs=1e-5)
+
+
+@pytest.mark.parametrize("block_elements", [1 << 24, 3])
+def test_score_block_matches_compare_cv_data(fake_encoder, monkeypatch, block_elements):
+    # Küçük blok sınırı sütun CV'lerini gruplara bölen yolu da çalıştırır
+    monkeypatch.setattr(fake_encoder, "ENTRY_BLOCK_ELEMENTS", block_elements)
+    indices = list(range(len(CVS)))
+    total, sections = score_block(build_features(CVS), indices, indices)
+    for i, data_a in enumerate(CVS):
+        for j, data_b in enumerate(CVS):
+            expected_total, expected = compare_cv_data(data_a, data_b)
+            assert total[i, j] == pytest.approx(expected_total, abs=1.1e-3)
+            for section in SET_SECTIONS + SEMANTIC_SECTIONS:
+                assert sections[section][i, j] == pytest.approx(expected[section], abs=1e-5)
+
+
+def test_section_empty_on_one_side_scores_zero(fake_encoder):
+    indices = list(range(len(CVS)))
+    _, sections = score_block(build_features(CVS), indices, indices)
+    for section in ("DENEYİM", "ÖZET"):
+        assert np.all(sections[section][2] == 0) and np.all(sections[section][:, 2] == 0)
+        assert compare_cv_data(CVS[0], CVS[2])[1][section] == 0.0
+    # Aynı girdiler farklı sırada olsa da tam eşleşir
+    assert sections["DENEYİM"][0, 3] == pytest.approx(1.0, abs=1e-5)
@@ -0,0 +1,34 @@
+"""dedup.group_duplicates bantlamasının kaba kuvvet karşılaştırmayla tutarlılığı."""
+
+import random
+
+import pytest
+
+from dedup import FINGERPRINT_BITS, group_duplicates, hamming
+
+
+def _flip(fp, bits):
+    for bit in bits:
+        fp ^= 1 << bit
+    return fp
+
+
+@pytest.mark.parametrize("max_distance", [0, 3, 6, 9, 12])
+def test_fingerprints_within_max_distance_are_grouped(max_distance):
+    rng = random.Random(max_distance)
+    for _ in range(50):
+        fp = rng.getrandbits(FINGERPRINT_BITS)
+        near = _flip(fp, rng.sample(range(FINGERPRINT_BITS), max_distance))
+        far = _flip(fp, rng.sample(range(FINGERPRINT_BITS), max_distance + 1))
+        assert group_duplicates([fp, near, None, far], max_distance) == [0, 0, 2, 3]
+
+
+def test_groups_match_brute_force():
+    rng = random.Random(7)
+    seeds = [rng.getrandbits(FINGERPRINT_BITS) for _ in range(10)]
+    fps = [_flip(rng.choice(seeds), rng.sample(range(FINGERPRINT_BITS), rng.randint(0, 4))) for _ in range(80)]
+    reps = group_duplicates(fps, max_distance=6)
+    for i in range(len(fps)):
+        for j in range(i + 1, len(fps)):
+            if hamming(fps[i], fps[j]) <= 6:
+                assert reps[i] == reps[j]
@@ -0,0 +1,54 @@
+"""Taranmış sayfaların OCR ile okunması: tek sayfanın hatası diğer sayfaları düşürmemeli."""
+
+import fitz
+import numpy as np
+import pytest
+
+import cv_parser
+
+GRAY_LEVELS = [40, 120, 200]
+
+
+class FailingReader:
+    """Sayfayı gri tonuna göre tanır; en açık (son) sayfada hata verir."""
+
+    def readtext(self, image, detail=0, paragraph=True, **kwargs):
+        level = int(np.asarray(image).mean())
+        if level > 160:
+            raise ConnectionError("model sunucusu kapandı")
+        return [f"taranmis sayfa metni gri tonu {level // 10} " * 3]
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    """Metin katmanı olmayan, her sayfası tek renkli bir görüntü olan 3 sayfalık PDF."""
+    doc = fitz.open()
+    for level in GRAY_LEVELS:
+        page = doc.new_page(width=200, height=200)
+        pix = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 50, 50), False)
+        pix.set_rect(pix.irect, (level,))
+        page.insert_image(page.rect, pixmap=pix)
+    path = tmp_path / "taranmis.pdf"
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def failing_reader(monkeypatch):
+    monkeypatch.setattr(cv_parser, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(cv_parser, "OCR_CACHE", None)
+    monkeypatch.setattr(cv_parser.OCR_MODEL, "_model", FailingReader())
+    monkeypatch.setattr(cv_parser.OCR_MODEL, "_attempted", True)
+
+
+def test_iter_ocr_pages_skips_failing_page(scanned_pdf, failing_reader):
+    pages = list(cv_parser.iter_ocr_pages(scanned_pdf, [0, 1, 2]))
+    assert [page_no for page_no, _ in pages] == [0, 1]
+
+
+@pytest.mark.parametrize("engine", ["pymupdf", "pdfplumber"])
+def test_failing_page_keeps_partial_text_and_marks_truncated(scanned_pdf, failing_reader, engine):
+    text, truncated = cv_parser.extract_text_budgeted(scanned_pdf, engine=engine)
+    assert truncated
+    assert "gri tonu 4" in text and "gri tonu 12" in text
@@ -0,0 +1,75 @@
+"""Budamalı puanlamanın (score_block_pruned/compare_cv_data_pruned) tam puanlamayla aynı sonucu vermesi."""
+
+import random
+
+import numpy as np
+import pytest
+
+from comparison_engine import (SEMANTIC_SECTIONS, build_features, compare_cv_data, compare_cv_data_pruned,
+                               score_block, score_block_pruned)
+
+WORDS = "python java sql docker react aws nlp go rust kotlin excel spring django".split()
+
+
+def _random_cvs(n, seed=5):
+    rng = random.Random(seed)
+
+    def entry():
+        return " ".join(rng.choices(WORDS, k=rng.randint(2, 6)))
+
+    cvs = []
+    for i in range(n):
+        data = {"DENEYİM": [{"Raw_Entry": entry()} for _ in range(rng.randint(0, 4))],
+                "EĞİTİM": [{"Raw_Entry": entry()} for _ in range(rng.randint(0, 2))],
+                "PROJELER": [{"Raw_Entry": entry()} for _ in range(rng.randint(0, 3))],
+                "YETENEKLER": rng.sample(WORDS, rng.randint(0, 6)),
+                "TEKNİK_BECERİLER": rng.sample(WORDS, rng.randint(0, 3))}
+        if i % 3:
+            data["ÖZET"] = entry()
+        cvs.append(data)
+    return cvs
+
+
+CVS = _random_cvs(24)
+
+
+@pytest.fixture
+def full_scores(fake_encoder):
+    features = build_features(CVS)
+    indices = list(range(len(CVS)))
+    total, sections = score_block(features, indices, indices)
+    return features, indices, total, sections
+
+
+@pytest.mark.parametrize("threshold", [0.1, 0.3, 0.5])
+def test_pruned_block_keeps_pairs_above_threshold(full_scores, threshold):
+    features, indices, total, sections = full_scores
+    pruned_total, pruned_sections = score_block_pruned(features, indices, indices, threshold=threshold)
+    above = total >= threshold
+    assert np.array_equal(pruned_total[above], total[above])
+    for section in SEMANTIC_SECTIONS:
+        assert np.allclose(pruned_sections[section][above], sections[section][above])
+    # Elenen (NaN) hücrelerin hiçbiri eşiği geçmemeliydi
+    assert not np.any(above & np.isnan(pruned_total))
+
+
+@pytest.mark.parametrize("top_k", [1, 3, 8])
+def test_pruned_block_keeps_top_k(full_scores, top_k):
+    features, indices, total, _ = full_scores
+    for row in indices:
+        pruned_total, _ = score_block_pruned(features, [row], indices, top_k=top_k)
+        expected = np.sort(total[row])[::-1][:top_k]
+        found = np.sort(pruned_total[0][~np.isnan(pruned_total[0])])[::-1][:top_k]
+        assert np.array_equal(found, expected)
+
+
+def test_compare_cv_data_pruned_matches_unpruned(fake_encoder):
+    threshold = 0.3
+    for data_a in CVS[:8]:
+        for data_b in CVS:
+            expected_total, expected = compare_cv_data(data_a, data_b)
+            result = compare_cv_data_pruned(data_a, data_b, threshold)
+            if result is None:
+                assert expected_total < threshold
+            else:
+                assert result == (expected_total, expected)
@@ -0,0 +1,58 @@
+"""extract_sections_simple / find_section_spans için küçük, deterministik örnekler."""
+
+from cv_parser import extract_sections_simple, find_section_spans
+
+CV_TEXT = """Ayşe Yılmaz
+ayse@example.com
+
+ÖZET
+Backend geliştirici.
+
+Experience
+Acme Corp 2019-2023, iletişim protokolleri üzerinde çalıştı.
+
+EGITIM
+Boğaziçi Üniversitesi 2015-2019
+
+Technical Skills
+Python, Docker
+
+YABANCI DİLLER
+İngilizce - ileri
+
+References
+Mehmet Demir
+"""
+
+
+def test_aliases_map_to_canonical_sections():
+    sections = extract_sections_simple(CV_TEXT)
+    assert list(sections) == ["GENERAL", "ÖZET", "DENEYİM", "EĞİTİM", "TEKNİK BECERİLER", "YABANCI DİL", "REFERANSLAR"]
+    assert sections["GENERAL"] == "Ayşe Yılmaz\nayse@example.com"
+    assert sections["EĞİTİM"] == "Boğaziçi Üniversitesi 2015-2019"
+    assert sections["TEKNİK BECERİLER"] == "Python, Docker"
+    assert sections["REFERANSLAR"] == "Mehmet Demir"
+
+
+def test_heading_word_inside_sentence_does_not_split():
+    sections = extract_sections_simple(CV_TEXT)
+    assert "İLETİŞİM" not in sections
+    assert sections["DENEYİM"] == "Acme Corp 2019-2023, iletişim protokolleri üzerinde çalıştı."
+
+
+def test_headings_need_upper_case_or_line_start():
+    text = "Deneyim\nX şirketi, teknik liderlik.\nEkip için SKILLS eğitimi verdi."
+    keys = [key for key, _, _ in find_section_spans(text)]
+    # Satır başındaki "Deneyim" ve tamamı büyük "SKILLS" başlıktır; küçük harfli "teknik" değildir
+    assert keys == ["GENERAL", "DENEYİM", "YETENEKLER"]
+
+
+def test_repeated_section_is_appended():
+    sections = extract_sections_simple("SKILLS\nPython\n\nDENEYİM\nAcme\n\nYETENEKLER\nSQL")
+    assert sections["YETENEKLER"] == "Python\n\nSQL"
+
+
+def test_spans_cover_text_in_order():
+    spans = find_section_spans(CV_TEXT)
+    assert spans[0][1] == 0 and spans[-1][2] == len(CV_TEXT)
+    assert all(prev[2] <= cur[1] for prev, cur in zip(spans, spans[1:]))
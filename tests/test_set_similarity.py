@@ -0,0 +1,62 @@
+"""set_similarity'nin compare_cv_data'daki kümeler ile tutarlılığı."""
+
+import itertools
+import random
+
+import numpy as np
+
+from comparison_engine import SET_SECTIONS, _jaccard, _set_block, build_features
+from set_similarity import jaccard_matrix, similar_pairs
+
+WORDS = ["python", "java", "sql", "docker", "react", "aws", "go", "rust", "kotlin", "excel"]
+
+
+def _random_sets(n, seed=3):
+    rng = random.Random(seed)
+    return [set(rng.sample(WORDS, rng.randint(0, 6))) for _ in range(n)]
+
+
+def test_jaccard_matrix_matches_pairwise_jaccard():
+    sets_a = _random_sets(12) + [set(), {"python"}]
+    sets_b = _random_sets(9, seed=5) + [set()]
+    matrix = jaccard_matrix(sets_a, sets_b)
+    expected = np.array([[_jaccard(a, b) for b in sets_b] for a in sets_a])
+    assert matrix.shape == (len(sets_a), len(sets_b))
+    assert np.array_equal(matrix, expected)
+
+
+def test_jaccard_matrix_square_and_none_as_empty():
+    sets = _random_sets(8) + [None]
+    matrix = jaccard_matrix(sets)
+    assert np.allclose(matrix, matrix.T)
+    assert np.all(matrix[-1] == 0) and np.all(matrix[:, -1] == 0)
+
+
+def test_similar_pairs_skips_missing_sections():
+    sets = [{"python", "sql"}, None, {"python", "sql"}, set(), {"python", "sql", "go"}]
+    pairs = similar_pairs(sets, threshold=0.5)
+    assert pairs[(0, 2)] == 1.0
+    assert all(1 not in pair and 3 not in pair for pair in pairs)
+
+
+def test_similar_pairs_exact_scores_match_jaccard():
+    sets = _random_sets(30)
+    for (i, j), score in similar_pairs(sets, threshold=0.0, bands=64).items():
+        assert score == _jaccard(sets[i], sets[j])
+
+
+def test_approximate_set_block_matches_exact_on_found_pairs():
+    rng = random.Random(11)
+    data_list = [{"YETENEKLER": rng.sample(WORDS, rng.randint(1, 5)),
+                  "TEKNİK_BECERİLER": rng.sample(WORDS, rng.randint(0, 3))} for _ in range(20)]
+    exact = build_features(data_list)
+    approx = build_features(data_list, approximate_sets=True)
+    rows = list(range(20))
+    for section in SET_SECTIONS:
+        full = _set_block(exact, section, rows, rows)
+        estimate = _set_block(approx, section, rows, rows)
+        # Bulunan çiftler kesin skorludur, bulunamayanlar 0 alır; aynı kümeler her zaman bulunur
+        assert np.all((estimate == full) | (estimate == 0))
+        for i, j in itertools.combinations(rows, 2):
+            if full[i, j] == 1.0:
+                assert estimate[i, j] == 1.0